@@ -0,0 +1,30 @@
+import os
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+from iac_metrics import metrics_policy
+from arm_throttling import write_rate_policy
+
+# --- Configuration ---
+# Points every management client at another ARM endpoint instead of https://management.azure.com,
+# e.g. the local stand-in used by the benchmarks:  AZURE_IAC_ARM_ENDPOINT=http://127.0.0.1:8765
+ARM_ENDPOINT = os.getenv("AZURE_IAC_ARM_ENDPOINT")
+
+
+class _StandInAuthenticationPolicy(SansIOHTTPPolicy):
+    """Sends a fixed bearer token: the stand-in does not check it, and no real token may leave the machine."""
+
+    def on_request(self, request):
+        request.http_request.headers["Authorization"] = "Bearer stand-in"
+
+
+def arm_client_kwargs() -> dict:
+    """
+    Extra keyword arguments for synchronous management clients only: the write rate limit policy blocks
+    in time.sleep, which would stall an event loop (the async compute tools use compute_bulk.concurrency_limiter).
+    Always adds the per-call latency/retry metrics policy and the shared write rate limit policy
+    (inactive unless the tool enabled it). When AZURE_IAC_ARM_ENDPOINT is set, the client
+    also talks to that endpoint and never asks the credential for a token (which would refuse plain-HTTP URLs).
+    """
+    kwargs = {"per_retry_policies": [metrics_policy, write_rate_policy]}
+    if ARM_ENDPOINT:
+        kwargs.update(base_url=ARM_ENDPOINT.rstrip("/"), authentication_policy=_StandInAuthenticationPolicy())
+    return kwargs
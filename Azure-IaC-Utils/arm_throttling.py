@@ -0,0 +1,232 @@
+import os
+import time
+import asyncio
+import threading
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+from iac_metrics import metrics
+
+# --- Configuration ---
+# Hard bounds for the adaptive concurrency limit.
+MIN_CONCURRENCY = 2
+MAX_CONCURRENCY = 500
+
+# Back off when ARM reports fewer remaining requests than this in the current window.
+LOW_REMAINING_READS = 100
+LOW_REMAINING_WRITES = 50
+
+# Minimum seconds between two decreases, so one burst of 429s halves the limit only once.
+DECREASE_COOLDOWN = 5
+
+# Shared write budget (requests per second, burst) for tools that run many deletes at once. ARM refills a
+# subscription's write bucket at 10 requests/s (burst 200) per region; the default leaves room for other
+# callers of the same subscription.
+WRITE_RATE = float(os.getenv("AZURE_IAC_WRITE_RATE", 5))
+WRITE_BURST = int(os.getenv("AZURE_IAC_WRITE_BURST", 20))
+
+REMAINING_READS_HEADER = "x-ms-ratelimit-remaining-subscription-reads"
+REMAINING_WRITES_HEADER = "x-ms-ratelimit-remaining-subscription-writes"
+
+
+def _header_int(headers, name: str):
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD (additive-increase / multiplicative-decrease) replacement for a fixed asyncio.Semaphore.
+
+    - Every 'limit' successful responses raise the limit by one.
+    - A 429, or ARM reporting that few subscription reads/writes remain, halves the limit.
+    - A 429 with Retry-After also pauses new acquisitions until that time has passed.
+
+    Feed it the status code and headers of every HTTP response with observe_response()
+    (e.g. as AioComputeEngine's response_hook) and use it like a semaphore:
+        async with limiter:
+            ...
+    """
+
+    def __init__(self, initial: int, minimum: int = MIN_CONCURRENCY, maximum: int = MAX_CONCURRENCY):
+        self.minimum = minimum
+        self.maximum = max(maximum, initial)
+        self.initial = initial
+        self.limit = initial
+        self.peak_limit = initial
+        self.in_flight = 0
+        self.throttled_responses = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters = []
+
+    async def acquire(self):
+        queued_at = time.monotonic()
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                metrics.observe_queue_wait("concurrency_limiter", time.monotonic() - queued_at)
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def _wake(self):
+        # Waiters re-check the limit themselves, so waking all of them is always safe.
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        old_limit = self.limit
+        self.limit = max(self.minimum, self.limit // 2)
+        self._successes = 0
+        if self.limit != old_limit:
+            print(f"  [Throttle] {reason}: concurrency {old_limit} -> {self.limit}", flush=True)
+
+    def observe_response(self, status_code: int, headers):
+        """Adjusts the limit from a response's status code and ARM rate-limit headers."""
+        if status_code == 429:
+            self.throttled_responses += 1
+            try:
+                retry_after = float(headers.get("Retry-After", 0))
+            except (TypeError, ValueError):
+                retry_after = 0
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._decrease(f"HTTP 429 (Retry-After {retry_after:.0f}s)")
+            return
+
+        remaining_reads = _header_int(headers, REMAINING_READS_HEADER)
+        remaining_writes = _header_int(headers, REMAINING_WRITES_HEADER)
+        if remaining_writes is not None and remaining_writes < LOW_REMAINING_WRITES:
+            self._decrease(f"{remaining_writes} subscription writes remaining")
+            return
+        if remaining_reads is not None and remaining_reads < LOW_REMAINING_READS:
+            self._decrease(f"{remaining_reads} subscription reads remaining")
+            return
+
+        if status_code < 400:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self.peak_limit = max(self.peak_limit, self.limit)
+                self._successes = 0
+                self._wake()
+
+    def summary(self) -> str:
+        return (f"Concurrency: started at {self.initial}, settled at {self.limit} "
+                f"(peak {self.peak_limit}, {self.throttled_responses} throttled responses).")
+
+
+class WriteRateLimiter:
+    """
+    Thread-safe token bucket for ARM writes (PUT/PATCH/POST/DELETE), shared by every client of the process.
+
+    acquire() blocks until a token is available: 'rate' tokens per second, at most 'burst' saved up.
+    A 429 pauses every writer for its Retry-After, and ARM reporting few remaining writes slows the refill
+    to a quarter until the next response with enough headroom.
+    """
+
+    def __init__(self, rate: float = WRITE_RATE, burst: int = WRITE_BURST):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Write rate must be > 0 and burst >= 1 (got rate={rate}, burst={burst})")
+        self.rate = rate
+        self.burst = burst
+        self.throttled_responses = 0
+        self.writes = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._slowed = False
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        rate = self.rate / 4 if self._slowed else self.rate
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    def acquire(self):
+        queued_at = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.writes += 1
+                    break
+                rate = self.rate / 4 if self._slowed else self.rate
+                delay = max(self._paused_until - now, (1 - self._tokens) / rate)
+            time.sleep(delay)
+        metrics.observe_queue_wait("write_rate_limiter", time.monotonic() - queued_at)
+
+    def observe_response(self, status_code: int, headers):
+        with self._lock:
+            if status_code == 429:
+                self.throttled_responses += 1
+                try:
+                    retry_after = float(headers.get("Retry-After", 0))
+                except (TypeError, ValueError):
+                    retry_after = 0
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                return
+            remaining_writes = _header_int(headers, REMAINING_WRITES_HEADER)
+            if remaining_writes is not None:
+                self._slowed = remaining_writes < LOW_REMAINING_WRITES
+
+    def summary(self) -> str:
+        return (f"Write rate limit: {self.rate:g}/s (burst {self.burst}), {self.writes} writes, "
+                f"{self.throttled_responses} throttled responses.")
+
+
+class WriteRateLimitPolicy(SansIOHTTPPolicy):
+    """
+    azure-core per-retry policy: every write attempt takes a token from the process-wide WriteRateLimiter
+    (see enable_write_rate_limit()). Reads, including LRO status polls, are never delayed. Added to the
+    management clients by arm_client_kwargs(); does nothing until a tool enables the limiter.
+    """
+
+    def on_request(self, request):
+        if _write_limiter is not None and request.http_request.method not in ("GET", "HEAD"):
+            _write_limiter.acquire()
+
+    def on_response(self, request, response):
+        if _write_limiter is not None:
+            http_response = response.http_response
+            _write_limiter.observe_response(http_response.status_code, http_response.headers)
+
+
+_write_limiter = None
+write_rate_policy = WriteRateLimitPolicy()
+
+
+def enable_write_rate_limit(rate: float = WRITE_RATE, burst: int = WRITE_BURST) -> WriteRateLimiter:
+    """Makes every sync management client of the process share one write budget. Returns the limiter."""
+    global _write_limiter
+    _write_limiter = WriteRateLimiter(rate, burst)
+    return _write_limiter
@@ -0,0 +1,90 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Configuration ---
+# Pooled HTTPS connections per host, shared by every sync client of the process. urllib3's default is 10,
+# which the parallel scans and deletes overflow ("Connection pool is full, discarding connection").
+# Tools raise it to their own worker count with ensure_pool_size().
+DEFAULT_POOL_SIZE = int(os.getenv("AZURE_IAC_POOL_SIZE", 32))
+
+
+class ClientFactory:
+    """
+    Process-wide cache of Azure SDK clients, all sending through one requests.Session.
+
+    Clients are cached per (client class, credential, subscription, resource group, workspace), so a
+    scan thread or a per-resource-group delete reuses the client (and its warm TLS connections) instead
+    of building a new one with its own pool. Use get_client_factory() rather than creating this directly.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+        self.pool_size = 0
+        self.session = requests.Session()
+        self._clients = {}
+        self._transport = None
+        self._lock = threading.Lock()
+        self.ensure_pool_size(pool_size)
+
+    def ensure_pool_size(self, pool_size: int):
+        """Grows the shared connection pool to at least 'pool_size' connections per host."""
+        with self._lock:
+            if pool_size <= self.pool_size:
+                return
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+            self.pool_size = pool_size
+
+    @property
+    def transport(self):
+        """azure-core transport over the shared session (never closes it when a client is closed)."""
+        with self._lock:
+            if self._transport is None:
+                from azure.core.pipeline.transport import RequestsTransport
+                self._transport = RequestsTransport(session=self.session, session_owner=False)
+            return self._transport
+
+    def _get(self, key: tuple, build):
+        with self._lock:
+            client = self._clients.get(key)
+        if client is None:
+            client = build()
+            with self._lock:
+                client = self._clients.setdefault(key, client)
+        return client
+
+    def get(self, client_class, credential, subscription_id: str = None):
+        """A management client (ResourceManagementClient, ComputeManagementClient, ...) for one subscription."""
+        from arm_endpoint import arm_client_kwargs
+
+        def _build():
+            if subscription_id is None:  # Tenant-level clients such as ResourceGraphClient.
+                return client_class(credential, transport=self.transport, **arm_client_kwargs())
+            return client_class(credential, subscription_id, transport=self.transport, **arm_client_kwargs())
+
+        return self._get((client_class.__name__, id(credential), subscription_id), _build)
+
+    def ml_client(self, credential, subscription_id: str, resource_group: str, workspace_name: str):
+        """An azure.ai.ml MLClient scoped to one workspace (imported here: azure.ai.ml is slow to import)."""
+        from azure.ai.ml import MLClient
+
+        key = ("MLClient", id(credential), subscription_id, resource_group.lower(), workspace_name.lower())
+        return self._get(key, lambda: MLClient(credential, subscription_id, resource_group, workspace_name,
+                                               transport=self.transport))
+
+
+_factory = None
+_factory_lock = threading.Lock()
+
+
+def get_client_factory(pool_size: int = None) -> ClientFactory:
+    """The process-wide ClientFactory; 'pool_size' grows its connection pool to the caller's concurrency."""
+    global _factory
+    with _factory_lock:
+        if _factory is None:
+            _factory = ClientFactory()
+    if pool_size:
+        _factory.ensure_pool_size(pool_size)
+    return _factory
@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import hashlib
+import asyncio
+import threading
+from iac_common import get_cache_dir
+
+# --- Configuration ---
+# Which credential type worked last time (not secret: only the type name is stored).
+CREDENTIAL_STATE_PATH = os.path.join(get_cache_dir(), "credential.json")
+# Access tokens shared by every run of every tool, encrypted with the OS keyring (DPAPI / Keychain / libsecret).
+TOKEN_CACHE_PATH = os.getenv("AZURE_IAC_TOKEN_CACHE_PATH") or os.path.join(get_cache_dir(), "token_cache.bin")
+# AZURE_IAC_TOKEN_CACHE=0 keeps tokens in memory only.
+TOKEN_CACHE_ENABLED = os.getenv("AZURE_IAC_TOKEN_CACHE", "1") != "0"
+# Where no keyring is available (headless Linux without libsecret), the cache is disabled unless this is set.
+ALLOW_UNENCRYPTED_CACHE = os.getenv("AZURE_IAC_TOKEN_CACHE_ALLOW_UNENCRYPTED") == "1"
+
+# Tokens are renewed this many seconds before they expire, so long runs never send one that is about to lapse.
+REFRESH_MARGIN = 300
+
+# Tried in this order the first time; afterwards the type remembered from the last run goes first.
+# Unlike DefaultAzureCredential, managed identity comes last: on a workstation its IMDS probe only times out.
+CREDENTIAL_TYPES = [
+    "EnvironmentCredential",
+    "WorkloadIdentityCredential",
+    "AzureCliCredential",
+    "AzurePowerShellCredential",
+    "AzureDeveloperCliCredential",
+    "ManagedIdentityCredential",
+]
+
+
+class PersistentTokenStore:
+    """
+    Access tokens on disk, shared between processes: {cache key: {"token": ..., "expires_on": ...}}.
+    Uses msal-extensions (installed with azure-identity) for encryption and cross-process locking.
+    """
+
+    def __init__(self, path: str = TOKEN_CACHE_PATH):
+        self.path = path
+        self.persistence = None
+        try:
+            from msal_extensions import build_encrypted_persistence, FilePersistence
+        except ImportError:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            self.persistence = build_encrypted_persistence(path)
+        except Exception:
+            if ALLOW_UNENCRYPTED_CACHE:
+                self.persistence = FilePersistence(path)
+
+    def load(self) -> dict:
+        if self.persistence is None:
+            return {}
+        try:
+            return json.loads(self.persistence.load())
+        except Exception:
+            return {}  # Missing, unreadable or written by another user: start empty.
+
+    def save(self, key: str, token):
+        if self.persistence is None:
+            return
+        from msal_extensions import CrossPlatLock
+
+        try:
+            with CrossPlatLock(f"{self.path}.lockfile"):
+                entries = {k: v for k, v in self.load().items() if v.get("expires_on", 0) > time.time()}
+                entries[key] = {"token": token.token, "expires_on": token.expires_on}
+                self.persistence.save(json.dumps(entries))
+        except Exception:
+            pass  # The cache is an optimisation: a failed write only costs a token request next time.
+
+
+def _identity_fingerprint() -> str:
+    """
+    Short hash of who the credentials sign in as: the service principal / managed identity named by the
+    AZURE_* environment variables and the default account of the Azure CLI profile. Cached tokens are keyed
+    by it, so after 'az login' as someone else (or 'az account set' to another tenant) they are not reused.
+    """
+    identity = [os.getenv(name, "") for name in ("AZURE_CLIENT_ID", "AZURE_TENANT_ID", "AZURE_USERNAME")]
+    profile_path = os.path.join(os.getenv("AZURE_CONFIG_DIR") or os.path.expanduser(os.path.join("~", ".azure")),
+                                "azureProfile.json")
+    try:
+        with open(profile_path, encoding="utf-8-sig") as f:  # Written by the CLI with a BOM.
+            subscriptions = json.load(f).get("subscriptions") or []
+    except (OSError, ValueError, AttributeError):
+        subscriptions = []
+    for subscription in subscriptions:
+        if subscription.get("isDefault"):
+            user = subscription.get("user") or {}
+            identity += [user.get("type", ""), user.get("name", ""), subscription.get("tenantId", "")]
+            break
+    return hashlib.sha256("|".join(identity).encode("utf-8")).hexdigest()[:16]
+
+
+def _load_remembered_type():
+    try:
+        with open(CREDENTIAL_STATE_PATH, encoding="utf-8") as f:
+            return json.load(f).get("credential_type")
+    except (OSError, ValueError):
+        return None
+
+
+def _remember_type(credential_type: str):
+    try:
+        os.makedirs(os.path.dirname(CREDENTIAL_STATE_PATH), exist_ok=True)
+        with open(CREDENTIAL_STATE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"credential_type": credential_type, "updated_at": time.time()}, f)
+    except OSError:
+        pass
+
+
+class SharedCredential:
+    """
+    Process-wide TokenCredential used by every Azure-IaC-Utils tool (see get_credential()).
+
+    - Tokens are served from memory, then from the persistent cache, so a repeated run usually sends
+      no token request at all (no 'az account get-access-token' subprocess). Cached tokens belong to the
+      identity that was signed in when they were issued (see _identity_fingerprint()).
+    - When a token is needed, the credential type that worked last time is tried first instead of
+      walking the whole DefaultAzureCredential chain.
+    - Tokens within REFRESH_MARGIN of expiry are renewed; if renewal fails, the old one is used while it lasts.
+    - One token request at a time: parallel scan threads wait for it instead of each starting their own.
+    """
+
+    def __init__(self, use_token_cache: bool = TOKEN_CACHE_ENABLED):
+        self.credential = None
+        self.credential_type = None
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._store = PersistentTokenStore() if use_token_cache else None
+        self._store_entries = None
+        self._identity = _identity_fingerprint()
+
+    def _cache_key(self, scopes: tuple, tenant_id: str = None) -> str:
+        return f"{self._identity}|{tenant_id or ''}|{' '.join(sorted(scopes))}"
+
+    def cached_token(self, *scopes, tenant_id: str = None):
+        """The in-memory token for these scopes if it is not due for renewal, else None. Never blocks."""
+        token = self._tokens.get(self._cache_key(scopes, tenant_id))
+        if token is not None and token.expires_on - time.time() > REFRESH_MARGIN:
+            return token
+        return None
+
+    def get_token(self, *scopes, claims: str = None, tenant_id: str = None, **kwargs):
+        from azure.core.credentials import AccessToken
+
+        if claims:
+            # A claims challenge (e.g. CAE revocation) always needs a fresh token.
+            return self._acquire(scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+
+        key = self._cache_key(scopes, tenant_id)
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is None and self._store is not None:
+                if self._store_entries is None:
+                    self._store_entries = self._store.load()
+                entry = self._store_entries.get(key)
+                if entry:
+                    token = AccessToken(entry["token"], int(entry["expires_on"]))
+                    self._tokens[key] = token
+            if token is not None and token.expires_on - time.time() > REFRESH_MARGIN:
+                return token
+
+            try:
+                new_token = self._acquire(scopes, tenant_id=tenant_id, **kwargs)
+            except Exception:
+                if token is not None and token.expires_on - time.time() > 30:
+                    return token  # Still valid: try to renew again on the next call.
+                raise
+            self._tokens[key] = new_token
+            if self._store is not None:
+                self._store.save(key, new_token)
+            return new_token
+
+    def _acquire(self, scopes: tuple, **kwargs):
+        if self.credential is not None:
+            return self.credential.get_token(*scopes, **kwargs)
+
+        import azure.identity
+        from azure.core.exceptions import ClientAuthenticationError
+
+        remembered = _load_remembered_type()
+        order = ([remembered] if remembered in CREDENTIAL_TYPES else []) + \
+                [name for name in CREDENTIAL_TYPES if name != remembered]
+        errors = []
+        for name in order:
+            try:
+                credential = getattr(azure.identity, name)()
+                token = credential.get_token(*scopes, **kwargs)
+            except (ClientAuthenticationError, ValueError) as e:
+                # CredentialUnavailableError is a ClientAuthenticationError; ValueError = not configured here.
+                errors.append(f"{name}: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+                continue
+            self.credential, self.credential_type = credential, name
+            if name != remembered:
+                _remember_type(name)
+            return token
+        raise ClientAuthenticationError(message="No credential could get a token:\n  " + "\n  ".join(errors))
+
+    def close(self):
+        if self.credential is not None and hasattr(self.credential, "close"):
+            self.credential.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        # Shared by the whole process: closed by whoever created it, not by each client.
+        pass
+
+
+class AsyncSharedCredential:
+    """
+    Async TokenCredential view of a SharedCredential for the aio clients (compute_aio_engine.py).
+    Cached tokens are returned directly; a token request runs in a worker thread.
+    """
+
+    def __init__(self, credential: SharedCredential):
+        self._credential = credential
+
+    async def get_token(self, *scopes, **kwargs):
+        if not kwargs.get("claims"):
+            token = self._credential.cached_token(*scopes, tenant_id=kwargs.get("tenant_id"))
+            if token is not None:
+                return token
+        return await asyncio.to_thread(self._credential.get_token, *scopes, **kwargs)
+
+    async def close(self):
+        pass  # The underlying SharedCredential belongs to the process.
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+_shared_credential = None
+_shared_lock = threading.Lock()
+
+
+def get_credential() -> SharedCredential:
+    """The process-wide credential. Create clients with it instead of a new DefaultAzureCredential each time."""
+    global _shared_credential
+    with _shared_lock:
+        if _shared_credential is None:
+            _shared_credential = SharedCredential()
+        return _shared_credential
+
+
+def get_async_credential() -> AsyncSharedCredential:
+    return AsyncSharedCredential(get_credential())
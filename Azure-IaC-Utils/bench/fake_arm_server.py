@@ -0,0 +1,891 @@
+"""
+Local stand-in for the ARM / Azure ML control-plane endpoints used by the Azure-IaC-Utils tools.
+
+Emulates, for one fake subscription:
+  - resource group list / get / head / create / delete (LRO via Location)
+  - generic resource list (subscription-wide $filter and per resource group)
+  - other resources (workspace storage / key vault / app insights, VMs with their network and disks,
+    AI Foundry accounts and projects): list by type, get and delete (LRO via Location), refused while
+    another resource still references them, like ARM's InUse* errors
+  - Azure ML workspace get / list, compute list / get / start / stop (LRO via Azure-AsyncOperation)
+  - soft-deleted Cognitive Services accounts, Key Vaults and ML workspaces (list, purge / forceToPurge delete);
+    deleting a resource group (or an account / vault in it) soft-deletes its ML workspaces, AI accounts and key vaults
+  - Azure Resource Graph queries (paged with $skipToken)
+  - 429 throttling: random (--throttle-rate) and ARM-style read/write quotas with
+    x-ms-ratelimit-remaining-subscription-reads/writes headers
+with configurable latency distributions for every request and for LRO durations.
+
+Point the tools at it with AZURE_IAC_ARM_ENDPOINT (see arm_endpoint.py):
+    python bench/fake_arm_server.py --port 8765 --workspaces 300
+    AZURE_IAC_ARM_ENDPOINT=http://127.0.0.1:8765 python compute_chk.py --inventory graph
+
+Control endpoints:  GET /_stats  (request counters),  POST /_reset  (JSON body: new config, rebuilds the data).
+"""
+import re
+import json
+import math
+import time
+import uuid
+import heapq
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs, urlencode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIG = {
+    "subscription": "00000000-0000-0000-0000-000000000000",
+    "workspaces": 35,
+    "computes_per_workspace": 2,
+    "running_ratio": 0.5,
+    "rg_format": "{i:02d}_RG_LC",
+    "workspace_format": "{i:02d}mlworkspace",
+    # Storage account, key vault and application insights next to every workspace.
+    "extra_resources_per_rg": 3,
+    # Role assignments made directly on every resource group (like Terraform's user_rg_roles).
+    "role_assignments_per_rg": 2,
+    # VM with its NIC, NSG, public IP, VNet, OS disk and SSH key, N times in every resource group.
+    "vm_sets_per_rg": 0,
+    # AI Foundry (Cognitive Services) accounts per resource group, each with projects_per_account projects.
+    "foundry_accounts_per_rg": 0,
+    "projects_per_account": 2,
+    # The first N resource groups hold a soft-deleted AI account, key vault and (instead of a live one) ML workspace.
+    "soft_deleted": 0,
+    # How many of those soft-deleted key vaults have purge protection (purging them fails with 409).
+    "purge_protected": 1,
+    # The first N creations of a resource group that does not exist are refused (403 RequestDisallowedByPolicy),
+    # e.g. to fail the recreate step of delete_vm_resources after its delete has finished.
+    "rg_create_failures": 0,
+    "latency": "lognormal:0.05,0.5",
+    "lro_duration": "uniform:2,6",
+    "throttle_rate": 0.0,
+    # Seconds sent as Retry-After on LRO status responses (azure-core falls back to 30s without one).
+    "retry_after": 1,
+    # ARM-style quotas per window (0 = unlimited). Real ARM: 12000 reads / 1200 writes per hour.
+    "read_limit": 0,
+    "write_limit": 0,
+    "quota_window": 3600,
+    "page_size": 100,
+    "seed": 1,
+}
+
+
+def parse_distribution(spec: str):
+    """
+    'fixed:0.05', 'uniform:0.02,0.2', 'exp:0.1' (mean) or 'lognormal:0.05,0.5' (median, sigma)
+    -> function returning a sample in seconds.
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "exp":
+        return lambda: random.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown distribution '{spec}' (fixed, uniform, exp or lognormal)")
+
+
+class FakeSubscription:
+    """In-memory resource groups, workspaces and compute instances, plus the pending LROs."""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.lock = threading.Lock()
+        # Separate lock: error responses are sometimes sent while 'lock' is held.
+        self.stats_lock = threading.Lock()
+        self.latency = parse_distribution(config["latency"])
+        self.lro_duration = parse_distribution(config["lro_duration"])
+        self.resource_groups = {}
+        self.workspaces = {}
+        self.resources = {}  # rg key -> {lowercase resource id: resource}, everything but the workspaces
+        self.deleted_workspaces = {}
+        self.deleted_accounts = {}
+        self.deleted_vaults = {}
+        self.operations = {}
+        self._due = []  # (done_at, operation id) heap, so LROs complete even if nobody polls them.
+        self.stats = {"requests": 0, "by_route": {}, "by_status": {}, "throttled": 0,
+                      "in_flight": 0, "peak_in_flight": 0}
+        self._quota = {"read": 0, "write": 0}
+        self._quota_reset = time.time() + config["quota_window"]
+        self._rg_create_failures = config["rg_create_failures"]
+
+        random.seed(config["seed"])
+        sub = config["subscription"]
+        for i in range(1, config["workspaces"] + 1):
+            rg_name = config["rg_format"].format(i=i)
+            ws_name = config["workspace_format"].format(i=i)
+            self._add_resource_group(rg_name)
+            for j in range(config["role_assignments_per_rg"]):
+                name = str(uuid.UUID(int=(i << 16) + j + 1))
+                self.resource_groups[rg_name.lower()]["role_assignments"][name] = {
+                    "roleDefinitionId": f"/subscriptions/{sub}/providers/Microsoft.Authorization/roleDefinitions/"
+                                        f"{str(uuid.UUID(int=j + 1))}",
+                    "principalId": str(uuid.UUID(int=i)), "principalType": "User"}
+            rg_id = f"/subscriptions/{sub}/resourceGroups/{rg_name}"
+            computes = {}
+            for j in range(1, config["computes_per_workspace"] + 1):
+                name = f"ci-{i:02d}-{j}"
+                state = "Running" if random.random() < config["running_ratio"] else "Stopped"
+                computes[name.lower()] = {"name": name, "state": state, "vmSize": "Standard_DS3_v2"}
+            ws = {
+                "name": ws_name,
+                "resource_group": rg_name,
+                "id": f"{rg_id}/providers/Microsoft.MachineLearningServices/workspaces/{ws_name}",
+                "storage_account": f"st{i:04d}ml",
+                "computes": computes,
+            }
+            if i <= config["soft_deleted"]:
+                self.deleted_workspaces[(rg_name.lower(), ws_name.lower())] = ws
+                self._add_deleted_account(f"ai-foundry-{i:02d}", rg_name)
+                self._add_deleted_vault(f"kv{i:02d}RAG{i:04x}", rg_name, purge_protected=(i <= config["purge_protected"]))
+            else:
+                self.workspaces[(rg_name.lower(), ws_name.lower())] = ws
+                extras = list(self.workspace_properties(ws).values())[:config["extra_resources_per_rg"]]
+                for resource_id in extras:
+                    self._add_resource(resource_id)
+            for j in range(1, config["vm_sets_per_rg"] + 1):
+                self._add_vm_set(rg_id, f"{i:02d}-{j}")
+            for j in range(1, config["foundry_accounts_per_rg"] + 1):
+                account_id = self._add_resource(f"{rg_id}/providers/Microsoft.CognitiveServices/accounts/aif-{i:02d}-{j}",
+                                                {"allowProjectManagement": True})
+                for k in range(1, config["projects_per_account"] + 1):
+                    self._add_resource(f"{account_id}/projects/proj-{k}")
+        if config["soft_deleted"]:
+            # Soft-deleted by someone else: outside the class naming patterns.
+            self._add_deleted_account("team-openai", "shared-rg")
+            self._add_deleted_vault("kv-team-secrets", "shared-rg")
+            # Soft-deleted together with their resource group, which no longer exists.
+            for rg_name, ws_name in (("99_RG_OLD", "99mlworkspaceOLD"), ("shared-rg", "team-workspace")):
+                self.deleted_workspaces[(rg_name.lower(), ws_name.lower())] = {
+                    "name": ws_name, "resource_group": rg_name, "storage_account": None, "computes": {},
+                    "id": f"/subscriptions/{sub}/resourceGroups/{rg_name}/providers/"
+                          f"Microsoft.MachineLearningServices/workspaces/{ws_name}"}
+
+    SOFT_DELETE_DATES = {"deletionDate": "2026-10-17T09:00:00Z", "scheduledPurgeDate": "2026-11-16T09:00:00Z"}
+
+    def _add_deleted_account(self, account: str, rg_name: str):
+        sub = self.config["subscription"]
+        self.deleted_accounts[account.lower()] = {
+            "id": f"/subscriptions/{sub}/providers/Microsoft.CognitiveServices/locations/koreacentral/"
+                  f"resourceGroups/{rg_name}/deletedAccounts/{account}",
+            "name": account, "type": "Microsoft.CognitiveServices/locations/resourceGroups/deletedAccounts",
+            "location": "koreacentral", "kind": "AIServices", "properties": dict(self.SOFT_DELETE_DATES)}
+
+    def _add_deleted_vault(self, vault: str, rg_name: str, purge_protected: bool = False):
+        sub = self.config["subscription"]
+        self.deleted_vaults[vault.lower()] = {
+            "id": f"/subscriptions/{sub}/providers/Microsoft.KeyVault/locations/koreacentral/deletedVaults/{vault}",
+            "name": vault, "type": "Microsoft.KeyVault/deletedVaults",
+            "properties": {"vaultId": f"/subscriptions/{sub}/resourceGroups/{rg_name}/providers/"
+                                      f"Microsoft.KeyVault/vaults/{vault}",
+                           "location": "koreacentral", "purgeProtectionEnabled": purge_protected,
+                           **self.SOFT_DELETE_DATES}}
+
+    def _add_resource(self, resource_id: str, properties: dict = None) -> str:
+        """Adds a resource by ID (.../providers/{namespace}/{type}/{name}[/{child type}/{child name}])."""
+        segments = resource_id.split("/providers/", 1)[1].split("/")
+        self.resources.setdefault(resource_id.split("/")[4].lower(), {})[resource_id.lower()] = {
+            "id": resource_id, "name": segments[-1], "type": "/".join([segments[0]] + segments[1::2]),
+            "location": "koreacentral", "properties": properties or {}}
+        return resource_id
+
+    def _add_vm_set(self, rg_id: str, suffix: str):
+        nsg = self._add_resource(f"{rg_id}/providers/Microsoft.Network/networkSecurityGroups/nsg-{suffix}",
+                                 {"securityRules": []})
+        vnet = f"{rg_id}/providers/Microsoft.Network/virtualNetworks/vnet-{suffix}"
+        self._add_resource(vnet, {"addressSpace": {"addressPrefixes": ["10.0.0.0/16"]},
+                                  "subnets": [{"id": f"{vnet}/subnets/default", "name": "default",
+                                               "properties": {"addressPrefix": "10.0.0.0/24",
+                                                              "networkSecurityGroup": {"id": nsg}}}]})
+        pip = self._add_resource(f"{rg_id}/providers/Microsoft.Network/publicIPAddresses/pip-{suffix}",
+                                 {"publicIPAllocationMethod": "Static"})
+        nic = self._add_resource(f"{rg_id}/providers/Microsoft.Network/networkInterfaces/nic-{suffix}", {
+            "networkSecurityGroup": {"id": nsg},
+            "ipConfigurations": [{"name": "ipconfig1", "properties": {"subnet": {"id": f"{vnet}/subnets/default"},
+                                                                      "publicIPAddress": {"id": pip}}}]})
+        disk = self._add_resource(f"{rg_id}/providers/Microsoft.Compute/disks/osdisk-{suffix}", {"diskSizeGB": 30})
+        self._add_resource(f"{rg_id}/providers/Microsoft.Compute/virtualMachines/vm-{suffix}", {
+            "hardwareProfile": {"vmSize": "Standard_B2s"},
+            "networkProfile": {"networkInterfaces": [{"id": nic}]},
+            "storageProfile": {"osDisk": {"name": f"osdisk-{suffix}", "createOption": "FromImage",
+                                          "managedDisk": {"id": disk}}, "dataDisks": []}})
+        self._add_resource(f"{rg_id}/providers/Microsoft.Compute/sshPublicKeys/key-{suffix}",
+                           {"publicKey": "ssh-rsa AAAAB3NzaC1yc2E"})
+
+    def remove_resource(self, rg_key: str, resource_key: str):
+        """Deletes a resource and its child resources; AI accounts and key vaults are soft-deleted, as in Azure."""
+        resources = self.resources.get(rg_key, {})
+        resource = resources.pop(resource_key, None)
+        if resource is None:
+            return
+        for child_key in [key for key in resources if key.startswith(resource_key + "/")]:
+            resources.pop(child_key)
+        rg_name = resource["id"].split("/")[4]
+        if resource["type"].lower() == "microsoft.cognitiveservices/accounts":
+            self._add_deleted_account(resource["name"], rg_name)
+        elif resource["type"].lower() == "microsoft.keyvault/vaults":
+            self._add_deleted_vault(resource["name"], rg_name,
+                                    bool(resource["properties"].get("enablePurgeProtection")))
+
+    def referenced_by(self, rg_key: str, resource_key: str) -> list:
+        """Names of the workspaces, child resources and other resources in the group that still reference a resource."""
+        holders = [(ws["id"].lower(), ws["name"], self.workspace_properties(ws))
+                   for (ws_rg, _), ws in self.workspaces.items() if ws_rg == rg_key]
+        holders += [(key, r["name"], r["properties"]) for key, r in self.resources.get(rg_key, {}).items()]
+        names = []
+        for key, name, properties in holders:
+            text = json.dumps(properties).lower()
+            if key != resource_key and (key.startswith(resource_key + "/") or f'{resource_key}"' in text
+                                        or f"{resource_key}/" in text):
+                names.append(name)
+        return names
+
+    def _add_resource_group(self, name: str, location: str = "koreacentral", tags=None):
+        existing = self.resource_groups.get(name.lower())
+        # An update keeps the group's role assignments; a group created again starts without any.
+        role_assignments = existing["role_assignments"] if existing else {}
+        self.resource_groups[name.lower()] = {"name": name, "location": location, "tags": tags or {},
+                                              "state": "Succeeded", "role_assignments": role_assignments}
+
+    # --- Resource views ---
+
+    def rg_json(self, rg: dict) -> dict:
+        return {
+            "id": f"/subscriptions/{self.config['subscription']}/resourceGroups/{rg['name']}",
+            "name": rg["name"], "type": "Microsoft.Resources/resourceGroups",
+            "location": rg["location"], "tags": rg["tags"],
+            "properties": {"provisioningState": rg["state"]},
+        }
+
+    def role_assignment_json(self, rg: dict, name: str) -> dict:
+        scope = self.rg_json(rg)["id"]
+        return {"id": f"{scope}/providers/Microsoft.Authorization/roleAssignments/{name}", "name": name,
+                "type": "Microsoft.Authorization/roleAssignments",
+                "properties": {"scope": scope, **rg["role_assignments"][name]}}
+
+    def workspace_properties(self, ws: dict) -> dict:
+        rg_id = ws["id"].split("/providers/")[0]
+        return {"storageAccount": f"{rg_id}/providers/Microsoft.Storage/storageAccounts/{ws['storage_account']}",
+                "keyVault": f"{rg_id}/providers/Microsoft.KeyVault/vaults/kv-{ws['name']}",
+                "applicationInsights": f"{rg_id}/providers/Microsoft.Insights/components/appi-{ws['name']}"}
+
+    def workspace_resource(self, ws: dict) -> dict:
+        return {"id": ws["id"], "name": ws["name"], "type": "Microsoft.MachineLearningServices/workspaces",
+                "location": "koreacentral"}
+
+    def rg_resources(self, rg_key: str) -> list:
+        resources = []
+        for (ws_rg, _), ws in self.workspaces.items():
+            if ws_rg != rg_key:
+                continue
+            resources.append(self.workspace_resource(ws))
+        return resources + list(self.resources.get(rg_key, {}).values())
+
+    def compute_json(self, ws: dict, compute: dict) -> dict:
+        return {
+            "id": f"{ws['id']}/computes/{compute['name']}",
+            "name": compute["name"],
+            "type": "Microsoft.MachineLearningServices/workspaces/computes",
+            "location": "koreacentral",
+            "properties": {
+                "computeType": "ComputeInstance",
+                "provisioningState": "Succeeded",
+                "properties": {"state": compute["state"], "vmSize": compute["vmSize"]},
+            },
+        }
+
+    # --- Resource Graph ---
+
+    @staticmethod
+    def _in_list(query: str, column: str):
+        """Lowercase values of a "<column> in~ ('a', 'b')" filter, or None if the query has none."""
+        match = re.search(rf"\b{column} in~ \(([^)]*)\)", query, re.IGNORECASE)
+        return None if match is None else {value.lower() for value in re.findall(r"'([^']*)'", match.group(1))}
+
+    def all_resources(self) -> list:
+        return [{**r, "resourceGroup": rg["name"]} for key, rg in self.resource_groups.items()
+                for r in self.rg_resources(key)]
+
+    def graph_rows(self, query: str) -> list:
+        # Plan drift checks: resource groups / resources restricted to the planned names and IDs.
+        if "resourcecontainers" in query.lower() and self._in_list(query, "name") is not None:
+            names = self._in_list(query, "name")
+            return [{"id": self.rg_json(rg)["id"], "name": rg["name"]} for key, rg in self.resource_groups.items()
+                    if key in names]
+        groups, ids = self._in_list(query, "resourceGroup"), self._in_list(query, "id")
+        if groups is not None:
+            return [r for r in self.all_resources() if r["resourceGroup"].lower() in groups]
+        if ids is not None:
+            return [r for r in self.all_resources() if r["id"].lower() in ids]
+
+        # Generic resource inventory filtered by resource group name: resources | where resourceGroup matches regex @'...'
+        rg_regex = re.search(r"resourceGroup matches regex @'([^']*)'", query, re.IGNORECASE)
+        if rg_regex and "workspaces/computes" not in query.lower():
+            pattern = re.compile(rg_regex.group(1).replace("(?i)", ""), re.IGNORECASE)
+            return [{"id": r["id"], "name": r["name"], "type": r["type"], "resourceGroup": rg["name"]}
+                    for key, rg in self.resource_groups.items() if pattern.search(rg["name"])
+                    for r in self.rg_resources(key)]
+
+        query = query.lower()
+        rows = []
+        for ws in self.workspaces.values():
+            ws_row = {"id": ws["id"], "name": ws["name"], "type": "microsoft.machinelearningservices/workspaces",
+                      "workspace": ws["name"], "resourceGroup": ws["resource_group"],
+                      "storageAccount": ws["storage_account"]}
+            computes = sorted(ws["computes"].values(), key=lambda c: c["name"])
+            if "join" in query and "workspaces/computes" in query:
+                if not computes:
+                    rows.append({**ws_row, "computeName": "", "state": "", "vmSize": ""})
+                for compute in computes:
+                    rows.append({**ws_row, "computeName": compute["name"], "state": compute["state"],
+                                 "vmSize": compute["vmSize"]})
+            elif "workspaces/computes" in query:
+                for compute in computes:
+                    rows.append({"id": f"{ws['id']}/computes/{compute['name']}", "name": compute["name"],
+                                 "workspace": ws["name"], "resourceGroup": ws["resource_group"],
+                                 "computeName": compute["name"], "state": compute["state"],
+                                 "vmSize": compute["vmSize"]})
+            elif "machinelearningservices/workspaces" in query:
+                rows.append(ws_row)
+        if "resourcecontainers" in query:
+            rows = [{**self.rg_json(rg), "resourceGroup": rg["name"]} for rg in self.resource_groups.values()]
+        return rows
+
+    # --- Long-running operations ---
+
+    def start_operation(self, on_done) -> str:
+        operation_id = uuid.uuid4().hex
+        done_at = time.time() + self.lro_duration()
+        self.operations[operation_id] = {"done_at": done_at, "on_done": on_done, "status": "InProgress"}
+        heapq.heappush(self._due, (done_at, operation_id))
+        return operation_id
+
+    def settle_operations(self):
+        """Completes every LRO whose time has come (called before each request is handled)."""
+        now = time.time()
+        while self._due and self._due[0][0] <= now:
+            operation = self.operations[heapq.heappop(self._due)[1]]
+            if operation["status"] == "InProgress":
+                operation["on_done"]()
+                operation["status"] = "Succeeded"
+
+    def operation_status(self, operation_id: str):
+        operation = self.operations.get(operation_id)
+        if operation is None:
+            return None
+        self.settle_operations()
+        return operation["status"]
+
+    # --- Throttling ---
+
+    def check_quota(self, kind: str):
+        """Returns (retry_after or None, remaining) for one read/write against the subscription quota."""
+        limit = self.config[f"{kind}_limit"]
+        if not limit:
+            return None, None
+        now = time.time()
+        if now >= self._quota_reset:
+            self._quota = {"read": 0, "write": 0}
+            self._quota_reset = now + self.config["quota_window"]
+        if self._quota[kind] >= limit:
+            return max(1, int(self._quota_reset - now)), 0
+        self._quota[kind] += 1
+        return None, limit - self._quota[kind]
+
+
+ROUTES = [
+    ("graph", "POST", r"/providers/microsoft\.resourcegraph/resources"),
+    ("operation", "GET", r"/_operations/(?P<op>[0-9a-f]+)"),
+    ("list_resources", "GET", r"/subscriptions/[^/]+/resources"),
+    ("list_rgs", "GET", r"/subscriptions/[^/]+/resourcegroups"),
+    ("rg_resources", "GET", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/resources"),
+    ("rg", "*", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)"),
+    ("list_role_assignments", "GET", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/"
+                                     r"microsoft\.authorization/roleassignments"),
+    ("role_assignment", "PUT", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/"
+                               r"microsoft\.authorization/roleassignments/(?P<name>[^/]+)"),
+    ("deleted_accounts", "GET", r"/subscriptions/[^/]+/providers/microsoft\.cognitiveservices/deletedaccounts"),
+    ("purge_account", "DELETE", r"/subscriptions/[^/]+/providers/microsoft\.cognitiveservices/locations/[^/]+/"
+                                r"resourcegroups/[^/]+/deletedaccounts/(?P<name>[^/]+)"),
+    ("deleted_vaults", "GET", r"/subscriptions/[^/]+/providers/microsoft\.keyvault/deletedvaults"),
+    ("purge_vault", "POST", r"/subscriptions/[^/]+/providers/microsoft\.keyvault/locations/[^/]+/"
+                            r"deletedvaults/(?P<name>[^/]+)/purge"),
+    ("deleted_workspaces", "GET", r"/subscriptions/[^/]+/providers/microsoft\.machinelearningservices/deletedworkspaces"),
+    ("rg_workspaces", "GET", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/"
+                             r"microsoft\.machinelearningservices/workspaces"),
+    ("get_workspace", "GET", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/"
+                             r"microsoft\.machinelearningservices/workspaces/(?P<ws>[^/]+)"),
+    ("delete_workspace", "DELETE", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/"
+                                   r"microsoft\.machinelearningservices/workspaces/(?P<ws>[^/]+)"),
+    ("list_computes", "GET", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/"
+                             r"microsoft\.machinelearningservices/workspaces/(?P<ws>[^/]+)/computes"),
+    ("get_compute", "GET", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/"
+                           r"microsoft\.machinelearningservices/workspaces/(?P<ws>[^/]+)/computes/(?P<compute>[^/]+)"),
+    ("compute_action", "POST", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/"
+                               r"microsoft\.machinelearningservices/workspaces/(?P<ws>[^/]+)/computes/"
+                               r"(?P<compute>[^/]+)/(?P<action>start|stop|restart)"),
+    # Everything else in a resource group: last, so the specific routes above win.
+    ("list_by_type", "GET", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/(?P<type>[^/]+/[^/]+)"),
+    ("resource", "*", r"/subscriptions/[^/]+/resourcegroups/(?P<rg>[^/]+)/providers/[^/]+/[^/]+/[^/]+(?:/[^/]+/[^/]+)?"),
+]
+ROUTES = [(name, method, re.compile(pattern + "$", re.IGNORECASE)) for name, method, pattern in ROUTES]
+
+# Errors ARM returns for deleting a network resource that is still in use (other types get 409 Conflict).
+IN_USE_CODES = {
+    "microsoft.network/networksecuritygroups": "InUseNetworkSecurityGroupCannotBeDeleted",
+    "microsoft.network/virtualnetworks": "InUseSubnetCannotBeDeleted",
+    "microsoft.network/publicipaddresses": "PublicIPAddressCannotBeDeleted",
+    "microsoft.network/networkinterfaces": "NicInUse",
+}
+# Deleted synchronously (the SDK's delete, not begin_delete).
+SYNC_DELETE_TYPES = {"microsoft.storage/storageaccounts", "microsoft.compute/sshpublickeys"}
+
+TRANSITIONS = {"start": ("Starting", "Running"), "stop": ("Stopping", "Stopped"), "restart": ("Restarting", "Running")}
+
+
+class FakeArmHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeARM/1.0"
+
+    def log_message(self, format, *args):
+        pass  # One line per request would dominate the benchmark's own output.
+
+    @property
+    def sub(self) -> FakeSubscription:
+        return self.server.subscription
+
+    def _send(self, status: int, body=None, headers=None):
+        payload = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("x-ms-request-id", uuid.uuid4().hex)
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        if payload and self.command != "HEAD":
+            self.wfile.write(payload)
+        with self.sub.stats_lock:
+            by_status = self.sub.stats["by_status"]
+            by_status[str(status)] = by_status.get(str(status), 0) + 1
+
+    def _error(self, status: int, code: str, message: str, headers=None):
+        self._send(status, {"error": {"code": code, "message": message}}, headers)
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _base_url(self) -> str:
+        return f"http://{self.headers.get('Host')}"
+
+    def _page(self, items: list, query: dict, path: str) -> dict:
+        """ARM-style paging: 'value' plus an absolute 'nextLink' carrying $skiptoken."""
+        start = int(query.get("$skiptoken", ["0"])[0])
+        size = self.sub.config["page_size"]
+        body = {"value": items[start:start + size]}
+        if start + size < len(items):
+            next_query = {key: values[0] for key, values in query.items()}
+            next_query["$skiptoken"] = str(start + size)
+            body["nextLink"] = f"{self._base_url()}{path}?{urlencode(next_query)}"
+        return body
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def do_HEAD(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == "/_stats":
+            with self.sub.stats_lock:
+                return self._send(200, self.sub.stats)
+        if url.path == "/_reset" and self.command == "POST":
+            config = {**DEFAULT_CONFIG, **self._read_body()}
+            self.server.subscription = FakeSubscription(config)
+            return self._send(200, config)
+
+        for name, method, pattern in ROUTES:
+            match = pattern.match(url.path)
+            if match and method in ("*", self.command):
+                break
+        else:
+            self._read_body()
+            return self._error(404, "NotFound", f"No stand-in route for {self.command} {url.path}")
+
+        sub = self.sub
+        with sub.stats_lock:
+            sub.stats["requests"] += 1
+            sub.stats["by_route"][name] = sub.stats["by_route"].get(name, 0) + 1
+            sub.stats["in_flight"] += 1
+            sub.stats["peak_in_flight"] = max(sub.stats["peak_in_flight"], sub.stats["in_flight"])
+        try:
+            time.sleep(sub.latency())
+            self._handle(name, match.groupdict(), query, url.path)
+        finally:
+            with sub.stats_lock:
+                sub.stats["in_flight"] -= 1
+
+    def _handle(self, route: str, params: dict, query: dict, path: str):
+        sub = self.sub
+        body = self._read_body() if self.command in ("POST", "PUT") else {}
+        with sub.lock:
+            sub.settle_operations()
+
+        # Status polls of our own LROs are not subscription calls, so they are never throttled.
+        if route != "operation":
+            if random.random() < sub.config["throttle_rate"]:
+                with sub.stats_lock:
+                    sub.stats["throttled"] += 1
+                return self._error(429, "TooManyRequests", "Throttled by the stand-in.",
+                                   {"Retry-After": sub.config["retry_after"]})
+            kind = "read" if self.command in ("GET", "HEAD") or route == "graph" else "write"
+            with sub.lock:
+                retry_after, remaining = sub.check_quota(kind)
+            if retry_after is not None:
+                with sub.stats_lock:
+                    sub.stats["throttled"] += 1
+            quota_headers = {} if remaining is None else {f"x-ms-ratelimit-remaining-subscription-{kind}s": remaining}
+            if retry_after is not None:
+                return self._error(429, "TooManyRequests", f"Subscription {kind} quota exhausted.",
+                                   {"Retry-After": retry_after, **quota_headers})
+        else:
+            quota_headers = {}
+
+        handler = getattr(self, f"_route_{route}")
+        handler(params, query, body, path, quota_headers)
+
+    # --- Routes ---
+
+    def _route_operation(self, params, query, body, path, headers):
+        with self.sub.lock:
+            status = self.sub.operation_status(params["op"])
+        if status is None:
+            return self._error(404, "NotFound", "Unknown operation.")
+        if status == "InProgress":
+            return self._send(202, {"status": status}, {"Retry-After": self.sub.config["retry_after"]})
+        return self._send(200, {"status": status})
+
+    def _route_graph(self, params, query, body, path, headers):
+        options = body.get("options") or {}
+        top = min(int(options.get("$top") or 1000), 1000)
+        start = int(options.get("$skipToken") or 0)
+        with self.sub.lock:
+            rows = self.sub.graph_rows(body.get("query", ""))
+        page = rows[start:start + top]
+        response = {"totalRecords": len(rows), "count": len(page), "resultTruncated": "false",
+                    "data": page, "facets": []}
+        if start + top < len(rows):
+            response["$skipToken"] = str(start + top)
+        self._send(200, response, headers)
+
+    def _route_list_resources(self, params, query, body, path, headers):
+        resource_filter = (query.get("$filter") or [""])[0].lower()
+        with self.sub.lock:
+            resources = [self.sub.workspace_resource(ws) for ws in self.sub.workspaces.values()]
+            if "machinelearningservices/workspaces" not in resource_filter:
+                resources = [r for key in self.sub.resource_groups for r in self.sub.rg_resources(key)]
+        self._send(200, self._page(resources, query, path), headers)
+
+    def _route_list_rgs(self, params, query, body, path, headers):
+        with self.sub.lock:
+            groups = [self.sub.rg_json(rg) for rg in self.sub.resource_groups.values()]
+        self._send(200, self._page(groups, query, path), headers)
+
+    def _route_rg_resources(self, params, query, body, path, headers):
+        with self.sub.lock:
+            if params["rg"].lower() not in self.sub.resource_groups:
+                return self._error(404, "ResourceGroupNotFound", f"Resource group '{params['rg']}' could not be found.")
+            resources = self.sub.rg_resources(params["rg"].lower())
+        self._send(200, self._page(resources, query, path), headers)
+
+    def _route_rg(self, params, query, body, path, headers):
+        sub = self.sub
+        key = params["rg"].lower()
+        with sub.lock:
+            rg = sub.resource_groups.get(key)
+            if self.command == "PUT":
+                if rg is None and sub._rg_create_failures > 0:
+                    sub._rg_create_failures -= 1
+                    return self._error(403, "RequestDisallowedByPolicy",
+                                       f"Resource group '{params['rg']}' was disallowed by policy.", headers)
+                sub._add_resource_group(params["rg"], body.get("location", "koreacentral"), body.get("tags"))
+                return self._send(201 if rg is None else 200, sub.rg_json(sub.resource_groups[key]), headers)
+            if rg is None:
+                return self._send(404, None, headers) if self.command == "HEAD" else \
+                    self._error(404, "ResourceGroupNotFound", f"Resource group '{params['rg']}' could not be found.")
+            if self.command == "HEAD":
+                return self._send(204, None, headers)
+            if self.command == "GET":
+                return self._send(200, sub.rg_json(rg), headers)
+
+            # DELETE: the group stays listed as 'Deleting' until the LRO completes.
+            rg["state"] = "Deleting"
+
+            def _delete():
+                for resource_key in list(sub.resources.get(key, {})):
+                    sub.remove_resource(key, resource_key)
+                sub.resource_groups.pop(key, None)
+                for ws_key in [ws_key for ws_key in sub.workspaces if ws_key[0] == key]:
+                    sub.deleted_workspaces[ws_key] = sub.workspaces.pop(ws_key)  # Soft-deleted with the group.
+
+            operation_id = sub.start_operation(_delete)
+        location = f"{self._base_url()}/_operations/{operation_id}"
+        self._send(202, None, {"Location": location, "Retry-After": sub.config["retry_after"], **headers})
+
+    def _route_list_role_assignments(self, params, query, body, path, headers):
+        with self.sub.lock:
+            rg = self.sub.resource_groups.get(params["rg"].lower())
+            if rg is None:
+                return self._error(404, "ResourceGroupNotFound", f"Resource group '{params['rg']}' could not be found.")
+            assignments = [self.sub.role_assignment_json(rg, name) for name in rg["role_assignments"]]
+        self._send(200, self._page(assignments, query, path), headers)
+
+    def _route_role_assignment(self, params, query, body, path, headers):
+        with self.sub.lock:
+            rg = self.sub.resource_groups.get(params["rg"].lower())
+            if rg is None:
+                return self._error(404, "ResourceGroupNotFound", f"Resource group '{params['rg']}' could not be found.")
+            properties = body.get("properties", {})
+            for name, existing in rg["role_assignments"].items():
+                if name != params["name"] and (existing["roleDefinitionId"], existing["principalId"]) == \
+                        (properties.get("roleDefinitionId"), properties.get("principalId")):
+                    return self._error(409, "RoleAssignmentExists", "The role assignment already exists.")
+            rg["role_assignments"][params["name"]] = {key: properties.get(key) for key in
+                                                      ("roleDefinitionId", "principalId", "principalType")}
+            assignment = self.sub.role_assignment_json(rg, params["name"])
+        self._send(201, assignment, headers)
+
+    def _purge_operation(self, on_done, headers, status_header: str):
+        operation_id = self.sub.start_operation(on_done)
+        status_url = f"{self._base_url()}/_operations/{operation_id}"
+        self._send(202, None, {status_header: status_url, "Retry-After": self.sub.config["retry_after"], **headers})
+
+    def _route_deleted_accounts(self, params, query, body, path, headers):
+        with self.sub.lock:
+            accounts = list(self.sub.deleted_accounts.values())
+        self._send(200, self._page(accounts, query, path), headers)
+
+    def _route_purge_account(self, params, query, body, path, headers):
+        sub = self.sub
+        with sub.lock:
+            if params["name"].lower() not in sub.deleted_accounts:
+                return self._error(404, "ResourceNotFound", f"Deleted account '{params['name']}' not found.")
+            self._purge_operation(lambda: sub.deleted_accounts.pop(params["name"].lower(), None), headers,
+                                  "Azure-AsyncOperation")
+
+    def _route_deleted_vaults(self, params, query, body, path, headers):
+        with self.sub.lock:
+            vaults = list(self.sub.deleted_vaults.values())
+        self._send(200, self._page(vaults, query, path), headers)
+
+    def _route_purge_vault(self, params, query, body, path, headers):
+        sub = self.sub
+        with sub.lock:
+            vault = sub.deleted_vaults.get(params["name"].lower())
+            if vault is None:
+                return self._error(404, "ResourceNotFound", f"Deleted vault '{params['name']}' not found.")
+            if vault["properties"]["purgeProtectionEnabled"]:
+                return self._error(409, "Conflict", f"Vault '{params['name']}' has purge protection enabled.")
+            self._purge_operation(lambda: sub.deleted_vaults.pop(params["name"].lower(), None), headers, "Location")
+
+    def _route_deleted_workspaces(self, params, query, body, path, headers):
+        sub = self.sub
+        with sub.lock:
+            workspaces = [{
+                "id": f"/subscriptions/{sub.config['subscription']}/providers/Microsoft.MachineLearningServices/"
+                      f"locations/koreacentral/resourceGroups/{ws['resource_group']}/deletedWorkspaces/{ws['name']}",
+                "name": ws["name"], "type": "Microsoft.MachineLearningServices/deletedWorkspaces",
+                "location": "koreacentral",
+                "properties": {"workspaceId": ws["id"], "deletedDate": "2026-10-17T09:00:00Z",
+                               "scheduledPurgeDate": "2026-10-31T09:00:00Z"},
+            } for ws in sub.deleted_workspaces.values()]
+        self._send(200, self._page(workspaces, query, path), headers)
+
+    def _route_delete_workspace(self, params, query, body, path, headers):
+        sub = self.sub
+        key = (params["rg"].lower(), params["ws"].lower())
+        purge = (query.get("forceToPurge") or ["false"])[0].lower() == "true"
+        with sub.lock:
+            if key[0] not in sub.resource_groups:
+                return self._error(404, "ResourceGroupNotFound", f"Resource group '{params['rg']}' could not be found.")
+            if key in sub.workspaces:
+                ws = sub.workspaces.pop(key)
+                if not purge:
+                    sub.deleted_workspaces[key] = ws  # Soft delete: the name stays taken.
+                return self._send(200, None, headers)
+            if key not in sub.deleted_workspaces or not purge:
+                return self._send(204, None, headers)
+            self._purge_operation(lambda: sub.deleted_workspaces.pop(key, None), headers, "Azure-AsyncOperation")
+
+    def _find_workspace(self, params):
+        return self.sub.workspaces.get((params["rg"].lower(), params["ws"].lower()))
+
+    def _route_get_workspace(self, params, query, body, path, headers):
+        with self.sub.lock:
+            ws = self._find_workspace(params)
+            if ws is None:
+                return self._error(404, "ResourceNotFound", f"Workspace '{params['ws']}' not found.")
+            response = {**self.sub.workspace_resource(ws), "properties": self.sub.workspace_properties(ws)}
+        self._send(200, response, headers)
+
+    def _route_rg_workspaces(self, params, query, body, path, headers):
+        sub = self.sub
+        key = params["rg"].lower()
+        with sub.lock:
+            if key not in sub.resource_groups:
+                return self._error(404, "ResourceGroupNotFound", f"Resource group '{params['rg']}' could not be found.")
+            workspaces = [{**sub.workspace_resource(ws), "properties": sub.workspace_properties(ws)}
+                          for (ws_rg, _), ws in sub.workspaces.items() if ws_rg == key]
+        self._send(200, self._page(workspaces, query, path), headers)
+
+    def _route_list_by_type(self, params, query, body, path, headers):
+        sub = self.sub
+        key = params["rg"].lower()
+        with sub.lock:
+            if key not in sub.resource_groups:
+                return self._error(404, "ResourceGroupNotFound", f"Resource group '{params['rg']}' could not be found.")
+            resources = [r for r in sub.resources.get(key, {}).values() if r["type"].lower() == params["type"].lower()]
+        self._send(200, self._page(resources, query, path), headers)
+
+    def _route_resource(self, params, query, body, path, headers):
+        sub = self.sub
+        rg_key, resource_key = params["rg"].lower(), path.lower()
+        with sub.lock:
+            if rg_key not in sub.resource_groups:
+                return self._error(404, "ResourceGroupNotFound", f"Resource group '{params['rg']}' could not be found.")
+            resource = sub.resources.get(rg_key, {}).get(resource_key)
+            if self.command == "GET":
+                if resource is None:
+                    return self._error(404, "ResourceNotFound", f"Resource '{path}' was not found.")
+                return self._send(200, resource, headers)
+            if self.command != "DELETE":
+                return self._error(405, "MethodNotAllowed", f"The stand-in does not support {self.command} {path}.")
+            if resource is None:
+                return self._send(204, None, headers)
+            users = sub.referenced_by(rg_key, resource_key)
+            if users:
+                resource_type = resource["type"].lower()
+                return self._error(400 if resource_type in IN_USE_CODES else 409,
+                                   IN_USE_CODES.get(resource_type, "Conflict"),
+                                   f"Resource '{resource['name']}' is in use by {', '.join(sorted(users))}.", headers)
+            if resource["type"].lower() in SYNC_DELETE_TYPES:
+                sub.remove_resource(rg_key, resource_key)
+                return self._send(200, None, headers)
+            operation_id = sub.start_operation(lambda: sub.remove_resource(rg_key, resource_key))
+        location = f"{self._base_url()}/_operations/{operation_id}"
+        self._send(202, None, {"Location": location, "Retry-After": sub.config["retry_after"], **headers})
+
+    def _route_list_computes(self, params, query, body, path, headers):
+        with self.sub.lock:
+            ws = self._find_workspace(params)
+            if ws is None:
+                return self._error(404, "ResourceNotFound", f"Workspace '{params['ws']}' not found.")
+            computes = [self.sub.compute_json(ws, c) for c in sorted(ws["computes"].values(), key=lambda c: c["name"])]
+        self._send(200, self._page(computes, query, path), headers)
+
+    def _route_get_compute(self, params, query, body, path, headers):
+        with self.sub.lock:
+            ws = self._find_workspace(params)
+            compute = ws and ws["computes"].get(params["compute"].lower())
+            if compute is None:
+                return self._error(404, "ResourceNotFound", f"Compute '{params['compute']}' not found.")
+            response = self.sub.compute_json(ws, compute)
+        self._send(200, response, headers)
+
+    def _route_compute_action(self, params, query, body, path, headers):
+        sub = self.sub
+        action = params["action"].lower()
+        transitional, final = TRANSITIONS[action]
+        with sub.lock:
+            ws = self._find_workspace(params)
+            compute = ws and ws["computes"].get(params["compute"].lower())
+            if compute is None:
+                return self._error(404, "ResourceNotFound", f"Compute '{params['compute']}' not found.")
+            if action != "restart" and compute["state"] in (transitional, final):
+                return self._error(409, "Conflict", f"Compute instance is already {compute['state']}.", headers)
+            compute["state"] = transitional
+
+            def _finish():
+                compute["state"] = final
+
+            operation_id = sub.start_operation(_finish)
+        status_url = f"{self._base_url()}/_operations/{operation_id}"
+        self._send(202, None, {"Azure-AsyncOperation": status_url, "Location": status_url,
+                               "Retry-After": sub.config["retry_after"], **headers})
+
+
+def config_from_args(args) -> dict:
+    config = dict(DEFAULT_CONFIG)
+    for key in DEFAULT_CONFIG:
+        value = getattr(args, key, None)
+        if value is not None:
+            config[key] = value
+    return config
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--workspaces", type=int, help=f"Number of workspaces, one resource group each (default: {DEFAULT_CONFIG['workspaces']})")
+    parser.add_argument("--computes-per-workspace", dest="computes_per_workspace", type=int,
+                        help=f"Compute instances per workspace (default: {DEFAULT_CONFIG['computes_per_workspace']})")
+    parser.add_argument("--running-ratio", dest="running_ratio", type=float, help="Share of instances initially Running")
+    parser.add_argument("--rg-format", dest="rg_format", help=f"Resource group name format (default: {DEFAULT_CONFIG['rg_format']})")
+    parser.add_argument("--latency", help=f"Per-request latency distribution (default: {DEFAULT_CONFIG['latency']})")
+    parser.add_argument("--lro-duration", dest="lro_duration", help=f"LRO duration distribution (default: {DEFAULT_CONFIG['lro_duration']})")
+    parser.add_argument("--throttle-rate", dest="throttle_rate", type=float, help="Probability of a random 429 per request")
+    parser.add_argument("--read-limit", dest="read_limit", type=int, help="Subscription reads per quota window (0 = unlimited)")
+    parser.add_argument("--write-limit", dest="write_limit", type=int, help="Subscription writes per quota window (0 = unlimited)")
+    parser.add_argument("--quota-window", dest="quota_window", type=int, help="Quota window in seconds")
+    parser.add_argument("--vm-sets-per-rg", dest="vm_sets_per_rg", type=int,
+                        help="VMs (with NIC, NSG, public IP, VNet, disk and SSH key) in every resource group")
+    parser.add_argument("--foundry-accounts-per-rg", dest="foundry_accounts_per_rg", type=int,
+                        help="AI Foundry accounts in every resource group")
+    parser.add_argument("--projects-per-account", dest="projects_per_account", type=int,
+                        help=f"Projects per AI Foundry account (default: {DEFAULT_CONFIG['projects_per_account']})")
+    parser.add_argument("--soft-deleted", dest="soft_deleted", type=int,
+                        help="Resource groups holding a soft-deleted AI account, key vault and ML workspace")
+    parser.add_argument("--purge-protected", dest="purge_protected", type=int,
+                        help=f"Soft-deleted key vaults with purge protection (default: {DEFAULT_CONFIG['purge_protected']})")
+    parser.add_argument("--rg-create-failures", dest="rg_create_failures", type=int,
+                        help="Refuse the first N creations of a new resource group (403 RequestDisallowedByPolicy)")
+    parser.add_argument("--seed", type=int, help="Random seed for the initial instance states")
+
+
+def start_server(config: dict, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Starts the stand-in on a background thread and returns the server (server.server_port has the port)."""
+    server = ThreadingHTTPServer((host, port), FakeArmHandler)
+    server.daemon_threads = True
+    server.subscription = FakeSubscription(config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the ARM / Azure ML endpoints used by Azure-IaC-Utils.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (0 = any free port)")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server(config_from_args(args), args.host, args.port)
+    print(f"Fake ARM listening on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,208 @@
+"""
+Runs the Azure-IaC-Utils tools against the local ARM stand-in (fake_arm_server.py) at several scales
+and records, per tool and scale: wall time, requests issued (by route), 429s, peak threads and peak RSS
+of the tool process.
+
+    python bench/run_bench.py --scales 35,300,3000
+    python bench/run_bench.py --scales 300 --tools compute_chk,start_all_fire --latency lognormal:0.1,0.6
+
+Peak threads/RSS are sampled every --sample-interval seconds (psutil if installed, /proc on Linux otherwise).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+
+from fake_arm_server import DEFAULT_CONFIG, add_config_arguments, config_from_args, start_server
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (command line, stdin, stand-in config overrides)
+SCENARIOS = {
+    "compute_chk": (["compute_chk.py", "--inventory", "graph"], None, {}),
+    "compute_chk_rest": (["compute_chk.py", "--inventory", "rest"], None, {}),
+    "start_all": (["compute_start_or_stop_all.py", "start", "--inventory", "graph"], None, {}),
+    "start_all_fire": (["compute_start_or_stop_all.py", "start", "--inventory", "graph", "--fire-and-poll"], None, {}),
+    "stop_exclude": (["compute_start_or_stop_exclude.py", "stop", "--inventory", "graph"], None, {}),
+    "delete_rg": (["delete_rg.py"], "yes\n", {"rg_format": "{i:02d}_RG_LC"}),
+    "delete_rg_wait": (["delete_rg.py", "--wait", "--poll-interval", "1"], "yes\n", {"rg_format": "{i:02d}_RG_LC"}),
+    "delete_all_ml_workspace": (["delete_all_ml_workspace.py"], "yes\n", {"rg_format": "{i:02d}_RG"}),
+    # delete_vm_resources.py always works on 04_rg_p .. 24_rg_p: choice 1 (per-resource teardown) and 3 (fast delete).
+    "delete_vm_resources_parallel": (["delete_vm_resources.py", "--parallel", "8"], "1\ny\n",
+                                     {"rg_format": "{i:02d}_rg_p", "vm_sets_per_rg": 1}),
+    "delete_vm_resources_fast": (["delete_vm_resources.py", "--parallel", "8"], "3\ny\n",
+                                 {"rg_format": "{i:02d}_rg_p", "vm_sets_per_rg": 1}),
+    # Every recreate is refused once after its delete has finished; the follow-up --resume recreates the groups.
+    "delete_vm_resources_resume": (["delete_vm_resources.py", "--parallel", "8"], "2\ny\n",
+                                   {"rg_format": "{i:02d}_rg_p", "rg_create_failures": 21}),
+    "delete_all_ai_foundry": (["delete_all_ai_foundry.py"], None, {"foundry_accounts_per_rg": 1}),
+    "purge_soft_deleted": (["purge_soft_deleted.py", "purge", "--yes"], None, {"soft_deleted": 10, "purge_protected": 0}),
+}
+
+# name -> further (command line, stdin) steps, run against the same stand-in state and journals after the first.
+FOLLOW_UPS = {
+    "delete_vm_resources_resume": [(["delete_vm_resources.py", "--resume", "--parallel", "8"], "y\n")],
+}
+
+
+class ProcessSampler(threading.Thread):
+    """Samples the peak thread count and peak RSS (MiB) of one process until it exits."""
+
+    def __init__(self, pid: int, interval: float):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_rss_mb = 0.0
+        self._stop_event = threading.Event()
+
+    def _sample(self):
+        try:
+            import psutil
+            process = psutil.Process(self.pid)
+            return process.num_threads(), process.memory_info().rss / 2**20
+        except ImportError:
+            pass
+        threads, rss_kb = 0, 0
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+                elif line.startswith("VmHWM:"):  # The kernel's own peak RSS, so short spikes are not missed.
+                    rss_kb = int(line.split()[1])
+        return threads, rss_kb / 1024
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                threads, rss_mb = self._sample()
+            except Exception:
+                break  # Process gone (or no way to sample on this platform).
+            self.peak_threads = max(self.peak_threads, threads)
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def call_stand_in(endpoint: str, path: str, body: dict = None) -> dict:
+    data = None if body is None else json.dumps(body).encode()
+    request = urllib.request.Request(endpoint + path, data=data, method="GET" if body is None else "POST",
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def run_scenario(name: str, scale: int, base_config: dict, endpoint: str, work_dir: str, args) -> dict:
+    command, stdin_text, overrides = SCENARIOS[name]
+    config = {**base_config, **overrides, "workspaces": scale}
+    call_stand_in(endpoint, "/_reset", config)
+
+    env = dict(os.environ,
+               AZURE_IAC_ARM_ENDPOINT=endpoint,
+               AZURE_SUBSCRIPTION_ID=config["subscription"],
+               INVENTORY_CACHE_PATH=os.path.join(work_dir, "inventory.sqlite3"),
+               RUN_JOURNAL_DIR=os.path.join(work_dir, "journals"),
+               IAC_METRICS_JSON=os.path.join(work_dir, f"{name}-{scale}.metrics.json"),
+               PYTHONUNBUFFERED="1")
+    log_path = os.path.join(work_dir, f"{name}-{scale}.log")
+
+    peak_threads, peak_rss_mb = 0, 0.0
+    with open(log_path, "w", encoding="utf-8") as log:
+        start = time.perf_counter()
+        for command, stdin_text in [(command, stdin_text)] + FOLLOW_UPS.get(name, []):
+            log.write(f"$ {' '.join(command)}\n")
+            log.flush()
+            process = subprocess.Popen([sys.executable] + command, cwd=TOOLS_DIR, env=env, stdout=log,
+                                       stderr=subprocess.STDOUT, stdin=subprocess.PIPE, text=True)
+            sampler = ProcessSampler(process.pid, args.sample_interval)
+            sampler.start()
+            try:
+                process.communicate(stdin_text, timeout=args.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            sampler.stop()
+            sampler.join()
+            peak_threads = max(peak_threads, sampler.peak_threads)
+            peak_rss_mb = max(peak_rss_mb, sampler.peak_rss_mb)
+        wall_time = time.perf_counter() - start
+
+    stats = call_stand_in(endpoint, "/_stats")
+    return {
+        "tool": name,
+        "workspaces": scale,
+        "instances": scale * config["computes_per_workspace"],
+        "exit_code": process.returncode,  # Of the last step.
+        "wall_time_s": round(wall_time, 2),
+        "requests": stats["requests"],
+        "requests_by_route": stats["by_route"],
+        "throttled": stats["throttled"],
+        "peak_server_in_flight": stats["peak_in_flight"],
+        "peak_threads": peak_threads,
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "log": log_path,
+        # Per-phase timings and per-call latencies reported by the tool itself (iac_metrics.py).
+        "metrics": env["IAC_METRICS_JSON"],
+    }
+
+
+def print_table(results: list):
+    header = f"{'tool':<30}{'ws':>6}{'wall s':>9}{'requests':>10}{'429s':>6}{'threads':>9}{'RSS MiB':>9}{'exit':>6}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['tool']:<30}{r['workspaces']:>6}{r['wall_time_s']:>9.2f}{r['requests']:>10}{r['throttled']:>6}"
+              f"{r['peak_threads']:>9}{r['peak_rss_mb']:>9.1f}{r['exit_code']!s:>6}")
+
+
+def main(args):
+    scales = [int(scale) for scale in args.scales.split(",")]
+    tools = args.tools.split(",") if args.tools else list(SCENARIOS)
+    unknown = [tool for tool in tools if tool not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown tool(s): {', '.join(unknown)}. Choose from: {', '.join(SCENARIOS)}")
+
+    base_config = config_from_args(args)
+    server = start_server(base_config)
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="iac-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    print(f"Stand-in: {endpoint}  (latency {base_config['latency']}, LRO {base_config['lro_duration']})")
+    print(f"Logs: {work_dir}")
+    print("=" * 80)
+
+    results = []
+    for scale in scales:
+        for tool in tools:
+            print(f"Running {tool} with {scale} workspaces...", flush=True)
+            results.append(run_scenario(tool, scale, base_config, endpoint, work_dir, args))
+
+    print("=" * 80)
+    print_table(results)
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": base_config, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Azure-IaC-Utils tools against a local ARM stand-in.")
+    parser.add_argument("--scales", default="35,300", help="Comma-separated workspace counts (default: 35,300)")
+    parser.add_argument("--tools", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds before a tool run is killed")
+    parser.add_argument("--sample-interval", dest="sample_interval", type=float, default=0.05,
+                        help="Seconds between thread/RSS samples")
+    parser.add_argument("--work-dir", dest="work_dir", help="Directory for logs, cache and journals (default: a temp dir)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    add_config_arguments(parser)
+    parser.set_defaults(workspaces=DEFAULT_CONFIG["workspaces"])
+    main(parser.parse_args())
@@ -0,0 +1,323 @@
+import json
+import time
+import asyncio
+import aiohttp
+from azure.core.exceptions import HttpResponseError
+from azure_credentials import get_async_credential
+from compute_rest import (ARM_ENDPOINT, ARM_SCOPE, ML_API_VERSION, WORKSPACE_TYPE, MAX_RETRIES, REQUEST_TIMEOUT,
+                          ArmRestError)
+from iac_metrics import metrics, operation_name
+
+# --- Configuration ---
+# Upper bound of open HTTPS connections shared by every in-flight operation.
+MAX_CONNECTIONS = 200
+
+# Fire-and-poll mode: seconds between bulk state polls, and how long an operation may stay pending.
+POLL_INTERVAL = 15
+OPERATION_TIMEOUT = 30 * 60
+# Seconds between LRO status checks when the service sends no Retry-After.
+DEFAULT_RETRY_AFTER = 10
+
+TARGET_STATES = {"start": "Running", "stop": "Stopped"}
+# States an instance passes through on its way to the target state.
+TRANSITIONAL_STATES = {"start": {"Starting", "Restarting"}, "stop": {"Stopping"}}
+# An instance not seen in a transitional state this long after submission did not take the operation.
+TRANSITION_GRACE = 120
+# States that mean the operation will not reach its target state on its own.
+FAILED_STATES = {"CreateFailed", "SetupFailed", "UserSetupFailed", "Unusable"}
+
+
+def parse_retry_after(headers) -> float:
+    """Returns the Retry-After header in seconds (0 if absent or not a number of seconds)."""
+    try:
+        return float(headers.get("Retry-After", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class AioComputeEngine:
+    """
+    Starts and stops compute instances through the ARM REST API on one aiohttp session.
+
+    The async counterpart of compute_rest.ArmRestClient: the same endpoints, retries (429/5xx, Retry-After)
+    and per-call metrics, but every start/stop LRO is polled on the event loop instead of blocking a worker
+    thread, so hundreds of operations can be in flight at once. One credential and one connection pool are
+    shared by every operation.
+
+    Usage:
+        async with AioComputeEngine(subscription_id) as engine:
+            await engine.perform_action(resource_group, workspace_name, compute_name, "start")
+    """
+
+    def __init__(self, subscription_id: str, max_connections: int = MAX_CONNECTIONS, response_hook=None):
+        self.subscription_id = subscription_id
+        self.max_connections = max_connections
+        # Called with (status code, headers) of every HTTP response (e.g. AdaptiveConcurrencyLimiter.observe_response).
+        self.response_hook = response_hook
+        self.credential = None
+        self._session = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+        self.credential = get_async_credential()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.credential.close()
+        await self._session.close()
+
+    async def _authorization(self) -> str:
+        if not ARM_ENDPOINT.startswith("https://"):
+            return "Bearer stand-in"  # The local stand-in does not check tokens (see arm_endpoint.py).
+        # The shared credential serves the cached token without blocking; a renewal runs in a worker thread.
+        token = await self.credential.get_token(ARM_SCOPE)
+        return f"Bearer {token.token}"
+
+    async def request(self, method: str, url: str, params: dict = None) -> tuple:
+        """
+        Sends one request (relative paths are resolved against the ARM endpoint), retrying 429 and 5xx.
+        Returns (status code, headers, JSON body or None). Error responses raise ArmRestError.
+        """
+        if url.startswith("/"):
+            url = ARM_ENDPOINT + url
+        operation = operation_name(method, url)
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                metrics.record_retry(operation)
+            start = time.perf_counter()
+            async with self._session.request(method, url, params=params,
+                                             headers={"Authorization": await self._authorization()}) as response:
+                status, headers, text = response.status, response.headers, await response.text()
+            metrics.observe_call(operation, time.perf_counter() - start, status)
+            if self.response_hook is not None:
+                self.response_hook(status, headers)
+            if status != 429 and status < 500:
+                break
+            if attempt < MAX_RETRIES:
+                await asyncio.sleep(parse_retry_after(headers) or 2 ** attempt)
+
+        try:
+            body = json.loads(text) if text else None
+        except ValueError:
+            body = None
+        if status >= 400:
+            try:
+                message = body["error"]["message"]
+            except (KeyError, TypeError):
+                message = text[:200]
+            raise ArmRestError(status, message)
+        return status, headers, body
+
+    def _compute_path(self, resource_group: str, workspace_name: str) -> str:
+        return (f"/subscriptions/{self.subscription_id}/resourceGroups/{resource_group}"
+                f"/providers/{WORKSPACE_TYPE}/{workspace_name}/computes")
+
+    async def _begin(self, resource_group: str, workspace_name: str, compute_name: str, action: str) -> tuple:
+        """Sends start/stop. Returns (URL to poll for completion or None, Retry-After before the first poll)."""
+        path = f"{self._compute_path(resource_group, workspace_name)}/{compute_name}/{action}"
+        _, headers, _ = await self.request("POST", path, {"api-version": ML_API_VERSION})
+        return headers.get("Azure-AsyncOperation") or headers.get("Location"), parse_retry_after(headers)
+
+    async def wait_for_operation(self, status_url: str, timeout: float = OPERATION_TIMEOUT) -> str:
+        """Polls an Azure-AsyncOperation/Location URL until it finishes, honouring Retry-After. Returns the final status."""
+        deadline = time.time() + timeout
+        while True:
+            status_code, headers, body = await self.request("GET", status_url)
+            status = "Succeeded" if status_code in (200, 204) else "InProgress"
+            if body:
+                status = body.get("status", status)
+            if status not in ("InProgress", "Running", "Accepted") or status_code == 204:
+                return status
+            if time.time() > deadline:
+                return "TimedOut"
+            await asyncio.sleep(parse_retry_after(headers) or DEFAULT_RETRY_AFTER)
+
+    async def perform_action(self, resource_group: str, workspace_name: str, compute_name: str, action: str,
+                             polling_url: str = None, on_submitted=None):
+        """
+        Sends start/stop and awaits the LRO until it has finished.
+
+        With 'polling_url' (journaled by an earlier, interrupted run) the in-flight LRO is reattached
+        instead of being sent again. Otherwise on_submitted(polling_url) is called as soon as the service
+        has accepted the operation (polling_url is None if it finished synchronously), so the caller can journal it.
+        """
+        retry_after = 0
+        if polling_url is None:
+            polling_url, retry_after = await self._begin(resource_group, workspace_name, compute_name, action)
+            if on_submitted is not None:
+                on_submitted(polling_url)
+            if polling_url is None:
+                return  # Finished synchronously.
+        await asyncio.sleep(retry_after)
+        status = await self.wait_for_operation(polling_url)
+        if status != "Succeeded":
+            raise HttpResponseError(message=f"{action} operation ended with status '{status}'")
+
+    async def submit_action(self, resource_group: str, workspace_name: str, compute_name: str, action: str,
+                            on_submitted=None) -> float:
+        """
+        Sends only the start/stop request (no LRO polling).
+        Returns the Retry-After (seconds) the service asked for before the first status check.
+        on_submitted(polling_url) is called like in perform_action(); the tracker re-polls states on resume.
+        """
+        polling_url, retry_after = await self._begin(resource_group, workspace_name, compute_name, action)
+        if on_submitted is not None:
+            on_submitted(polling_url)
+        return retry_after
+
+    async def list_compute_states(self, resource_group: str, workspace_name: str) -> tuple:
+        """
+        Lists every compute instance of a workspace (one call per page). Returns ({compute name (lowercase): state},
+        the Retry-After in seconds the service asked for before the next poll).
+        """
+        states = {}
+        retry_after = 0
+        url, params = self._compute_path(resource_group, workspace_name), {"api-version": ML_API_VERSION}
+        while url:
+            _, headers, body = await self.request("GET", url, params)
+            retry_after = max(retry_after, parse_retry_after(headers))
+            for compute in (body or {}).get("value", []):
+                properties = compute.get("properties") or {}
+                if properties.get("computeType") == "ComputeInstance":
+                    states[compute["name"].lower()] = (properties.get("properties") or {}).get("state") or "Unknown"
+            url, params = (body or {}).get("nextLink"), None  # nextLink already carries the query string.
+        return states, retry_after
+
+
+class OperationTracker:
+    """
+    Tracks every submitted start/stop operation from one central poll loop (fire-and-poll mode).
+
+    Instead of one poller per instance, the loop lists compute states once per workspace that still has
+    pending operations, and resolves each operation as soon as its instance reaches the target state, or fails
+    it as soon as the instance has left its transitional state for any other state (e.g. a start that fell back
+    to Stopped). A workspace is not polled before the Retry-After of its submission or last poll has elapsed.
+
+    Usage:
+        tracker = OperationTracker(engine)
+        poll_task = asyncio.create_task(tracker.run())
+        result = await tracker.track(resource_group, workspace_name, compute_name, action, retry_after)
+        ...
+        tracker.close()
+        await poll_task
+    """
+
+    def __init__(self, engine: AioComputeEngine, poll_interval: float = POLL_INTERVAL, timeout: float = OPERATION_TIMEOUT):
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._pending = []
+        self._closed = False
+        self._finished = None  # Set once run() has returned or raised.
+        self._wakeup = asyncio.Event()
+
+    def track(self, resource_group: str, workspace_name: str, compute_name: str, action: str,
+              retry_after: float = 0) -> asyncio.Future:
+        """
+        Registers a submitted operation. The returned future resolves to
+        (compute_name, workspace_name, message, status) like manage_compute_instance_async().
+        """
+        now = time.time()
+        future = asyncio.get_running_loop().create_future()
+        if self._finished is not None:
+            # Nobody polls any more: fail now instead of leaving the caller waiting forever.
+            future.set_result((compute_name, workspace_name, f"Unexpected Error: {self._finished}", "failed"))
+            return future
+        self._pending.append({
+            "resource_group": resource_group,
+            "workspace_name": workspace_name,
+            "compute_name": compute_name,
+            "action": action,
+            "submitted_at": now,
+            "not_before": now + retry_after,
+            "in_transition": False,
+            "future": future,
+        })
+        self._wakeup.set()
+        return future
+
+    def close(self):
+        """No more operations will be tracked; run() returns once the pending ones are settled."""
+        self._closed = True
+        self._wakeup.set()
+
+    async def run(self):
+        error = None
+        try:
+            while self._pending or not self._closed:
+                if not self._pending:
+                    # Nothing to poll yet: wait for the next track() or close().
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                now = time.time()
+                next_poll = max(self.poll_interval, min(op["not_before"] for op in self._pending) - now)
+                await asyncio.sleep(next_poll)
+                await self._poll_once()
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            # Never leave a caller waiting on a future that nobody will resolve, now or in a later track().
+            self._finished = (str(error) or type(error).__name__) if error else "operation tracker stopped"
+            for op in self._pending:
+                if not op["future"].done():
+                    op["future"].set_result((op["compute_name"], op["workspace_name"],
+                                             f"Unexpected Error: {self._finished}", "failed"))
+            self._pending = []
+
+    async def _poll_once(self):
+        now = time.time()
+        workspaces = {}
+        for op in self._pending:
+            if op["not_before"] <= now:
+                workspaces.setdefault((op["resource_group"], op["workspace_name"]), []).append(op)
+
+        keys = list(workspaces)
+        listings = await asyncio.gather(
+            *(self.engine.list_compute_states(rg, ws) for rg, ws in keys), return_exceptions=True
+        )
+
+        settled = set()
+        for key, listing in zip(keys, listings):
+            states = listing
+            if not isinstance(listing, Exception):
+                states, retry_after = listing
+                for op in workspaces[key]:
+                    op["not_before"] = now + retry_after
+            for op in workspaces[key]:
+                result = self._evaluate(op, states, now)
+                if result is not None:
+                    if not op["future"].done():
+                        op["future"].set_result(result)
+                    settled.add(id(op))
+        self._pending = [op for op in self._pending if id(op) not in settled]
+
+    def _evaluate(self, op: dict, states, now: float):
+        """Returns the final result tuple for a settled operation, or None while it is still pending."""
+        compute_name, workspace_name, action = op["compute_name"], op["workspace_name"], op["action"]
+        elapsed = now - op["submitted_at"]
+
+        if not isinstance(states, Exception):
+            state = states.get(compute_name.lower())
+            if state is None:
+                return compute_name, workspace_name, "Error: Instance no longer exists.", "failed"
+            if state == TARGET_STATES[action]:
+                metrics.observe_operation(f"compute {action}", elapsed)
+                return compute_name, workspace_name, f"Successfully {action}ped in {elapsed:.2f}s", "success"
+            if state in FAILED_STATES:
+                return compute_name, workspace_name, f"Error: Instance ended in state '{state}'.", "failed"
+            if state in TRANSITIONAL_STATES[action]:
+                op["in_transition"] = True
+            elif op["in_transition"] or elapsed > TRANSITION_GRACE:
+                return (compute_name, workspace_name,
+                        f"Error: Instance ended in state '{state}' instead of '{TARGET_STATES[action]}'.", "failed")
+
+        if elapsed > self.timeout:
+            detail = f"last poll error: {states}" if isinstance(states, Exception) else f"state: {states.get(compute_name.lower())}"
+            return compute_name, workspace_name, f"Error: Timed out after {elapsed:.0f}s ({detail}).", "failed"
+        return None
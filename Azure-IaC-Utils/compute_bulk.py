@@ -0,0 +1,262 @@
+import time
+import asyncio
+from azure.core.exceptions import HttpResponseError
+from arm_throttling import AdaptiveConcurrencyLimiter
+from compute_aio_engine import AioComputeEngine, OperationTracker
+from compute_inventory import WorkspaceRecord
+from run_journal import RunJournal, PENDING, SUBMITTED, compute_target, journaled, submission_recorder
+from iac_metrics import metrics
+
+# --- Configuration ---
+MAX_CONCURRENT_OPERATIONS = 200 # Initial concurrency; adjusted at runtime from ARM throttling signals
+
+# --- Global Concurrency Limiter (AIMD, driven by 429s and x-ms-ratelimit-remaining-* headers) ---
+# Shared by compute_start_or_stop_all.py, compute_start_or_stop_exclude.py and compute_scheduler.py.
+concurrency_limiter = AdaptiveConcurrencyLimiter(MAX_CONCURRENT_OPERATIONS)
+
+def should_exclude_compute(compute_name: str, exclude_patterns: list) -> bool:
+    """Check if compute should be excluded based on patterns"""
+    for pattern in exclude_patterns:
+        if pattern.lower() in compute_name.lower():
+            return True
+    return False
+
+async def get_computes_to_action(inventory, workspace: WorkspaceRecord, action: str, exclude_patterns: list = ()) -> tuple:
+    """
+    Asynchronously scans a single workspace by running the sync inventory call in a separate thread.
+    Returns ([(workspace, resource group, compute)] to act on, [excluded compute names]).
+    """
+    workspace_name = workspace.name
+    resource_group = workspace.resource_group
+    
+    queued_at = time.perf_counter()
+
+    # This is a synchronous function that will be run in a background thread.
+    def _scan_workspace_sync():
+        metrics.observe_queue_wait("scan_threads", time.perf_counter() - queued_at)
+        computes_for_action = []
+        excluded_computes = []
+        try:
+            # The inventory backend only returns compute instances.
+            with metrics.timed("scan_workspace"):
+                computes = inventory.scan_workspace(workspace)
+            for compute in computes:
+                current_state_simplified = compute.state.split('/')[-1]
+                
+                # Check if compute should be excluded
+                if should_exclude_compute(compute.name, exclude_patterns):
+                    excluded_computes.append(compute.name)
+                    print(f"  [Scan] EXCLUDED: {compute.name:<30} in {workspace_name} (matches exclusion pattern)")
+                    continue
+
+                if action == "stop" and current_state_simplified not in ["Stopped", "Stopping"]:
+                    # We pass back the info needed to create the client again later
+                    computes_for_action.append((workspace_name, resource_group, compute.name))
+                elif action == "start" and current_state_simplified not in ["Running", "Starting"]:
+                    computes_for_action.append((workspace_name, resource_group, compute.name))
+            return computes_for_action, excluded_computes
+        except Exception as e:
+            print(f"  [Scan] ERROR checking workspace '{workspace_name}': {e}", flush=True)
+            return [], [] # Return empty lists on error
+
+    # Run the blocking function in a separate thread to not block the event loop.
+    found_computes, excluded = await asyncio.to_thread(_scan_workspace_sync)
+    for ws_name, rg_name, compute_name in found_computes:
+        print(f"  [Scan] Found to {action.upper()}: {compute_name:<30} in {ws_name}")
+    
+    return found_computes, excluded
+
+
+async def manage_compute_instance_async(engine: AioComputeEngine, workspace_name: str, resource_group: str, compute_name: str, action: str,
+                                        journal: RunJournal = None, polling_url: str = None) -> tuple:
+    """Helper function to stop or start a compute instance asynchronously (or to reattach to its in-flight LRO)."""
+    async with concurrency_limiter:
+        start_time = time.time()
+        action_str = "Stopping" if action == "stop" else "Starting"
+        if polling_url:
+            action_str = f"Reattaching {action_str}"
+        print(f"  [{action_str}] -> {compute_name:<30} in {workspace_name}...", flush=True)
+        
+        try:
+            # The LRO is awaited on the event loop, so no thread is pinned while the instance starts/stops.
+            await engine.perform_action(resource_group, workspace_name, compute_name, action, polling_url,
+                                        submission_recorder(journal, compute_target(resource_group, workspace_name, compute_name)))
+
+        except HttpResponseError as error:
+            if error.status_code == 409:
+                state = "stopping" if action == "stop" else "starting"
+                result_message = f"Skipped: Instance was already {state} or in the target state."
+                return compute_name, workspace_name, result_message, "skipped"
+            result_message = f"Error: {error}"
+            return compute_name, workspace_name, result_message, "failed"
+
+        except Exception as e:
+            result_message = f"Unexpected Error: {e}"
+            return compute_name, workspace_name, result_message, "failed"
+
+        duration = time.time() - start_time
+        metrics.observe_operation(f"compute {action}", duration)
+        result_message = f"Successfully {action}ped in {duration:.2f}s"
+        return compute_name, workspace_name, result_message, "success"
+
+async def submit_compute_instance_async(engine: AioComputeEngine, tracker: OperationTracker, workspace_name: str, resource_group: str, compute_name: str, action: str,
+                                        journal: RunJournal = None) -> tuple:
+    """Fire-and-poll variant: sends the start/stop request only and lets the central tracker watch for completion."""
+    async with concurrency_limiter:
+        action_str = "Stopping" if action == "stop" else "Starting"
+        print(f"  [{action_str}] -> {compute_name:<30} in {workspace_name}...", flush=True)
+
+        try:
+            retry_after = await engine.submit_action(resource_group, workspace_name, compute_name, action,
+                                                     submission_recorder(journal, compute_target(resource_group, workspace_name, compute_name)))
+
+        except HttpResponseError as error:
+            if error.status_code == 409:
+                state = "stopping" if action == "stop" else "starting"
+                result_message = f"Skipped: Instance was already {state} or in the target state."
+                return compute_name, workspace_name, result_message, "skipped"
+            result_message = f"Error: {error}"
+            return compute_name, workspace_name, result_message, "failed"
+
+        except Exception as e:
+            result_message = f"Unexpected Error: {e}"
+            return compute_name, workspace_name, result_message, "failed"
+
+    # Waiting for completion happens outside the limiter: it holds no thread and no request slot.
+    return await tracker.track(resource_group, workspace_name, compute_name, action, retry_after)
+
+def dispatch_unfinished(engine: AioComputeEngine, tracker: OperationTracker, journal: RunJournal, action: str) -> list:
+    """
+    Resume: creates one task per target whose last journal state is not done/skipped.
+    Submitted operations are reattached (their status URL, or the tracker in fire-and-poll mode),
+    the rest (pending, failed) are sent again.
+    """
+    tasks = []
+    for entry in journal.unfinished():
+        target = entry["target"]
+        workspace_name, resource_group, compute_name = entry["workspace"], entry["resource_group"], entry["compute"]
+        in_flight = entry["state"] == SUBMITTED
+        if tracker is not None and in_flight:
+            print(f"  [Reattaching] -> {compute_name:<30} in {workspace_name}...", flush=True)
+            operation = tracker.track(resource_group, workspace_name, compute_name, action)
+        elif tracker is not None:
+            operation = submit_compute_instance_async(engine, tracker, workspace_name, resource_group, compute_name, action, journal)
+        else:
+            polling_url = entry.get("polling_url") if in_flight else None
+            operation = manage_compute_instance_async(engine, workspace_name, resource_group, compute_name, action, journal, polling_url)
+        tasks.append(asyncio.create_task(journaled(journal, target, operation)))
+    return tasks
+
+async def run_bulk_action(action: str, inventory, engine: AioComputeEngine, exclude_patterns: list = (), fire_and_poll: bool = False,
+                          journal: RunJournal = None, resume: bool = False) -> dict:
+    """
+    Scans every workspace, starts/stops the matching instances and prints the sorted report.
+    Shared by compute_start_or_stop_all.py (no exclusions), compute_start_or_stop_exclude.py and
+    compute_scheduler.py; the inventory and engine are passed in so a long-running caller can reuse them.
+    Every operation is recorded in 'journal' when given; with 'resume' the scan is skipped and only the
+    journal's unfinished operations are replayed. Returns the summary counts of the run.
+    """
+    summary = {"succeeded": 0, "skipped": 0, "failed": 0, "excluded": 0}
+
+    if resume:
+        print(f"[RESUME] Replaying the unfinished {action} operations of {journal.path}...")
+        tracker = None
+        if fire_and_poll:
+            tracker = OperationTracker(engine)
+            poll_task = asyncio.create_task(tracker.run())
+        with metrics.phase("action"):
+            action_tasks = dispatch_unfinished(engine, tracker, journal, action)
+            results = await asyncio.gather(*action_tasks)
+            if tracker is not None:
+                tracker.close()
+                await poll_task
+        print("=" * 80)
+        # Exclusions are decided by the scan, which a resume skips: no Excluded count to report.
+        with metrics.phase("report"):
+            return print_final_report(action, results, summary)
+
+    # --- PHASE 1: Concurrent Scanning ---
+    print(f"[PHASE 1] Concurrently scanning all workspaces and dispatching {action} operations as instances are found (inventory: {inventory.name})...")
+    with metrics.phase("list_workspaces"):
+        workspaces = await asyncio.to_thread(inventory.list_workspaces)
+    
+    if not workspaces:
+        print("No Azure ML workspaces found.")
+        return summary
+
+    # --- PHASE 1-3: Streaming Scan -> Action Pipeline ---
+    # Each workspace's instances are dispatched as soon as that workspace has been scanned,
+    # so one slow or unreachable workspace no longer delays the others. The concurrency limiter
+    # bounds how many operations are actually in flight.
+    all_computes_to_action = []
+    all_excluded_computes = []
+    action_tasks = []
+
+    tracker = None
+    if fire_and_poll:
+        # Submit every operation as soon as it is found and track them all from a single poll loop.
+        tracker = OperationTracker(engine)
+        poll_task = asyncio.create_task(tracker.run())
+
+    async def scan_and_dispatch(workspace: WorkspaceRecord):
+        found_computes, excluded = await get_computes_to_action(inventory, workspace, action, exclude_patterns)
+        all_excluded_computes.extend(excluded)
+        for workspace_name, resource_group, compute_name in found_computes:
+            all_computes_to_action.append((workspace_name, resource_group, compute_name))
+            target = compute_target(resource_group, workspace_name, compute_name)
+            if journal is not None:
+                journal.record(target, PENDING, workspace=workspace_name, resource_group=resource_group, compute=compute_name)
+            if tracker is not None:
+                operation = submit_compute_instance_async(engine, tracker, workspace_name, resource_group, compute_name, action, journal)
+            else:
+                operation = manage_compute_instance_async(engine, workspace_name, resource_group, compute_name, action, journal)
+            action_tasks.append(asyncio.create_task(journaled(journal, target, operation)))
+
+    with metrics.phase("scan"):
+        await asyncio.gather(*(scan_and_dispatch(workspace) for workspace in workspaces))
+    excluded = f", {len(all_excluded_computes)} excluded" if exclude_patterns else ""
+    print(f"[PHASE 1] Scan complete. Found {len(all_computes_to_action)} instances to {action}{excluded}.")
+
+    # Actions already run during the scan; this phase is the time left after the last workspace was scanned.
+    with metrics.phase("action"):
+        results = await asyncio.gather(*action_tasks)
+        if tracker is not None:
+            tracker.close()
+            await poll_task
+
+    print("=" * 80)
+    summary["excluded"] = len(all_excluded_computes)
+    with metrics.phase("report"):
+        return print_final_report(action, results, summary, exclude_patterns)
+
+def print_final_report(action: str, results: list, summary: dict, exclude_patterns: list = ()) -> dict:
+    """Prints the sorted per-instance report and fills in the summary counts."""
+    if results:
+        print(f"[PHASE 2 & 3] All {len(results)} {action} operations have completed.")
+        print("=" * 80)
+        
+        # --- PHASE 4: Final Sorted Report ---
+        print("[PHASE 4] Final Sorted Summary Report")
+        print("-" * 80)
+        
+        sorted_results = sorted(results, key=lambda item: (item[1].lower(), item[0].lower()))
+        
+        for compute_name, workspace_name, message, status in sorted_results:
+            print(f"  - W: {workspace_name:<20} C: {compute_name:<30} Status: {message}")
+            if status == "success":
+                summary["succeeded"] += 1
+            elif status == "skipped":
+                summary["skipped"] += 1
+            else:
+                summary["failed"] += 1
+        
+        print("-" * 80)
+        excluded = f", {summary['excluded']} Excluded" if exclude_patterns else ""
+        print(f"Summary: {summary['succeeded']} Succeeded, {summary['skipped']} Skipped, {summary['failed']} Failed{excluded}.")
+        print(concurrency_limiter.summary())
+        print(metrics.summary())
+        
+    else:
+        print(f"No compute instances found that required the '{action}' action.")
+
+    return summary
@@ -1,10 +1,14 @@
 import sys
 import os
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
-from azure.ai.ml import MLClient
-from azure.mgmt.resource import ResourceManagementClient
+from azure_credentials import get_credential
 from azure.core.exceptions import ClientAuthenticationError, HttpResponseError
+from azure_clients import get_client_factory
+from compute_inventory import add_inventory_arguments, create_inventory, inventory_options_from_args
+from iac_metrics import metrics, add_metrics_arguments
 
 # 환경변수 로드
 load_dotenv()
@@ -12,76 +16,184 @@ load_dotenv()
 # Enter your Azure subscription ID here.
 SUBSCRIPTION_ID = os.getenv("AZURE_SUBSCRIPTION_ID")
 
-print(f"Checking the status of compute instances in all ML workspaces under Azure subscription '{SUBSCRIPTION_ID}'.")
-print("=" * 80)
-
-try:
-    # Obtain Azure credentials (requires 'az login').
-    credential = DefaultAzureCredential()
-
-    # Create a client to manage all resources in the subscription.
-    resource_client = ResourceManagementClient(credential, SUBSCRIPTION_ID)
-
-    # Find all Azure Machine Learning workspaces in the subscription.
-    # 'list' returns an iterator, so convert it to a list.
-    print("Searching for ML workspaces in the subscription...")
-    workspaces = list(resource_client.resources.list(filter="resourceType eq 'Microsoft.MachineLearningServices/workspaces'"))
-
-    if not workspaces:
-        print("No Azure ML workspaces found in this subscription.")
-        sys.exit()
-
-    # Sort workspaces by name in ascending order.
-    workspaces.sort(key=lambda x: x.name.lower())
-
-    print(f"Found {len(workspaces)} ML workspaces. Checking compute instances for each workspace.")
+# Number of workspaces scanned in parallel (1 = one workspace at a time).
+MAX_CONCURRENT_SCANS = 16
+
+# Shortest allowed --watch interval in seconds (keeps the poll rate well below ARM read limits).
+MIN_WATCH_INTERVAL = 10
+
+
+def scan_workspace(inventory, workspace) -> tuple:
+    """
+    Lists the compute instances of a single workspace.
+    Returns (workspace_name, resource_group_name, lines, computes) where 'lines' is the report for this
+    workspace and 'computes' is the list of compute records (None if the workspace could not be scanned).
+    """
+    workspace_name = workspace.name
+    resource_group_name = workspace.resource_group
+    lines = []
+    computes = None
+
+    try:
+        with metrics.timed("scan_workspace"):
+            computes = inventory.scan_workspace(workspace)
+
+        for compute in computes:
+            # Display only if state is 'Running' or 'Stopped' (remove condition to include other states).
+            if compute.state in ["Running", "Stopped"]:
+                lines.append(f"  -> Compute Instance: {compute.name:<30} Status: {compute.state}")
+            else:  # Display other states like Creating, Deleting, Failed, etc.
+                lines.append(f"  -> Compute Instance: {compute.name:<30} Status: {compute.state} (Warning)")
+
+        if not computes:
+            lines.append(f"  -> No compute instances found in this workspace.")
+
+    except ClientAuthenticationError:
+        # Authentication problems affect every workspace, so let the caller stop the run.
+        raise
+    except HttpResponseError as e:
+        # Handle cases where access to the workspace is denied or other API errors occur.
+        lines.append(f"  -> Error: Unable to access workspace '{workspace_name}'. (Error: {e.message})")
+    except Exception as e:
+        # Handle other unexpected exceptions.
+        lines.append(f"  -> Unexpected error occurred: {e}")
+
+    return workspace_name, resource_group_name, lines, computes
+
+
+def poll_workspace_states(inventory, workspace):
+    """Re-reads only the compute states of a workspace. Returns None if the workspace could not be polled."""
+    try:
+        return inventory.scan_compute_states(workspace)
+    except ClientAuthenticationError:
+        raise
+    except Exception as e:
+        print(f"  [{time.strftime('%H:%M:%S')}] Poll failed for workspace '{workspace.name}': {e}", flush=True)
+        return None
+
+
+def index_states(workspace, computes) -> dict:
+    """Maps each compute of a workspace to its state, keyed case-insensitively."""
+    return {(workspace.resource_group.lower(), workspace.name.lower(), c.name.lower()): (c.name, c.state, workspace.name) for c in computes}
+
+
+def watch(inventory, workspaces, reports, interval: int, executor):
+    """
+    Keeps polling the compute states every 'interval' seconds and prints only the transitions.
+    Credentials, clients and the workspace list are reused across polls; a workspace whose poll fails
+    keeps its previous states so that a transient error is not reported as deleted instances.
+    """
+    previous = {}
+    for workspace, report in zip(workspaces, reports):
+        if report[3] is not None:
+            previous.update(index_states(workspace, report[3]))
+
+    print(f"Watching {len(workspaces)} workspaces every {interval}s. Only state transitions are printed (Ctrl+C to stop).")
     print("-" * 80)
 
-    # Iterate through all sorted workspaces.
-    for workspace in workspaces:
-        # Extract resource group name from the workspace ID.
-        # ID format: /subscriptions/{sub-id}/resourceGroups/{rg-name}/providers/Microsoft.MachineLearningServices/workspaces/{ws-name}
-        resource_group_name = workspace.id.split('/')[4]
-        workspace_name = workspace.name
-
-        print(f"Workspace: '{workspace_name}' (Resource Group: '{resource_group_name}')")
-
-        try:
-            # Create an MLClient for the specific workspace.
-            ml_client = MLClient(
-                credential=credential,
-                subscription_id=SUBSCRIPTION_ID,
-                resource_group_name=resource_group_name,
-                workspace_name=workspace_name,
-            )
-
-            found_instances = False
-            # List all compute resources in the current workspace.
-            for compute in ml_client.compute.list():
-                # Check only for ComputeInstance type.
-                if compute.type == "computeinstance":  # API returns lowercase 'computeinstance'.
-                    found_instances = True
-                    # Display only if state is 'Running' or 'Stopped' (remove condition to include other states).
-                    if compute.state in ["Running", "Stopped"]:
-                        print(f"  -> Compute Instance: {compute.name:<30} Status: {compute.state}")
-                    else:  # Display other states like Creating, Deleting, Failed, etc.
-                        print(f"  -> Compute Instance: {compute.name:<30} Status: {compute.state} (Warning)")
-
-            if not found_instances:
-                print(f"  -> No compute instances found in this workspace.")
-
-        except HttpResponseError as e:
-            # Handle cases where access to the workspace is denied or other API errors occur.
-            print(f"  -> Error: Unable to access workspace '{workspace_name}'. (Error: {e.message})")
-        except Exception as e:
-            # Handle other unexpected exceptions.
-            print(f"  -> Unexpected error occurred: {e}")
-
+    while True:
+        time.sleep(interval)
+        inventory.clear_states()
+        polled = list(executor.map(lambda ws: poll_workspace_states(inventory, ws), workspaces))
+
+        current = {}
+        for workspace, computes in zip(workspaces, polled):
+            if computes is None:
+                key_prefix = (workspace.resource_group.lower(), workspace.name.lower())
+                current.update({key: value for key, value in previous.items() if key[:2] == key_prefix})
+            else:
+                current.update(index_states(workspace, computes))
+
+        timestamp = time.strftime('%H:%M:%S')
+        for key in sorted(current.keys() | previous.keys()):
+            if key not in previous:
+                name, state, workspace_name = current[key]
+                print(f"  [{timestamp}] {name:<30} (new) → {state}  (workspace: {workspace_name})", flush=True)
+            elif key not in current:
+                name, state, workspace_name = previous[key]
+                print(f"  [{timestamp}] {name:<30} {state} → (deleted)  (workspace: {workspace_name})", flush=True)
+            elif current[key][1] != previous[key][1]:
+                name, state, workspace_name = current[key]
+                print(f"  [{timestamp}] {name:<30} {previous[key][1]} → {state}  (workspace: {workspace_name})", flush=True)
+
+        previous = current
+
+
+def main(max_workers: int, inventory_options: dict = None, watch_interval: int = None):
+    print(f"Checking the status of compute instances in all ML workspaces under Azure subscription '{SUBSCRIPTION_ID}'.")
+    print("=" * 80)
+
+    try:
+        # Obtain Azure credentials (requires 'az login').
+        # A single credential is shared by all scan threads.
+        credential = get_credential()
+        # One pooled connection per scan thread, shared by every workspace's client.
+        get_client_factory(max_workers)
+
+        # The inventory backend finds the workspaces and their compute instances
+        # ("mlclient": one call per workspace, "graph": a single Resource Graph query).
+        inventory = create_inventory(credential, SUBSCRIPTION_ID, **(inventory_options or {}))
+
+        # Find all Azure Machine Learning workspaces in the subscription.
+        print(f"Searching for ML workspaces in the subscription (inventory: {inventory.name})...")
+        with metrics.phase("list_workspaces"):
+            workspaces = inventory.list_workspaces()
+
+        if not workspaces:
+            print("No Azure ML workspaces found in this subscription.")
+            sys.exit()
+
+        # Sort workspaces by name in ascending order.
+        workspaces.sort(key=lambda x: x.name.lower())
+
+        print(f"Found {len(workspaces)} ML workspaces. Checking compute instances for each workspace "
+              f"({min(max_workers, len(workspaces))} in parallel).")
         print("-" * 80)
 
-except ClientAuthenticationError:
-    print("Authentication error: Ensure you are logged in via 'az login' and have access to the subscription.")
-except Exception as e:
-    print(f"A global error occurred during script execution: {e}")
-
-print("All checks completed.")
\ No newline at end of file
+        queued_at = time.perf_counter()
+
+        def _scan(workspace):
+            # Time spent waiting for a free scan thread.
+            metrics.observe_queue_wait("scan_threads", time.perf_counter() - queued_at)
+            return scan_workspace(inventory, workspace)
+
+        # Scan all workspaces concurrently; 'map' keeps the sorted workspace order for the report.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            with metrics.phase("scan"):
+                reports = list(executor.map(_scan, workspaces))
+
+            with metrics.phase("report"):
+                for workspace_name, resource_group_name, lines, _ in reports:
+                    print(f"Workspace: '{workspace_name}' (Resource Group: '{resource_group_name}')")
+                    for line in lines:
+                        print(line)
+                    print("-" * 80)
+            print(metrics.summary())
+
+            if watch_interval:
+                watch(inventory, workspaces, reports, watch_interval, executor)
+
+    except KeyboardInterrupt:
+        print("\nWatch stopped.")
+    except ClientAuthenticationError:
+        print("Authentication error: Ensure you are logged in via 'az login' and have access to the subscription.")
+    except Exception as e:
+        print(f"A global error occurred during script execution: {e}")
+
+    print("All checks completed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the status of Azure ML compute instances in all workspaces.")
+    parser.add_argument("--max-workers", type=int, default=MAX_CONCURRENT_SCANS,
+                        help=f"Number of workspaces scanned in parallel (default: {MAX_CONCURRENT_SCANS}, 1 = sequential)")
+    parser.add_argument("--watch", type=int, metavar="INTERVAL",
+                        help=f"Keep running and print only state transitions, polling every INTERVAL seconds (min: {MIN_WATCH_INTERVAL})")
+    add_inventory_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    watch_interval = max(MIN_WATCH_INTERVAL, args.watch) if args.watch else None
+    try:
+        main(max(1, args.max_workers), inventory_options_from_args(args), watch_interval)
+    finally:
+        metrics.export(args.metrics_json, args.metrics_prom)
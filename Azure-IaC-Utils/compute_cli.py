@@ -0,0 +1,128 @@
+"""
+Fast-startup CLI for everyday compute instance operations:
+
+    python compute_cli.py status [--workspace WS ...]
+    python compute_cli.py start  [--workspace WS ...] [--compute NAME ...] [--wait]
+    python compute_cli.py stop   [--workspace WS ...] [--compute NAME ...] [--wait]
+
+It talks to the ARM REST API directly (compute_rest.py) and never imports azure.ai.ml, so the local
+overhead of a status check is a fraction of a second. Use compute_start_or_stop_*.py for exclusion
+patterns, journals and throttling-aware bulk runs.
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from azure.core.exceptions import HttpResponseError
+from compute_rest import ArmRestClient
+from compute_inventory import RestInventory, WorkspaceRecord
+from iac_metrics import metrics, add_metrics_arguments
+
+# 환경변수 로드
+load_dotenv()
+
+SUBSCRIPTION_ID = os.getenv("AZURE_SUBSCRIPTION_ID")
+
+# Concurrent REST calls (workspace scans, then start/stop requests).
+MAX_CONCURRENT_CALLS = 16
+
+# Target state per action; instances already in it are skipped.
+TARGET_STATES = {"start": "Running", "stop": "Stopped"}
+
+
+def scan_workspace(inventory: RestInventory, workspace: WorkspaceRecord) -> tuple:
+    """Returns (workspace, [ComputeRecord], error message or None)."""
+    try:
+        return workspace, inventory.scan_workspace(workspace), None
+    except (HttpResponseError, OSError) as e:
+        return workspace, [], str(e)
+
+
+def run_action(client: ArmRestClient, action: str, resource_group: str, workspace_name: str,
+               compute_name: str, wait: bool) -> tuple:
+    """Returns (compute name, 'success' | 'failed', message)."""
+    start = time.perf_counter()
+    try:
+        status_url = client.begin_compute_action(resource_group, workspace_name, compute_name, action)
+        if not wait or not status_url:
+            return compute_name, "success", "accepted"
+        status = client.wait_for_operation(status_url)
+        metrics.observe_operation(f"compute {action}", time.perf_counter() - start)
+        return compute_name, "success" if status == "Succeeded" else "failed", status
+    except (HttpResponseError, OSError) as e:
+        return compute_name, "failed", str(e)
+
+
+def main(args) -> int:
+    inventory = RestInventory(None, SUBSCRIPTION_ID)  # None: the shared credential is used once a token is needed.
+    client = inventory.client
+    workspace_filter = {name.lower() for name in args.workspace or []}
+    compute_filter = {name.lower() for name in args.compute or []}
+
+    with metrics.phase("list_workspaces"):
+        workspaces = [ws for ws in inventory.list_workspaces()
+                      if not workspace_filter or ws.name.lower() in workspace_filter]
+    if not workspaces:
+        print("No matching Azure ML workspaces found.")
+        return 1 if workspace_filter else 0
+
+    with metrics.phase("scan"), ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS) as executor:
+        scans = list(executor.map(lambda workspace: scan_workspace(inventory, workspace), workspaces))
+
+    exit_code = 0
+    targets = []
+    for workspace, computes, error in sorted(scans):
+        print(f"Workspace: {workspace.name} (RG: {workspace.resource_group})")
+        if error:
+            print(f"  -> Error: {error}")
+            exit_code = 1
+            continue
+        if not computes:
+            print("  -> No compute instances found in this workspace.")
+        for compute in computes:
+            print(f"  -> Compute Instance: {compute.name:<30} Status: {compute.state}")
+            if (args.action != "status" and compute.state != TARGET_STATES[args.action]
+                    and (not compute_filter or compute.name.lower() in compute_filter)):
+                targets.append((compute.resource_group, compute.workspace, compute.name))
+
+    if args.action != "status":
+        print("=" * 60)
+        if not targets:
+            print(f"No compute instances to {args.action}.")
+        else:
+            print(f"Sending {args.action} to {len(targets)} compute instance(s)...")
+            with metrics.phase("action"), ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS) as executor:
+                results = list(executor.map(lambda target: run_action(client, args.action, *target, args.wait), targets))
+            for compute_name, status, message in results:
+                print(f"  -> {compute_name:<30} {status} ({message})")
+            failed = sum(1 for _, status, _ in results if status == "failed")
+            print(f"Done: {len(results) - failed} succeeded, {failed} failed.")
+            if failed:
+                exit_code = 1
+
+    print(metrics.summary())
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List, start or stop Azure ML compute instances through ARM REST.")
+    parser.add_argument("action", choices=["status", "start", "stop"])
+    parser.add_argument("--workspace", action="append", help="Only this workspace (repeatable)")
+    parser.add_argument("--compute", action="append", help="Only this compute instance (repeatable; start/stop)")
+    parser.add_argument("--wait", action="store_true", help="Wait for each start/stop operation to finish")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    if not SUBSCRIPTION_ID:
+        print("Error: AZURE_SUBSCRIPTION_ID is not set.")
+        sys.exit(1)
+
+    try:
+        exit_code = main(args)
+    except HttpResponseError as e:
+        print(f"Error: {e.message}")
+        exit_code = 1
+    metrics.export(args.metrics_json, args.metrics_prom)
+    sys.exit(exit_code)
@@ -0,0 +1,266 @@
+import os
+import threading
+from collections import namedtuple
+from azure_clients import get_client_factory
+
+# The Azure SDK modules (azure.ai.ml in particular takes seconds to import) are imported by the backends
+# that use them, so tools that only need the records or the REST backend start quickly.
+
+# --- Configuration ---
+# "mlclient": one resources.list() call + one MLClient(...).compute.list() per workspace (N+1 calls).
+# "graph":    a single paged Azure Resource Graph query for every workspace and compute instance.
+# "rest":     same calls as "mlclient", but plain ARM REST parsed straight into ComputeRecords (no azure.ai.ml).
+DEFAULT_INVENTORY_BACKEND = os.getenv("COMPUTE_INVENTORY_BACKEND", "mlclient")
+
+WORKSPACE_FILTER = "resourceType eq 'Microsoft.MachineLearningServices/workspaces'"
+
+WorkspaceRecord = namedtuple("WorkspaceRecord", ["name", "resource_group", "storage_account"])
+ComputeRecord = namedtuple("ComputeRecord", ["name", "state", "workspace", "resource_group", "vm_size"])
+
+
+def workspace_key(resource_group: str, workspace_name: str) -> tuple:
+    """ARM names are case-insensitive, so workspaces are matched on lowercase (RG, name)."""
+    return resource_group.lower(), workspace_name.lower()
+
+
+class MLClientInventory:
+    """Lists workspaces through ARM and compute instances through one MLClient per workspace."""
+
+    name = "mlclient"
+
+    def __init__(self, credential, subscription_id: str):
+        self.credential = credential
+        self.subscription_id = subscription_id
+
+    def _get_ml_client(self, workspace: WorkspaceRecord):
+        # One MLClient per workspace for the lifetime of the process, all on the shared connection pool.
+        return get_client_factory().ml_client(self.credential, self.subscription_id,
+                                              workspace.resource_group, workspace.name)
+
+    def list_workspaces(self) -> list:
+        from azure.mgmt.resource import ResourceManagementClient
+
+        resource_client = get_client_factory().get(ResourceManagementClient, self.credential, self.subscription_id)
+        # ID format: /subscriptions/{sub-id}/resourceGroups/{rg-name}/providers/Microsoft.MachineLearningServices/workspaces/{ws-name}
+        return [
+            WorkspaceRecord(ws.name, ws.id.split('/')[4], None)
+            for ws in resource_client.resources.list(filter=WORKSPACE_FILTER)
+        ]
+
+    def scan_workspace(self, workspace: WorkspaceRecord) -> list:
+        ml_client = self._get_ml_client(workspace)
+        records = []
+        for compute in ml_client.compute.list():
+            if compute.type == "computeinstance":  # API returns lowercase 'computeinstance'.
+                records.append(ComputeRecord(compute.name, compute.state, workspace.name,
+                                             workspace.resource_group, getattr(compute, "size", None)))
+        return records
+
+    def scan_compute_states(self, workspace: WorkspaceRecord) -> list:
+        # One compute.list() per workspace is already the cheapest way to read every instance state.
+        return self.scan_workspace(workspace)
+
+    def clear_states(self):
+        # Nothing is kept between polls: every scan_compute_states() call reads live states.
+        pass
+
+    def describe_workspace(self, workspace: WorkspaceRecord) -> WorkspaceRecord:
+        # The storage account is informational only and not worth one extra GET per workspace on every refresh.
+        return workspace
+
+
+class ResourceGraphInventory:
+    """
+    Lists every workspace and compute instance in the subscription with one paged Resource Graph query.
+    The result is loaded by list_workspaces(); scan_workspace() is then answered from memory.
+
+    Note: Resource Graph is an eventually consistent index, so a state change can take a few seconds
+    to show up. The start/stop tools already treat a 409 from a stale state as 'skipped'.
+    """
+
+    name = "graph"
+
+    COMPUTE_INSTANCE_QUERY = """
+resources
+| where type =~ 'microsoft.machinelearningservices/workspaces'
+| project workspaceId = tolower(id), workspace = name, resourceGroup = tostring(split(id, '/')[4]),
+          storageAccount = tostring(split(tostring(properties.storageAccount), '/')[8])
+| join kind=leftouter (
+    resources
+    | where type =~ 'microsoft.machinelearningservices/workspaces/computes'
+    | where tostring(properties.computeType) =~ 'ComputeInstance'
+    | extend parts = split(id, '/')
+    | project workspaceId = tolower(strcat_array(array_slice(parts, 0, 8), '/')),
+              computeName = tostring(parts[10]),
+              state = tostring(properties.properties.state),
+              vmSize = tostring(properties.properties.vmSize)
+) on workspaceId
+| project workspace, resourceGroup, storageAccount, computeName, state, vmSize
+| order by workspace asc, computeName asc
+"""
+
+    # Used when the workspace list comes from the inventory cache: computes only, no workspace join.
+    COMPUTE_STATE_QUERY = """
+resources
+| where type =~ 'microsoft.machinelearningservices/workspaces/computes'
+| where tostring(properties.computeType) =~ 'ComputeInstance'
+| extend parts = split(id, '/')
+| project workspace = tostring(parts[8]), resourceGroup = tostring(parts[4]), computeName = tostring(parts[10]),
+          state = tostring(properties.properties.state), vmSize = tostring(properties.properties.vmSize)
+| order by workspace asc, computeName asc
+"""
+
+    def __init__(self, credential, subscription_id: str):
+        self.credential = credential
+        self.subscription_id = subscription_id
+        self._workspaces = None
+        self._computes = {}
+        self._states = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        from resource_graph import query_resource_graph
+
+        workspaces = {}
+        computes = {}
+        for row in query_resource_graph(self.credential, self.subscription_id, self.COMPUTE_INSTANCE_QUERY):
+            key = workspace_key(row["resourceGroup"], row["workspace"])
+            if key not in workspaces:
+                workspaces[key] = WorkspaceRecord(row["workspace"], row["resourceGroup"], row.get("storageAccount") or None)
+                computes[key] = []
+            if row.get("computeName"):
+                computes[key].append(ComputeRecord(row["computeName"], row.get("state") or "Unknown", row["workspace"],
+                                                   row["resourceGroup"], row.get("vmSize") or None))
+        self._workspaces = list(workspaces.values())
+        self._computes = computes
+
+    def list_workspaces(self) -> list:
+        with self._lock:
+            if self._workspaces is None:
+                self._load()
+        return list(self._workspaces)
+
+    def scan_workspace(self, workspace: WorkspaceRecord) -> list:
+        with self._lock:
+            if self._workspaces is None:
+                self._load()
+        return list(self._computes.get(workspace_key(workspace.resource_group, workspace.name), []))
+
+    def scan_compute_states(self, workspace: WorkspaceRecord) -> list:
+        # Scans run in parallel threads; only the first one runs the query.
+        with self._lock:
+            if self._states is None:
+                from resource_graph import query_resource_graph
+
+                states = {}
+                for row in query_resource_graph(self.credential, self.subscription_id, self.COMPUTE_STATE_QUERY):
+                    states.setdefault(workspace_key(row["resourceGroup"], row["workspace"]), []).append(
+                        ComputeRecord(row["computeName"], row.get("state") or "Unknown", row["workspace"],
+                                      row["resourceGroup"], row.get("vmSize") or None))
+                self._states = states
+        return list(self._states.get(workspace_key(workspace.resource_group, workspace.name), []))
+
+    def clear_states(self):
+        """
+        Drops everything loaded by earlier queries, so the next scan re-runs them.
+        Used by long-running callers (watch mode, compute_scheduler.py) before each new round.
+        """
+        with self._lock:
+            self._states = None
+            self._workspaces = None
+            self._computes = {}
+
+    def describe_workspace(self, workspace: WorkspaceRecord) -> WorkspaceRecord:
+        # The storage account is already part of the workspace query.
+        return workspace
+
+
+class RestInventory:
+    """
+    Lists workspaces and compute instances with plain ARM REST calls (compute_rest.py).
+
+    Each page of the compute list is parsed straight into ComputeRecord tuples holding only the fields
+    the tools read, instead of building a full azure.ai.ml entity per compute: less CPU, memory and
+    GIL time per scan thread, and azure.ai.ml is never imported.
+    """
+
+    name = "rest"
+
+    def __init__(self, credential, subscription_id: str):
+        from compute_rest import ArmRestClient
+
+        self.client = ArmRestClient(subscription_id, credential)
+
+    def list_workspaces(self) -> list:
+        return [WorkspaceRecord(name, resource_group, None) for name, resource_group in self.client.list_workspaces()]
+
+    def scan_workspace(self, workspace: WorkspaceRecord) -> list:
+        records = []
+        for compute in self.client.list_computes(workspace.resource_group, workspace.name):
+            properties = compute.get("properties") or {}
+            if properties.get("computeType") == "ComputeInstance":
+                instance = properties.get("properties") or {}
+                records.append(ComputeRecord(compute["name"], instance.get("state") or "Unknown", workspace.name,
+                                             workspace.resource_group, instance.get("vmSize")))
+        return records
+
+    def scan_compute_states(self, workspace: WorkspaceRecord) -> list:
+        return self.scan_workspace(workspace)
+
+    def clear_states(self):
+        # Nothing is kept between polls: every scan_compute_states() call reads live states.
+        pass
+
+    def describe_workspace(self, workspace: WorkspaceRecord) -> WorkspaceRecord:
+        storage_account_id = self.client.get_workspace(workspace.resource_group, workspace.name)["properties"].get("storageAccount")
+        return workspace._replace(storage_account=storage_account_id.split('/')[-1] if storage_account_id else None)
+
+
+INVENTORY_BACKENDS = {
+    MLClientInventory.name: MLClientInventory,
+    ResourceGraphInventory.name: ResourceGraphInventory,
+    RestInventory.name: RestInventory,
+}
+
+
+def get_inventory_backend(name: str, credential, subscription_id: str):
+    """Returns the inventory backend registered under 'name' ("mlclient", "graph" or "rest")."""
+    try:
+        backend_class = INVENTORY_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown inventory backend '{name}'. Choose one of: {', '.join(INVENTORY_BACKENDS)}")
+    return backend_class(credential, subscription_id)
+
+
+def add_inventory_arguments(parser):
+    """Adds the shared inventory options (--inventory, --cache, --refresh, --cache-ttl) to a tool's parser."""
+    from inventory_cache import add_cache_arguments
+
+    parser.add_argument("--inventory", choices=list(INVENTORY_BACKENDS), default=DEFAULT_INVENTORY_BACKEND,
+                        help=f"How compute instances are discovered (default: {DEFAULT_INVENTORY_BACKEND})")
+    add_cache_arguments(parser)
+
+
+def inventory_options_from_args(args) -> dict:
+    return {
+        "backend": args.inventory,
+        "use_cache": args.cache,
+        "cache_ttl": args.cache_ttl,
+        "refresh": args.refresh,
+    }
+
+
+def create_inventory(credential, subscription_id: str, backend: str = DEFAULT_INVENTORY_BACKEND,
+                     use_cache: bool = False, cache_ttl: int = None, refresh: bool = False):
+    """
+    Builds the configured inventory backend, wrapped with the on-disk inventory cache when 'use_cache' is set.
+    The cache is opt-in: while it is valid, workspaces and instances created since it was written are not seen.
+    """
+    inventory = get_inventory_backend(backend, credential, subscription_id)
+    if not use_cache:
+        return inventory
+
+    from inventory_cache import CachedInventory, DEFAULT_CACHE_TTL
+
+    return CachedInventory(inventory, subscription_id,
+                           ttl=DEFAULT_CACHE_TTL if cache_ttl is None else cache_ttl, refresh=refresh)
@@ -0,0 +1,141 @@
+import os
+import time
+import threading
+import requests
+from azure.core.exceptions import HttpResponseError
+from iac_metrics import metrics, operation_name
+from azure_clients import get_client_factory
+
+# --- Configuration ---
+ARM_ENDPOINT = (os.getenv("AZURE_IAC_ARM_ENDPOINT") or "https://management.azure.com").rstrip("/")
+ARM_SCOPE = "https://management.azure.com/.default"
+ML_API_VERSION = "2024-04-01"
+
+# Retries for 429 / 5xx responses (Retry-After is honoured, otherwise exponential backoff).
+MAX_RETRIES = 5
+# Pooled HTTPS connections per host; match the number of worker threads using the client.
+POOL_SIZE = 32
+REQUEST_TIMEOUT = 60
+# Refresh the token this many seconds before it expires.
+TOKEN_REFRESH_MARGIN = 300
+
+WORKSPACE_TYPE = "Microsoft.MachineLearningServices/workspaces"
+
+
+class ArmRestError(HttpResponseError):
+    """An error response from ARM. Subclasses HttpResponseError so the tools' existing handlers apply."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message=f"HTTP {status_code}: {message}")
+        self.status_code = status_code
+
+
+class ArmRestClient:
+    """
+    Minimal ARM REST client for the compute tools: the shared pooled requests.Session, a cached bearer token,
+    and only the management-plane calls the tools need (list workspaces/computes, start/stop, LRO polling).
+
+    Importing it costs a few milliseconds, unlike azure.ai.ml. The shared credential (azure_credentials.py)
+    is only used when a token is needed, and not at all when AZURE_IAC_ARM_ENDPOINT points to the local stand-in.
+    """
+
+    def __init__(self, subscription_id: str, credential=None, pool_size: int = POOL_SIZE):
+        self.subscription_id = subscription_id
+        self.credential = credential
+        # The connection pool shared with the SDK clients (azure_clients.py), grown to 'pool_size'.
+        self.session = get_client_factory(pool_size).session
+        self._token = None
+        self._token_expires_on = 0
+        self._token_lock = threading.Lock()
+
+    def _authorization(self) -> str:
+        if not ARM_ENDPOINT.startswith("https://"):
+            return "Bearer stand-in"  # The local stand-in does not check tokens (see arm_endpoint.py).
+        with self._token_lock:
+            if self._token is None or time.time() > self._token_expires_on - TOKEN_REFRESH_MARGIN:
+                if self.credential is None:
+                    from azure_credentials import get_credential
+                    self.credential = get_credential()
+                access_token = self.credential.get_token(ARM_SCOPE)
+                self._token, self._token_expires_on = access_token.token, access_token.expires_on
+            return f"Bearer {self._token}"
+
+    def request(self, method: str, url: str, params: dict = None, body: dict = None) -> requests.Response:
+        """Sends one request (relative paths are resolved against the ARM endpoint), retrying 429 and 5xx."""
+        if url.startswith("/"):
+            url = ARM_ENDPOINT + url
+        operation = operation_name(method, url)
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                metrics.record_retry(operation)
+            start = time.perf_counter()
+            response = self.session.request(method, url, params=params, json=body, timeout=REQUEST_TIMEOUT,
+                                            headers={"Authorization": self._authorization()})
+            metrics.observe_call(operation, time.perf_counter() - start, response.status_code)
+            if response.status_code != 429 and response.status_code < 500:
+                break
+            if attempt < MAX_RETRIES:
+                try:
+                    delay = float(response.headers.get("Retry-After", 2 ** attempt))
+                except ValueError:
+                    delay = 2 ** attempt
+                time.sleep(delay)
+
+        if response.status_code >= 400:
+            try:
+                message = response.json()["error"]["message"]
+            except (ValueError, KeyError, TypeError):
+                message = response.text[:200]
+            raise ArmRestError(response.status_code, message)
+        return response
+
+    def paged(self, path: str, params: dict = None):
+        """Yields every item of a paged ARM list ('value' + 'nextLink'), one page in memory at a time."""
+        url = path
+        while url:
+            body = self.request("GET", url, params).json()
+            yield from body.get("value", [])
+            url = body.get("nextLink")
+            params = None  # nextLink already carries the query string.
+
+    # --- Azure ML compute ---
+
+    def list_workspaces(self):
+        """Yields (workspace name, resource group) for every ML workspace in the subscription."""
+        path = f"/subscriptions/{self.subscription_id}/resources"
+        params = {"$filter": f"resourceType eq '{WORKSPACE_TYPE}'", "api-version": "2021-04-01"}
+        for resource in self.paged(path, params):
+            # ID format: /subscriptions/{sub}/resourceGroups/{rg}/providers/Microsoft.MachineLearningServices/workspaces/{ws}
+            yield resource["name"], resource["id"].split("/")[4]
+
+    def _compute_path(self, resource_group: str, workspace_name: str) -> str:
+        return (f"/subscriptions/{self.subscription_id}/resourceGroups/{resource_group}"
+                f"/providers/{WORKSPACE_TYPE}/{workspace_name}/computes")
+
+    def get_workspace(self, resource_group: str, workspace_name: str) -> dict:
+        path = f"/subscriptions/{self.subscription_id}/resourceGroups/{resource_group}/providers/{WORKSPACE_TYPE}/{workspace_name}"
+        return self.request("GET", path, {"api-version": ML_API_VERSION}).json()
+
+    def list_computes(self, resource_group: str, workspace_name: str):
+        """Yields the raw JSON of every compute of a workspace."""
+        return self.paged(self._compute_path(resource_group, workspace_name), {"api-version": ML_API_VERSION})
+
+    def begin_compute_action(self, resource_group: str, workspace_name: str, compute_name: str, action: str) -> str:
+        """Sends start/stop/restart and returns the URL to poll for completion (None if the service gave none)."""
+        path = f"{self._compute_path(resource_group, workspace_name)}/{compute_name}/{action}"
+        response = self.request("POST", path, {"api-version": ML_API_VERSION})
+        return response.headers.get("Azure-AsyncOperation") or response.headers.get("Location")
+
+    def wait_for_operation(self, status_url: str, timeout: float = 1800) -> str:
+        """Polls an Azure-AsyncOperation/Location URL until it finishes. Returns the final status."""
+        deadline = time.time() + timeout
+        while True:
+            response = self.request("GET", status_url)
+            status = "Succeeded" if response.status_code in (200, 204) else "InProgress"
+            if response.content:
+                status = response.json().get("status", status)
+            if status not in ("InProgress", "Running", "Accepted") or response.status_code == 204:
+                return status
+            if time.time() > deadline:
+                return "TimedOut"
+            time.sleep(float(response.headers.get("Retry-After", 10)))
@@ -0,0 +1,184 @@
+import sys
+import asyncio
+import time
+import argparse
+import os
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from azure_credentials import get_credential
+from azure.core.exceptions import ClientAuthenticationError
+from compute_aio_engine import AioComputeEngine
+from compute_inventory import add_inventory_arguments, create_inventory, inventory_options_from_args
+import compute_bulk as bulk
+from iac_metrics import metrics, add_metrics_arguments
+
+# 환경변수 로드
+load_dotenv()
+
+# --- Configuration ---
+SUBSCRIPTION_ID = os.getenv("AZURE_SUBSCRIPTION_ID")
+# A run whose scheduled time passed less than this many seconds ago (e.g. after a laptop sleep) still fires.
+MISSED_RUN_GRACE = 10 * 60
+# Upper bound of a single sleep, so clock changes and sleep/resume are noticed quickly.
+MAX_SLEEP = 60
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# Example schedule file (one rule per line):
+#   # days     time   action  [exclude=patterns]
+#   Mon-Fri    08:30  start   exclude=21-26
+#   Mon-Fri    18:30  stop
+
+
+def parse_days(spec: str) -> set:
+    """'Mon-Fri', 'Sat,Sun', 'Mon,Wed-Fri' or 'daily' -> set of weekday numbers (Mon = 0)."""
+    if spec.lower() in ("daily", "*"):
+        return set(range(7))
+    days = set()
+    for part in spec.lower().replace("–", "-").split(","):
+        if "-" in part:
+            first, last = (WEEKDAYS.index(day[:3]) for day in part.split("-", 1))
+            day = first
+            days.add(day)
+            while day != last:  # Ranges may wrap, e.g. Sat-Mon.
+                day = (day + 1) % 7
+                days.add(day)
+        else:
+            days.add(WEEKDAYS.index(part[:3]))
+    return days
+
+
+def parse_exclude(spec: str) -> list:
+    """'21-26,test' -> ['21', '22', ..., '26', 'test']. Numeric ranges keep the zero padding of the first number."""
+    patterns = []
+    for part in spec.replace("–", "-").split(","):
+        first, _, last = part.partition("-")
+        if last and first.isdigit() and last.isdigit():
+            patterns.extend(f"{number:0{len(first)}d}" for number in range(int(first), int(last) + 1))
+        elif part:
+            patterns.append(part)
+    return patterns
+
+
+class ScheduleRule:
+    def __init__(self, line: str):
+        fields = line.split()
+        if len(fields) < 3 or fields[2].lower() not in ("start", "stop"):
+            raise ValueError(f"Invalid schedule rule '{line}' (expected: <days> <HH:MM> <start|stop> [exclude=...])")
+        self.text = " ".join(fields)
+        self.days = parse_days(fields[0])
+        self.at = datetime.strptime(fields[1], "%H:%M").time()
+        self.action = fields[2].lower()
+        self.exclude_patterns = []
+        for option in fields[3:]:
+            key, _, value = option.partition("=")
+            if key.lower() != "exclude":
+                raise ValueError(f"Unknown option '{option}' in schedule rule '{line}'")
+            self.exclude_patterns = parse_exclude(value)
+        self.last_fired = None
+
+    def previous_occurrence(self, now: datetime) -> datetime:
+        """Most recent scheduled time at or before 'now'."""
+        for days_back in range(8):
+            candidate = datetime.combine(now.date() - timedelta(days=days_back), self.at)
+            if candidate <= now and candidate.weekday() in self.days:
+                return candidate
+        return None
+
+    def next_occurrence(self, now: datetime) -> datetime:
+        """First scheduled time strictly after 'now'."""
+        for days_ahead in range(8):
+            candidate = datetime.combine(now.date() + timedelta(days=days_ahead), self.at)
+            if candidate > now and candidate.weekday() in self.days:
+                return candidate
+        return None
+
+
+def load_rules(schedule_file: str, inline_rules: list) -> list:
+    lines = list(inline_rules or [])
+    if schedule_file:
+        with open(schedule_file, encoding="utf-8") as f:
+            lines.extend(line.split("#", 1)[0].strip() for line in f)
+    return [ScheduleRule(line) for line in lines if line]
+
+
+def log(message: str):
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {message}", flush=True)
+
+
+async def run_daemon(rules: list, inventory_options: dict, fire_and_poll: bool, metrics_paths: tuple = (None, None)):
+    # Everything expensive is created once and kept warm for the lifetime of the daemon.
+    credential = get_credential()
+    inventory = create_inventory(credential, SUBSCRIPTION_ID, **inventory_options)
+
+    async with AioComputeEngine(SUBSCRIPTION_ID, response_hook=bulk.concurrency_limiter.observe_response) as engine:
+        started = datetime.now()
+        for rule in rules:
+            # Do not replay runs that were due before the daemon started.
+            rule.last_fired = rule.previous_occurrence(started)
+            log(f"Loaded rule: {rule.text} (next run: {rule.next_occurrence(started):%a %Y-%m-%d %H:%M})")
+
+        while True:
+            now = datetime.now()
+            for rule in rules:
+                due = rule.previous_occurrence(now)
+                if due is None or (rule.last_fired is not None and due <= rule.last_fired):
+                    continue
+                rule.last_fired = due
+
+                delay = (now - due).total_seconds()
+                if delay > MISSED_RUN_GRACE:
+                    log(f"Skipped '{rule.text}': it was due at {due:%H:%M} ({delay / 60:.0f} min ago).")
+                    continue
+
+                log(f"Running '{rule.text}' (scheduled {due:%H:%M}, fired {delay:.1f}s late)")
+                print("=" * 80)
+                run_start = time.time()
+                try:
+                    inventory.clear_states()
+                    summary = await bulk.run_bulk_action(rule.action, inventory, engine, rule.exclude_patterns, fire_and_poll)
+                    log(f"Finished '{rule.text}' in {time.time() - run_start:.2f}s: "
+                        f"{summary['succeeded']} Succeeded, {summary['skipped']} Skipped, "
+                        f"{summary['failed']} Failed, {summary['excluded']} Excluded.")
+                except ClientAuthenticationError:
+                    log("Authentication error: Ensure you are logged in via 'az login'. Will retry at the next scheduled run.")
+                except Exception as e:
+                    log(f"Run '{rule.text}' failed after {time.time() - run_start:.2f}s: {e}")
+                # Metrics accumulate over the daemon's lifetime; the files are rewritten after every run.
+                metrics.export(*metrics_paths)
+                print("=" * 80)
+
+            now = datetime.now()
+            next_run = min(rule.next_occurrence(now) for rule in rules)
+            await asyncio.sleep(min(MAX_SLEEP, max(1.0, (next_run - now).total_seconds())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Keep running and start/stop Azure ML compute instances on a weekly schedule.",
+        epilog='Example: --rule "Mon-Fri 08:30 start exclude=21-26" --rule "Mon-Fri 18:30 stop"',
+    )
+    parser.add_argument("--schedule", help="File with one rule per line: <days> <HH:MM> <start|stop> [exclude=...]")
+    parser.add_argument("--rule", action="append", help="Inline schedule rule (can be repeated)")
+    parser.add_argument("--fire-and-poll", action="store_true",
+                        help="Submit every start/stop up front and track completion from one central poll loop")
+    add_inventory_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        schedule_rules = load_rules(args.schedule, args.rule)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not schedule_rules:
+        parser.error("No schedule rules given. Use --schedule FILE and/or --rule RULE.")
+
+    # For Windows, the default event loop policy can cause issues. This is a robust fix.
+    if sys.platform.lower() == "win32" or sys.platform.lower() == "cygwin":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    try:
+        asyncio.run(run_daemon(schedule_rules, inventory_options_from_args(args), args.fire_and_poll,
+                               (args.metrics_json, args.metrics_prom)))
+    except KeyboardInterrupt:
+        print("\nScheduler stopped.")
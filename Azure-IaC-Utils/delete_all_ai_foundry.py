@@ -1,82 +1,191 @@
 import os
+import sys
+import argparse
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
+from azure_credentials import get_credential
 from azure.mgmt.resource import ResourceManagementClient
-from azure.core.exceptions import ResourceNotFoundError
-import re
+from azure_clients import get_client_factory
+from iac_metrics import metrics, add_metrics_arguments
+from deletion_plan import (PlanError, resource_target, create_plan, write_plan, load_plan, check_drift,
+                           print_drift_report, add_plan_arguments)
+from teardown_graph import TeardownGraph, DELETED, BLOCKED, FAILED
+from iac_common import format_duration
 
 # 환경변수 로드
 load_dotenv()
 
 # 사용자의 구독 ID
-subscription_id = os.getenv("AZURE_SUBSCRIPTION_ID") 
-credential = DefaultAzureCredential()
-
-resource_client = ResourceManagementClient(credential, subscription_id)
+subscription_id = os.getenv("AZURE_SUBSCRIPTION_ID")
 
 # API 버전 맵
 API_VERSION_MAP = {
     "microsoft.cognitiveservices/accounts": "2023-05-01",
     # ⬇️ 오류 메시지에 따라 지원되는 최신 API 버전으로 수정했습니다.
-    "microsoft.cognitiveservices/accounts/projects": "2025-04-01-preview", 
+    "microsoft.cognitiveservices/accounts/projects": "2025-04-01-preview",
 }
 
+# 삭제 대상 리소스 타입
+target_project_type = "microsoft.cognitiveservices/accounts/projects"
+target_account_type = "microsoft.cognitiveservices/accounts"
+
+# 삭제 순서 (계획 파일의 order): 하위 리소스인 projects 먼저, 상위 리소스인 accounts 나중에
+PROJECT_ORDER = 0
+ACCOUNT_ORDER = 1
+
+# 동시에 진행하는 삭제 수
+MAX_CONCURRENT_DELETES = 8
+
+# 계획 파일에 기록되는 도구 이름 (다른 도구의 계획 파일은 apply 하지 않음)
+TOOL = "delete_all_ai_foundry"
+
 def get_api_version(res_type):
     # API 버전을 찾을 때 대소문자 구분 없이 처리
     return API_VERSION_MAP.get(res_type.lower())
 
-print("구독 내 모든 리소스를 조회합니다...")
-all_resources = list(resource_client.resources.list())
-print(f"총 {len(all_resources)}개의 리소스를 찾았습니다.")
+def find_foundry_resources(resource_client):
+    """구독 내 AI 프로젝트와 AI 계정(Foundry)을 찾아 (projects, accounts)로 반환"""
+    print("구독 내 모든 리소스를 조회합니다...")
+    with metrics.phase("discover"):
+        all_resources = list(resource_client.resources.list())
+    print(f"총 {len(all_resources)}개의 리소스를 찾았습니다.")
 
-# 삭제할 리소스를 타입에 따라 분류
-projects_to_delete = []
-accounts_to_delete = []
+    # 삭제할 리소스를 타입에 따라 분류
+    projects_to_delete = []
+    accounts_to_delete = []
+    for res in all_resources:
+        if res.type.lower() == target_project_type:
+            projects_to_delete.append(res)
+        elif res.type.lower() == target_account_type:
+            accounts_to_delete.append(res)
+    return projects_to_delete, accounts_to_delete
 
-# 삭제 대상 리소스 타입
-target_project_type = "microsoft.cognitiveservices/accounts/projects"
-target_account_type = "microsoft.cognitiveservices/accounts"
+def _account_id(project_id):
+    # 프로젝트 ID: .../accounts/{account}/projects/{project}
+    return project_id[:project_id.lower().rindex("/projects/")]
+
+def delete_foundry_resources(resource_client, projects_to_delete, accounts_to_delete,
+                             max_workers=MAX_CONCURRENT_DELETES):
+    """
+    AI 프로젝트와 계정을 의존성 그래프로 동시에 삭제 (최대 max_workers 개씩)
+    계정마다 자기 프로젝트가 모두 삭제되면 다른 계정의 프로젝트를 기다리지 않고 바로 삭제됩니다.
+    프로젝트 삭제에 실패한 계정은 삭제하지 않습니다. 반환값: 삭제되지 않은 리소스 수
+    """
+    graph = TeardownGraph(max_workers=max_workers)
+    for kind, resources in (("project", projects_to_delete), ("account", accounts_to_delete)):
+        for res in resources:
+            api_version = get_api_version(res.type)
+            if not api_version:
+                print(f"⚠️ API 버전을 찾을 수 없음: {res.name} | 타입: {res.type}")
+                continue
+            graph.add(res.id, res.name, kind,
+                      lambda resource_id=res.id, api_version=api_version:
+                          resource_client.resources.begin_delete_by_id(resource_id, api_version=api_version),
+                      references=[_account_id(res.id)] if kind == "project" else [])
+
+    print(f"\n--- AI 프로젝트 {len(projects_to_delete)}개, AI 계정(Foundry) {len(accounts_to_delete)}개 삭제를 시작합니다 "
+          f"(동시 {max_workers}개) ---")
+    with metrics.phase("delete"):
+        results = graph.run()
+    print_account_report(graph, results)
+    return sum(1 for outcome, _, _ in results.values() if outcome != DELETED)
+
+def print_account_report(graph, results):
+    """계정별 결과 요약: 계정 삭제 결과와 프로젝트 삭제 성공/전체 수"""
+    accounts = {}
+    for node in graph.nodes.values():
+        account_id = _account_id(node.id) if node.kind == "project" else node.id
+        entry = accounts.setdefault(account_id.lower(), {"name": account_id.rsplit('/', 1)[-1], "account": None,
+                                                         "projects": []})
+        outcome = results.get(node.id, (BLOCKED, "실행되지 않음", 0.0))
+        if node.kind == "project":
+            entry["projects"].append(outcome)
+        else:
+            entry["account"] = outcome
+
+    print(f"\n" + "="*60)
+    print("📊 AI 계정별 삭제 결과")
+    print("="*60)
+    icons = {DELETED: "✅", FAILED: "❌", BLOCKED: "⏭️"}
+    for entry in sorted(accounts.values(), key=lambda e: e["name"].lower()):
+        deleted_projects = sum(1 for outcome, _, _ in entry["projects"] if outcome == DELETED)
+        projects = f"프로젝트 {deleted_projects}/{len(entry['projects'])}개 삭제"
+        if entry["account"] is None:
+            print(f"  ➖ {entry['name']:<30} (계정은 삭제 대상 아님) {projects}")
+            continue
+        outcome, message, seconds = entry["account"]
+        print(f"  {icons[outcome]} {entry['name']:<30} {message} | {projects} ({format_duration(seconds)})")
+
+def write_deletion_plan(projects_to_delete, accounts_to_delete, out=None):
+    """삭제 계획 파일을 생성 (plan): 리소스 ID, 삭제 순서(projects → accounts), ETag, 개수"""
+    targets = ([resource_target(res, PROJECT_ORDER) for res in projects_to_delete] +
+               [resource_target(res, ACCOUNT_ORDER) for res in accounts_to_delete])
+    if not targets:
+        print("\n삭제할 AI 프로젝트/계정을 찾지 못했습니다. 계획 파일을 만들지 않습니다.")
+        return 1
+
+    plan = create_plan(TOOL, subscription_id, targets)
+    path = write_plan(plan, out)
+    for target in sorted(targets, key=lambda t: (t.order, t.name.lower())):
+        print(f"- [{target.order}] {target.name} ({target.type})")
+    print(f"\n📝 삭제 계획 저장: {path}")
+    print(f"   AI 프로젝트 {len(projects_to_delete)}개, AI 계정 {len(accounts_to_delete)}개")
+    print(f"   실행: python {os.path.basename(__file__)} apply {path}")
+    return 0
+
+def apply_deletion_plan(credential, resource_client, plan_file, max_workers=MAX_CONCURRENT_DELETES):
+    """
+    계획 파일을 실행 (apply)
+    구독 전체를 다시 조회하지 않고, 계획에 기록된 리소스만 변경 여부를 확인한 뒤 삭제합니다.
+    계획 이후 대상이 변경되었으면 아무것도 삭제하지 않고 종료합니다 (반환값 2).
+    """
+    plan, targets = load_plan(plan_file, TOOL, subscription_id)
+    print(f"\n📄 계획 파일: {plan_file} (생성: {plan['created_at']}, 대상 {len(targets)}개)")
+
+    with metrics.phase("drift_check"):
+        live, gone, drift = check_drift(credential, subscription_id, targets)
+    if not print_drift_report(gone, drift):
+        return 2
+
+    projects_to_delete = [t for t in live if t.order == PROJECT_ORDER]
+    accounts_to_delete = [t for t in live if t.order == ACCOUNT_ORDER]
+    return 1 if delete_foundry_resources(resource_client, projects_to_delete, accounts_to_delete, max_workers) else 0
+
+def main(command="run", plan_file=None, out=None, max_workers=MAX_CONCURRENT_DELETES):
+    """
+    구독 내 모든 AI Foundry 리소스(계정마다 프로젝트 → 계정)를 삭제하는 스크립트
+    command: run (조회·삭제) | plan (계획 파일 생성) | apply (계획 파일 실행)
+    """
+    credential = get_credential()
+    resource_client = get_client_factory(pool_size=max_workers).get(ResourceManagementClient, credential,
+                                                                     subscription_id)
 
-for res in all_resources:
-    if res.type.lower() == target_project_type:
-        projects_to_delete.append(res)
-    elif res.type.lower() == target_account_type:
-        accounts_to_delete.append(res)
-
-# 1️⃣ 하위 리소스인 projects 먼저 삭제 (종속성 문제 방지)
-print(f"\n--- {len(projects_to_delete)}개의 AI 프로젝트 삭제를 시작합니다 ---")
-for res in projects_to_delete:
-    api_version = get_api_version(res.type)
-    if not api_version:
-        print(f"⚠️ API 버전을 찾을 수 없음: {res.name} | 타입: {res.type}")
-        continue
-    
-    print(f"🗑️ 프로젝트 삭제 중: {res.name} (타입: {res.type}, API: {api_version})")
-    try:
-        delete_op = resource_client.resources.begin_delete_by_id(res.id, api_version=api_version)
-        delete_op.wait()
-        print(f"✅ 프로젝트 삭제 완료: {res.name}")
-    except ResourceNotFoundError:
-        print(f" 이미 삭제됨: {res.name}")
-    except Exception as e:
-        print(f"❌ 프로젝트 삭제 실패: {res.name} → {e}")
-
-# 2️⃣ 상위 리소스인 accounts 삭제
-print(f"\n--- {len(accounts_to_delete)}개의 AI 계정(Foundry) 삭제를 시작합니다 ---")
-for res in accounts_to_delete:
-    api_version = get_api_version(res.type)
-    if not api_version:
-        print(f"⚠️ API 버전을 찾을 수 없음: {res.name} | 타입: {res.type}")
-        continue
-
-    print(f"🗑️ 계정 삭제 중: {res.name} (타입: {res.type}, API: {api_version})")
     try:
-        delete_op = resource_client.resources.begin_delete_by_id(res.id, api_version=api_version)
-        delete_op.wait()
-        print(f"✅ 계정 삭제 완료: {res.name}")
-    except ResourceNotFoundError:
-        print(f" 이미 삭제됨: {res.name}")
-    except Exception as e:
-        print(f"❌ 계정 삭제 실패: {res.name} → {e}")
-
-print("\n모든 작업이 완료되었습니다.")
\ No newline at end of file
+        if command == "apply":
+            exit_code = apply_deletion_plan(credential, resource_client, plan_file, max_workers)
+        else:
+            projects_to_delete, accounts_to_delete = find_foundry_resources(resource_client)
+            if command == "plan":
+                return write_deletion_plan(projects_to_delete, accounts_to_delete, out)
+            exit_code = 1 if delete_foundry_resources(resource_client, projects_to_delete, accounts_to_delete,
+                                                      max_workers) else 0
+    except PlanError as e:
+        print(f"\n❌ {e}")
+        return 1
+
+    print("\n모든 작업이 완료되었습니다.")
+    print(metrics.summary())
+    return exit_code
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="구독 내 AI Foundry 프로젝트와 계정을 삭제합니다.")
+    add_plan_arguments(parser)
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENT_DELETES,
+                        help=f"동시에 진행할 삭제 수 (기본값: {MAX_CONCURRENT_DELETES})")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    if args.command == "apply" and not args.plan_file:
+        parser.error("apply 에는 계획 파일 경로가 필요합니다.")
+    exit_code = main(args.command, args.plan_file, args.out, max(1, args.workers))
+    # 측정값 저장 (--metrics-json / --metrics-prom, 또는 IAC_METRICS_JSON / IAC_METRICS_PROM 환경변수)
+    metrics.export(args.metrics_json, args.metrics_prom)
+    sys.exit(exit_code)
@@ -1,9 +1,16 @@
 import re
 import os
+import sys
+import argparse
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
+from azure_credentials import get_credential
 from azure.mgmt.resource import ResourceManagementClient
-from azure.core.exceptions import HttpResponseError
+from azure_clients import get_client_factory
+from resource_graph import query_resource_graph
+from iac_metrics import metrics, add_metrics_arguments
+from rg_delete_tracker import ResourceGroupDeleteTracker, POLL_INTERVAL, FORCE_DELETION_TYPES, add_tracker_arguments
+from deletion_plan import (PlanError, ResourceRecord, resource_group_target, create_plan, write_plan, load_plan,
+                           check_drift, print_drift_report, add_plan_arguments)
 
 # 환경변수 로드
 load_dotenv()
@@ -17,6 +24,16 @@ MIN_NUMBER = 0
 MAX_NUMBER = 25
 # -------------------------
 
+# 삭제 대상 리소스 그룹의 모든 리소스를 한 번에 가져오는 Resource Graph 쿼리 (리소스 그룹 이름은 서버에서 필터링)
+RESOURCE_INVENTORY_QUERY = f"""
+resources
+| where resourceGroup matches regex @'(?i){PATTERN.pattern}'
+| project id, name, type, resourceGroup, etag
+"""
+
+# 계획 파일에 기록되는 도구 이름 (다른 도구의 계획 파일은 apply 하지 않음)
+TOOL = "delete_all_ml_workspace"
+
 def find_matching_resource_groups(resource_client):
     """패턴과 일치하는 리소스 그룹을 찾아 반환"""
     resource_groups_to_delete = []
@@ -41,28 +58,42 @@ def find_matching_resource_groups(resource_client):
     
     return resource_groups_to_delete
 
-def list_resources_in_group(resource_client, rg_name):
-    """리소스 그룹 내 모든 리소스 조회"""
+def collect_resources_by_group(credential, resource_client, resource_groups):
+    """
+    삭제 대상 리소스 그룹의 모든 리소스를 한 번에 조회해 리소스 그룹별로 묶어 반환 {소문자 RG 이름: [ResourceRecord]}
+    Resource Graph 쿼리 한 번(서버 측 필터)으로 조회하고, 실패하면 구독 전체 리소스 목록 한 번으로 대체합니다.
+    확인 화면과 삭제 요약이 이 결과를 함께 사용합니다.
+    """
+    resources_by_group = {rg.name.lower(): [] for rg in resource_groups}
     try:
-        resources = list(resource_client.resources.list_by_resource_group(rg_name))
-        return resources
+        rows = query_resource_graph(credential, SUBSCRIPTION_ID, RESOURCE_INVENTORY_QUERY)
+        resources = [ResourceRecord(row["id"], row["name"], row["type"], row["resourceGroup"], row.get("etag") or None)
+                     for row in rows]
     except Exception as e:
-        print(f"리소스 그룹 '{rg_name}' 내 리소스 조회 실패: {e}")
-        return []
+        print(f"Resource Graph 조회 실패, 구독 전체 리소스 목록으로 대체합니다: {e}")
+        try:
+            # ID 형식: /subscriptions/{sub}/resourceGroups/{rg}/providers/...
+            resources = [ResourceRecord(res.id, res.name, res.type, res.id.split('/')[4], None)
+                         for res in resource_client.resources.list()]
+        except Exception as e:
+            print(f"리소스 목록 조회 실패: {e}")
+            return resources_by_group
 
-def confirm_deletion(resource_groups, resource_client):
-    """사용자에게 삭제 확인을 받음"""
-    if not resource_groups:
-        print("\n패턴과 일치하는 삭제 대상 리소스 그룹을 찾지 못했습니다.")
-        return False
+    for res in resources:
+        group = resources_by_group.get(res.resource_group.lower())
+        if group is not None:
+            group.append(res)
+    return resources_by_group
 
+def print_deletion_targets(resource_groups, resources_by_group):
+    """삭제 대상 리소스 그룹과 내부 리소스를 출력"""
     print("\n" + "="*70)
     print("🚨 [경고] 아래의 리소스 그룹과 내부 모든 리소스가 영구적으로 삭제됩니다.")
     print("="*70)
     
     total_resources = 0
     for rg in resource_groups:
-        resources = list_resources_in_group(resource_client, rg.name)
+        resources = resources_by_group.get(rg.name.lower(), [])
         total_resources += len(resources)
         
         print(f"\n📁 {rg.name} (위치: {rg.location}) - {len(resources)}개 리소스")
@@ -96,6 +127,13 @@ def confirm_deletion(resource_groups, resource_client):
     print(f"🎯 삭제 대상: {len(resource_groups)}개 리소스 그룹, {total_resources}개 리소스")
     print("="*70)
 
+def confirm_deletion(resource_groups, resources_by_group):
+    """사용자에게 삭제 확인을 받음"""
+    if not resource_groups:
+        print("\n패턴과 일치하는 삭제 대상 리소스 그룹을 찾지 못했습니다.")
+        return False
+
+    print_deletion_targets(resource_groups, resources_by_group)
     try:
         confirm = input("\n정말로 위의 모든 리소스 그룹과 내부 리소스를 삭제하시겠습니까? (삭제를 원하시면 'yes'를 입력하세요): ")
         return confirm.lower() == 'yes'
@@ -103,56 +141,109 @@ def confirm_deletion(resource_groups, resource_client):
         print("\n입력이 취소되어 작업을 중단합니다.")
         return False
 
-def delete_resource_groups(resource_client, resource_groups, wait_for_completion=False):
-    """리소스 그룹들을 삭제 (내부 모든 리소스 포함)"""
+def delete_resource_groups(resource_client, resource_groups, resources_by_group, wait_for_completion=False,
+                           poll_interval=POLL_INTERVAL, timeout=None, force_deletion_types=None):
+    """
+    리소스 그룹들을 삭제 (내부 모든 리소스 포함)
+    모든 삭제를 한 번에 요청하고, wait_for_completion=True 이면 하나의 폴링 루프에서 완료까지 추적합니다.
+    force_deletion_types 가 있으면 VM·VM 확장 집합을 강제 삭제하며 리소스 그룹을 삭제합니다 (거부되면 일반 삭제).
+    반환값: 삭제되지 않은(실패/시간 초과) 리소스 그룹 수
+    """
     print("\n--- ML Workspace 관련 리소스 그룹 삭제를 시작합니다 ---")
-    successful_deletions = 0
-    failed_deletions = 0
-    
+
     for i, rg in enumerate(resource_groups, 1):
-        print(f"\n[{i}/{len(resource_groups)}] 🗑️ '{rg.name}' 리소스 그룹 삭제 중...")
-        
-        # 삭제 전 리소스 개수 확인
-        resources = list_resources_in_group(resource_client, rg.name)
-        print(f"  📊 내부 리소스 개수: {len(resources)}개")
-        
-        try:
-            # 리소스 그룹 전체 삭제 (내부 모든 리소스 포함)
-            delete_op = resource_client.resource_groups.begin_delete(rg.name)
-            
-            if wait_for_completion:
-                print(f"  ⏳ 삭제 완료를 기다리는 중... (ML 리소스는 시간이 오래 걸릴 수 있습니다)")
-                delete_op.wait()
-                print(f"  ✅ '{rg.name}' 및 내부 모든 리소스가 완전히 삭제되었습니다.")
-            else:
-                print(f"  ✅ '{rg.name}' 삭제 요청이 성공적으로 시작되었습니다.")
-            
-            successful_deletions += 1
-            
-        except HttpResponseError as e:
-            print(f"  ❌ '{rg.name}' 삭제 중 HTTP 오류 발생: {e.message}")
-            failed_deletions += 1
-        except Exception as e:
-            print(f"  ❌ '{rg.name}' 삭제 중 예기치 않은 오류 발생: {e}")
-            failed_deletions += 1
+        # 삭제 전 리소스 개수 (확인 단계에서 조회한 목록 재사용)
+        resources = resources_by_group.get(rg.name.lower(), [])
+        print(f"[{i}/{len(resource_groups)}] 🗑️ '{rg.name}' - 내부 리소스 {len(resources)}개")
+
+    # 리소스 그룹 전체 삭제 (내부 모든 리소스 포함)
+    tracker = ResourceGroupDeleteTracker(resource_client, poll_interval=poll_interval, timeout=timeout,
+                                         force_deletion_types=force_deletion_types)
+    accepted = tracker.submit([rg.name for rg in resource_groups])
+
+    if wait_for_completion and accepted:
+        print(f"\n  ⏳ {accepted}개 리소스 그룹의 삭제 완료를 기다리는 중... (ML 리소스는 시간이 오래 걸릴 수 있습니다)")
+        tracker.wait()
 
     # 결과 요약
     print(f"\n" + "="*60)
     print("📊 ML Workspace 리소스 삭제 작업 완료 요약")
     print("="*60)
-    print(f"✅ 성공: {successful_deletions}개 리소스 그룹")
-    print(f"❌ 실패: {failed_deletions}개 리소스 그룹")
+    if wait_for_completion:
+        failed_deletions = tracker.print_report()
+        print("-"*60)
+        print(f"✅ 삭제 완료: {len(resource_groups) - failed_deletions}개 리소스 그룹")
+        print(f"❌ 실패: {failed_deletions}개 리소스 그룹")
+    else:
+        failed_deletions = len(resource_groups) - accepted
+        print(f"✅ 요청 성공: {accepted}개 리소스 그룹")
+        print(f"❌ 실패: {failed_deletions}개 리소스 그룹")
     print(f"📋 총 처리: {len(resource_groups)}개 리소스 그룹")
-    
-    if not wait_for_completion and successful_deletions > 0:
+
+    if not wait_for_completion and accepted > 0:
         print(f"\n💡 실제 삭제는 백그라운드에서 진행됩니다.")
-        print(f"   Azure Portal에서 진행 상황을 확인할 수 있습니다.")
+        print(f"   --wait 옵션을 사용하면 완료될 때까지 추적합니다.")
         print(f"   ML Workspace와 관련 리소스는 삭제에 시간이 걸릴 수 있습니다.")
+    return failed_deletions
+
+def write_deletion_plan(resource_groups, resources_by_group, out=None):
+    """
+    삭제 계획 파일을 생성 (plan)
+    리소스 그룹마다 내부 리소스 ID와 ETag를 함께 기록해, apply 시점에 변경 여부를 확인할 수 있게 합니다.
+    """
+    if not resource_groups:
+        print("\n패턴과 일치하는 삭제 대상 리소스 그룹을 찾지 못했습니다. 계획 파일을 만들지 않습니다.")
+        return 1
+
+    targets = [resource_group_target(rg, resources_by_group.get(rg.name.lower(), [])) for rg in resource_groups]
+    plan = create_plan(TOOL, SUBSCRIPTION_ID, targets, pattern=PATTERN.pattern,
+                       number_range=[MIN_NUMBER, MAX_NUMBER])
+    path = write_plan(plan, out)
 
-def main():
+    print_deletion_targets(resource_groups, resources_by_group)
+    print(f"\n📝 삭제 계획 저장: {path}")
+    print(f"   리소스 그룹 {plan['counts']['resource_groups']}개, 내부 리소스 {plan['counts']['resources']}개")
+    print(f"   실행: python {os.path.basename(__file__)} apply {path}")
+    return 0
+
+def apply_deletion_plan(credential, resource_client, plan_file, wait_for_completion=False,
+                        poll_interval=POLL_INTERVAL, timeout=None, force_deletion_types=None):
+    """
+    계획 파일을 실행 (apply)
+    대상을 다시 찾지 않고, 계획에 기록된 리소스 그룹만 변경 여부를 확인한 뒤 확인 질문 없이 삭제합니다.
+    계획 이후 리소스가 추가되거나 변경되었으면 아무것도 삭제하지 않고 종료합니다 (반환값 2).
+    """
+    plan, targets = load_plan(plan_file, TOOL, SUBSCRIPTION_ID)
+    print(f"\n📄 계획 파일: {plan_file} (생성: {plan['created_at']}, 리소스 그룹 {len(targets)}개)")
+
+    with metrics.phase("drift_check"):
+        live, gone, drift = check_drift(credential, SUBSCRIPTION_ID, targets)
+    if not print_drift_report(gone, drift):
+        return 2
+    if not live:
+        print("\n계획의 모든 리소스 그룹이 이미 삭제되었습니다.")
+        return 0
+
+    # 확인 화면과 삭제 요약은 계획에 기록된 내부 리소스 목록을 그대로 사용
+    resources_by_group = {
+        target.name.lower(): [ResourceRecord(res["id"], res["name"], res["type"], target.name, res["etag"])
+                              for res in target.resources]
+        for target in live
+    }
+    print_deletion_targets(live, resources_by_group)
+    with metrics.phase("delete"):
+        failed = delete_resource_groups(resource_client, live, resources_by_group, wait_for_completion,
+                                        poll_interval, timeout, force_deletion_types)
+    return 1 if failed else 0
+
+def main(wait_for_completion=False, poll_interval=POLL_INTERVAL, timeout=None, command="run", plan_file=None,
+         out=None, force_vms=False):
     """
     00_RG ~ 25_RG 패턴의 Azure 리소스 그룹과 내부 모든 ML 관련 리소스를 삭제하는 스크립트
+    command: run (조회·확인·삭제) | plan (계획 파일 생성) | apply (계획 파일 실행)
+    force_vms: VM·VM 확장 집합을 강제 삭제하며 리소스 그룹 삭제 (forceDeletionTypes)
     """
+    force_deletion_types = FORCE_DELETION_TYPES if force_vms else None
     try:
         print(f"🔍 삭제 대상 패턴: XX_RG (범위: {MIN_NUMBER:02d}~{MAX_NUMBER:02d})")
         print(f"📝 정규표현식: {PATTERN.pattern} (대소문자 무시)")
@@ -160,29 +251,56 @@ def main():
         
         # 1. Azure 인증 및 리소스 관리 클라이언트 생성
         print(f"\n🔐 Azure 인증 중...")
-        credential = DefaultAzureCredential()
-        resource_client = ResourceManagementClient(credential, SUBSCRIPTION_ID)
+        credential = get_credential()
+        resource_client = get_client_factory().get(ResourceManagementClient, credential, SUBSCRIPTION_ID)
         print(f"✅ 인증 완료")
 
+        if command == "apply":
+            return apply_deletion_plan(credential, resource_client, plan_file, wait_for_completion,
+                                       poll_interval, timeout, force_deletion_types)
+
         # 2. 패턴과 일치하는 리소스 그룹 찾기
-        resource_groups_to_delete = find_matching_resource_groups(resource_client)
+        with metrics.phase("discover"):
+            resource_groups_to_delete = find_matching_resource_groups(resource_client)
+            resources_by_group = collect_resources_by_group(credential, resource_client, resource_groups_to_delete)
+
+        if command == "plan":
+            with metrics.phase("plan"):
+                return write_deletion_plan(resource_groups_to_delete, resources_by_group, out)
 
         # 3. 삭제 확인 (리소스 상세 정보 포함)
-        if not confirm_deletion(resource_groups_to_delete, resource_client):
+        if not confirm_deletion(resource_groups_to_delete, resources_by_group):
             print("\n작업이 사용자에 의해 취소되었습니다.")
-            return
+            return 0
             
         # 4. 삭제 실행
-        # wait_for_completion=True로 설정하면 각 삭제가 완료될 때까지 기다립니다
-        # ML 리소스는 삭제 시간이 오래 걸리므로 False 권장
-        delete_resource_groups(resource_client, resource_groups_to_delete, wait_for_completion=False)
+        # --wait: 모든 삭제를 동시에 요청한 뒤 완료될 때까지 추적합니다 (ML 리소스는 삭제 시간이 오래 걸림)
+        with metrics.phase("delete"):
+            failed = delete_resource_groups(resource_client, resource_groups_to_delete, resources_by_group,
+                                            wait_for_completion, poll_interval, timeout, force_deletion_types)
+        return 1 if failed else 0
 
+    except PlanError as e:
+        print(f"\n❌ {e}")
+        return 1
     except Exception as e:
         print(f"\n❌ 스크립트 실행 중 오류가 발생했습니다: {e}")
         print("💡 다음 사항을 확인해주세요:")
         print("   - 구독 ID가 올바른지 확인")
         print("   - 'az login'을 통해 Azure에 로그인되었는지 확인")
         print("   - 필요한 권한(Contributor 또는 Owner)이 있는지 확인")
+        return 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="XX_RG 패턴의 리소스 그룹과 내부 ML 리소스를 삭제합니다.")
+    add_plan_arguments(parser)
+    add_tracker_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    if args.command == "apply" and not args.plan_file:
+        parser.error("apply 에는 계획 파일 경로가 필요합니다.")
+    exit_code = main(args.wait, args.poll_interval, args.timeout, args.command, args.plan_file, args.out,
+                     args.force_vms)
+    # 측정값 저장 (--metrics-json / --metrics-prom, 또는 IAC_METRICS_JSON / IAC_METRICS_PROM 환경변수)
+    metrics.export(args.metrics_json, args.metrics_prom)
+    sys.exit(exit_code)
\ No newline at end of file
@@ -1,258 +1,196 @@
 import os
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
+from azure_credentials import get_credential
 from azure.mgmt.resource import ResourceManagementClient
 from azure.mgmt.compute import ComputeManagementClient
 from azure.mgmt.network import NetworkManagementClient
 from azure.mgmt.storage import StorageManagementClient
-from azure.mgmt.machinelearningservices import AzureMachineLearningWorkspaces
+from azure.mgmt.machinelearningservices import MachineLearningServicesMgmtClient
 import time
 import asyncio
+import argparse
+import threading
 from concurrent.futures import ThreadPoolExecutor
+from run_journal import RunJournal, PENDING, SUBMITTED, DONE, FAILED
+from azure_clients import get_client_factory
+from rg_delete_tracker import FORCE_DELETION_TYPES
+from teardown_graph import TeardownGraph, MAX_WORKERS
+from arm_throttling import enable_write_rate_limit, WRITE_RATE, WRITE_BURST
+from iac_common import format_duration, positive_float, positive_int
+from rg_role_assignments import snapshot_role_assignments, restore_role_assignments
+from iac_metrics import metrics, add_metrics_arguments
 
 # 환경변수 로드
 load_dotenv()
 
+# 실행 저널: <cache dir>/journals/delete_vm_resources-rg-<time>.jsonl (--resume 으로 미완료 리소스 그룹만 재실행)
+JOURNAL_NAME = "delete_vm_resources"
+
+# 처리 방식 (실행 저널의 choice 값)
+CHOICES = {
+    '1': "강제 삭제 (리소스 그룹 유지)",
+    '2': "리소스 그룹 삭제 후 재생성",
+    '3': "빠른 삭제: VM 강제 삭제 옵션으로 리소스 그룹 삭제 후 재생성 (실패 시 1번 방식)",
+}
+
+# 리소스 종류별 삭제 LRO 최대 대기 시간(초)
+DELETE_TIMEOUTS = {
+    "ml_workspace": 1200,
+    "vm": 600,
+    "nic": 300,
+    "nsg": 600,
+    "public_ip": 300,
+    "vnet": 300,
+    "disk": 300,
+    "default": 300,
+}
+
+# 나머지 리소스 삭제용 리소스 타입별 API 버전 매핑
+GENERIC_API_VERSIONS = {
+    'Microsoft.OperationalInsights/workspaces': '2023-09-01',
+    'Microsoft.KeyVault/vaults': '2024-11-01', 
+    'Microsoft.Insights/components': '2020-02-02',
+    'Microsoft.Search/searchServices': '2025-05-01',
+    # 기본값
+    'default': '2021-04-01'
+}
+
+# --parallel 모드에서 진행 상황을 출력하는 주기(초)
+PROGRESS_INTERVAL = 30
+
+# 삭제 후 리소스 목록이 비워질 때까지 확인하는 최대 시간과 간격(초) (목록 반영 지연)
+FINAL_CHECK_TIMEOUT = 60
+FINAL_CHECK_INTERVAL = 5
+
+def _list_or_empty(label, list_call):
+    """목록 조회. 실패하면 메시지를 출력하고 빈 목록을 반환"""
+    try:
+        return list(list_call())
+    except Exception as e:
+        print(f"{label} 목록 조회 실패: {str(e)}")
+        return []
+
+def _vnet_id(subnet_id):
+    # 서브넷 ID: .../virtualNetworks/{vnet}/subnets/{subnet} → 서브넷은 VNet 과 함께 삭제되므로 VNet 에 연결
+    return subnet_id[:subnet_id.lower().index("/subnets/")] if "/subnets/" in subnet_id.lower() else subnet_id
+
+def build_teardown_graph(clients, resource_group_name):
+    """
+    리소스 그룹의 리소스와 리소스 간 참조(의존성)를 조회해 TeardownGraph 를 만듭니다.
+    ML Workspace → 스토리지/키 자격 증명 모음/App Insights/ACR, VM → NIC/디스크,
+    NIC → NSG/공용 IP/서브넷(VNet), 서브넷 → NSG: 참조하는 쪽이 먼저 삭제됩니다.
+    """
+    resource_client, compute_client, network_client, storage_client, ml_client = clients
+    rg = resource_group_name
+
+    # 목록 조회는 서로 독립적이므로 동시에 실행
+    listings = {
+        "ML Workspace": lambda: ml_client.workspaces.list_by_resource_group(rg),
+        "VM": lambda: compute_client.virtual_machines.list(rg),
+        "SSH 키": lambda: compute_client.ssh_public_keys.list_by_resource_group(rg),
+        "NIC": lambda: network_client.network_interfaces.list(rg),
+        "NSG": lambda: network_client.network_security_groups.list(rg),
+        "Public IP": lambda: network_client.public_ip_addresses.list(rg),
+        "VNet": lambda: network_client.virtual_networks.list(rg),
+        "디스크": lambda: compute_client.disks.list_by_resource_group(rg),
+        "스토리지 계정": lambda: storage_client.storage_accounts.list_by_resource_group(rg),
+        "리소스": lambda: resource_client.resources.list_by_resource_group(rg),
+    }
+    with ThreadPoolExecutor(max_workers=len(listings)) as executor:
+        found = dict(zip(listings, executor.map(lambda item: _list_or_empty(*item), listings.items())))
+
+    graph = TeardownGraph()
+    for ws in found["ML Workspace"]:
+        graph.add(ws.id, ws.name, "ml_workspace",
+                  lambda name=ws.name: ml_client.workspaces.begin_delete(rg, name),
+                  references=[ws.storage_account, ws.key_vault, ws.application_insights, ws.container_registry],
+                  timeout=DELETE_TIMEOUTS["ml_workspace"])
+    for vm in found["VM"]:
+        references = [nic.id for nic in (vm.network_profile.network_interfaces if vm.network_profile else None) or []]
+        if vm.storage_profile:
+            disks = [vm.storage_profile.os_disk] + list(vm.storage_profile.data_disks or [])
+            references += [disk.managed_disk.id for disk in disks if disk is not None and disk.managed_disk]
+        graph.add(vm.id, vm.name, "vm",
+                  lambda name=vm.name: compute_client.virtual_machines.begin_delete(rg, name, force_deletion=True),
+                  references=references, timeout=DELETE_TIMEOUTS["vm"])
+    for ssh_key in found["SSH 키"]:
+        graph.add(ssh_key.id, ssh_key.name, "ssh_key",
+                  lambda name=ssh_key.name: compute_client.ssh_public_keys.delete(rg, name))
+    for nic in found["NIC"]:
+        references = [nic.network_security_group.id if nic.network_security_group else None]
+        for ip_config in nic.ip_configurations or []:
+            references.append(_vnet_id(ip_config.subnet.id) if ip_config.subnet else None)
+            references.append(ip_config.public_ip_address.id if ip_config.public_ip_address else None)
+        graph.add(nic.id, nic.name, "nic", lambda name=nic.name: network_client.network_interfaces.begin_delete(rg, name),
+                  references=references, timeout=DELETE_TIMEOUTS["nic"])
+    for nsg in found["NSG"]:
+        graph.add(nsg.id, nsg.name, "nsg",
+                  lambda name=nsg.name: network_client.network_security_groups.begin_delete(rg, name),
+                  timeout=DELETE_TIMEOUTS["nsg"])
+    for pip in found["Public IP"]:
+        graph.add(pip.id, pip.name, "public_ip",
+                  lambda name=pip.name: network_client.public_ip_addresses.begin_delete(rg, name),
+                  timeout=DELETE_TIMEOUTS["public_ip"])
+    for vnet in found["VNet"]:
+        # 서브넷에 연결된 NSG 는 VNet(서브넷) 삭제 후에 삭제 가능
+        references = [subnet.network_security_group.id for subnet in vnet.subnets or [] if subnet.network_security_group]
+        graph.add(vnet.id, vnet.name, "vnet", lambda name=vnet.name: network_client.virtual_networks.begin_delete(rg, name),
+                  references=references, timeout=DELETE_TIMEOUTS["vnet"])
+    for disk in found["디스크"]:
+        graph.add(disk.id, disk.name, "disk", lambda name=disk.name: compute_client.disks.begin_delete(rg, name),
+                  timeout=DELETE_TIMEOUTS["disk"])
+    for sa in found["스토리지 계정"]:
+        graph.add(sa.id, sa.name, "storage", lambda name=sa.name: storage_client.storage_accounts.delete(rg, name))
+    # 나머지 리소스 (위에서 추가된 리소스는 add 가 무시, VM 확장 같은 하위 리소스는 상위 리소스와 함께 삭제됨)
+    for resource in found["리소스"]:
+        if resource.id.rsplit('/', 2)[0].lower() in graph.nodes:
+            continue
+        api_version = GENERIC_API_VERSIONS.get(resource.type, GENERIC_API_VERSIONS['default'])
+        graph.add(resource.id, resource.name, resource.type.split('/')[-1],
+                  lambda resource_id=resource.id, api_version=api_version:
+                      resource_client.resources.begin_delete_by_id(resource_id, api_version=api_version),
+                  timeout=DELETE_TIMEOUTS["default"])
+    return graph
+
+def wait_until_empty(resource_client, resource_group_name, timeout=FINAL_CHECK_TIMEOUT):
+    """리소스 목록이 비워질 때까지(목록 반영 지연 고려) 확인. 남은 리소스 목록을 반환"""
+    deadline = time.time() + timeout
+    while True:
+        remaining = list(resource_client.resources.list_by_resource_group(resource_group_name))
+        if not remaining or time.time() >= deadline:
+            return remaining
+        time.sleep(FINAL_CHECK_INTERVAL)
+
 def force_delete_resources_in_resource_group(subscription_id, resource_group_name):
     """
     강제로 리소스 그룹 내의 모든 리소스를 삭제합니다.
-    더 적극적인 삭제 방법을 사용합니다.
+    리소스 간 참조로 의존성 그래프를 만들고, 참조하는 리소스가 모두 삭제된 리소스부터 동시에 삭제합니다.
     """
     try:
-        # Azure 인증
-        credential = DefaultAzureCredential()
-        resource_client = ResourceManagementClient(credential, subscription_id)
-        compute_client = ComputeManagementClient(credential, subscription_id)
-        network_client = NetworkManagementClient(credential, subscription_id)
-        storage_client = StorageManagementClient(credential, subscription_id)
-        ml_client = AzureMachineLearningWorkspaces(credential, subscription_id)
+        # Azure 인증 (클라이언트는 리소스 그룹마다 새로 만들지 않고 공용 팩토리에서 재사용)
+        credential = get_credential()
+        clients = get_client_factory(pool_size=MAX_WORKERS)
+        resource_client = clients.get(ResourceManagementClient, credential, subscription_id)
+        compute_client = clients.get(ComputeManagementClient, credential, subscription_id)
+        network_client = clients.get(NetworkManagementClient, credential, subscription_id)
+        storage_client = clients.get(StorageManagementClient, credential, subscription_id)
+        ml_client = clients.get(MachineLearningServicesMgmtClient, credential, subscription_id)
         
         print(f"리소스 그룹 '{resource_group_name}'의 리소스 강제 삭제 시작...")
         
-        # 0. ML Workspace 먼저 삭제 (의존성 때문에)
-        try:
-            print("ML Workspace 삭제 중...")
-            workspaces = list(ml_client.workspaces.list_by_resource_group(resource_group_name))
-            for workspace in workspaces:
-                print(f"ML Workspace 삭제: {workspace.name}")
-                try:
-                    # ML Workspace 삭제 (간단한 방법)
-                    delete_op = ml_client.workspaces.begin_delete(
-                        resource_group_name, workspace.name
-                    )
-                    delete_op.wait(timeout=1200)  # 20분 대기
-                    print(f"  ✓ ML Workspace 삭제 완료: {workspace.name}")
-                except Exception as e:
-                    print(f"  ✗ ML Workspace 삭제 실패: {workspace.name} - {str(e)}")
-                    # 강제 삭제 시도
-                    try:
-                        print(f"  ML Workspace {workspace.name} 강제 삭제 시도...")
-                        time.sleep(120)  # 2분 대기
-                        delete_op = ml_client.workspaces.begin_delete(
-                            resource_group_name, workspace.name
-                        )
-                        delete_op.wait(timeout=1800)  # 30분 대기
-                        print(f"  ✓ ML Workspace 강제 삭제 완료: {workspace.name}")
-                    except Exception as e2:
-                        print(f"  ✗ ML Workspace 강제 삭제 실패: {workspace.name} - {str(e2)}")
-        except Exception as e:
-            print(f"ML Workspace 처리 중 오류: {str(e)}")
-        
-        # 1. VM 먼저 강제 삭제
-        try:
-            vms = list(compute_client.virtual_machines.list(resource_group_name))
-            for vm in vms:
-                print(f"VM 강제 삭제: {vm.name}")
-                try:
-                    delete_op = compute_client.virtual_machines.begin_delete(
-                        resource_group_name, vm.name, force_deletion=True
-                    )
-                    delete_op.wait(timeout=600)  # 10분 대기
-                    print(f"  ✓ VM 삭제 완료: {vm.name}")
-                except Exception as e:
-                    print(f"  ✗ VM 삭제 실패: {vm.name} - {str(e)}")
-        except Exception as e:
-            print(f"VM 목록 조회 실패: {str(e)}")
+        with metrics.phase("build_graph"):
+            graph = build_teardown_graph(
+                (resource_client, compute_client, network_client, storage_client, ml_client), resource_group_name)
+        print(f"삭제 대상 {len(graph.nodes)}개 (의존성 단계별):")
+        graph.print_plan()
         
-        # 2. SSH 키 먼저 삭제 (의존성 해결)
-        try:
-            ssh_keys = list(compute_client.ssh_public_keys.list_by_resource_group(resource_group_name))
-            for ssh_key in ssh_keys:
-                print(f"SSH 키 삭제: {ssh_key.name}")
-                try:
-                    compute_client.ssh_public_keys.delete(resource_group_name, ssh_key.name)
-                    print(f"  ✓ SSH 키 삭제 완료: {ssh_key.name}")
-                except Exception as e:
-                    print(f"  ✗ SSH 키 삭제 실패: {ssh_key.name} - {str(e)}")
-        except Exception as e:
-            print(f"SSH 키 처리 중 오류: {str(e)}")
+        with metrics.phase("teardown"):
+            graph.run()
+        if graph.print_report():
+            print("⚠️  삭제되지 않은 리소스가 있습니다.")
         
-        # 3. 네트워크 인터페이스 먼저 삭제 (NSG 의존성 해결)
-        try:
-            print("네트워크 인터페이스 삭제 중...")
-            nics = list(network_client.network_interfaces.list(resource_group_name))
-            for nic in nics:
-                print(f"NIC 삭제: {nic.name}")
-                try:
-                    # NIC에서 NSG 연결 해제
-                    if hasattr(nic, 'network_security_group') and nic.network_security_group:
-                        print(f"  NIC {nic.name}에서 NSG 연결 해제 중...")
-                        nic.network_security_group = None
-                        network_client.network_interfaces.begin_create_or_update(
-                            resource_group_name, nic.name, nic
-                        ).wait()
-                        time.sleep(10)  # 연결 해제 대기
-                    
-                    delete_op = network_client.network_interfaces.begin_delete(
-                        resource_group_name, nic.name
-                    )
-                    delete_op.wait(timeout=300)
-                    print(f"  ✓ NIC 삭제 완료: {nic.name}")
-                except Exception as e:
-                    print(f"  ✗ NIC 삭제 실패: {nic.name} - {str(e)}")
-        except Exception as e:
-            print(f"네트워크 인터페이스 처리 중 오류: {str(e)}")
-        
-        # 4. 네트워크 보안 그룹 강제 삭제
-        try:
-            print("네트워크 보안 그룹 삭제 중...")
-            time.sleep(30)  # NIC 삭제 완료 대기
-            
-            nsgs = list(network_client.network_security_groups.list(resource_group_name))
-            for nsg in nsgs:
-                print(f"NSG 강제 삭제: {nsg.name}")
-                try:
-                    # NSG의 모든 규칙 삭제
-                    if hasattr(nsg, 'security_rules'):
-                        for rule in nsg.security_rules:
-                            try:
-                                network_client.security_rules.begin_delete(
-                                    resource_group_name, nsg.name, rule.name
-                                ).wait()
-                            except:
-                                pass
-                    
-                    # NSG 삭제
-                    delete_op = network_client.network_security_groups.begin_delete(
-                        resource_group_name, nsg.name
-                    )
-                    delete_op.wait(timeout=600)  # 10분 대기
-                    print(f"  ✓ NSG 삭제 완료: {nsg.name}")
-                except Exception as e:
-                    print(f"  ✗ NSG 삭제 실패: {nsg.name} - {str(e)}")
-                    # 재시도
-                    try:
-                        print(f"  NSG {nsg.name} 재시도 중...")
-                        time.sleep(60)  # 1분 대기 후 재시도
-                        delete_op = network_client.network_security_groups.begin_delete(
-                            resource_group_name, nsg.name
-                        )
-                        delete_op.wait(timeout=600)
-                        print(f"  ✓ NSG 재시도 성공: {nsg.name}")
-                    except Exception as e2:
-                        print(f"  ✗ NSG 재시도 실패: {nsg.name} - {str(e2)}")
-        except Exception as e:
-            print(f"네트워크 보안 그룹 처리 중 오류: {str(e)}")
-        
-        # 5. 나머지 네트워크 리소스 삭제
-        try:
-            # Public IP Addresses
-            public_ips = list(network_client.public_ip_addresses.list(resource_group_name))
-            for pip in public_ips:
-                print(f"Public IP 삭제: {pip.name}")
-                try:
-                    delete_op = network_client.public_ip_addresses.begin_delete(
-                        resource_group_name, pip.name
-                    )
-                    delete_op.wait(timeout=300)
-                    print(f"  ✓ Public IP 삭제 완료: {pip.name}")
-                except Exception as e:
-                    print(f"  ✗ Public IP 삭제 실패: {pip.name} - {str(e)}")
-            
-            # Virtual Networks
-            vnets = list(network_client.virtual_networks.list(resource_group_name))
-            for vnet in vnets:
-                print(f"VNet 삭제: {vnet.name}")
-                try:
-                    delete_op = network_client.virtual_networks.begin_delete(
-                        resource_group_name, vnet.name
-                    )
-                    delete_op.wait(timeout=300)
-                    print(f"  ✓ VNet 삭제 완료: {vnet.name}")
-                except Exception as e:
-                    print(f"  ✗ VNet 삭제 실패: {vnet.name} - {str(e)}")
-        except Exception as e:
-            print(f"네트워크 리소스 처리 중 오류: {str(e)}")
-        
-        # 3. 디스크 강제 삭제
-        try:
-            disks = list(compute_client.disks.list_by_resource_group(resource_group_name))
-            for disk in disks:
-                print(f"디스크 강제 삭제: {disk.name}")
-                try:
-                    delete_op = compute_client.disks.begin_delete(
-                        resource_group_name, disk.name
-                    )
-                    delete_op.wait(timeout=300)
-                    print(f"  ✓ 디스크 삭제 완료: {disk.name}")
-                except Exception as e:
-                    print(f"  ✗ 디스크 삭제 실패: {disk.name} - {str(e)}")
-        except Exception as e:
-            print(f"디스크 처리 중 오류: {str(e)}")
-        
-        # 4. 스토리지 계정 삭제
-        try:
-            storage_accounts = list(storage_client.storage_accounts.list_by_resource_group(resource_group_name))
-            for sa in storage_accounts:
-                print(f"스토리지 계정 삭제: {sa.name}")
-                try:
-                    storage_client.storage_accounts.delete(resource_group_name, sa.name)
-                    print(f"  ✓ 스토리지 계정 삭제 완료: {sa.name}")
-                except Exception as e:
-                    print(f"  ✗ 스토리지 계정 삭제 실패: {sa.name} - {str(e)}")
-        except Exception as e:
-            print(f"스토리지 계정 처리 중 오류: {str(e)}")
-        
-        # 5. 남은 리소스 일반 삭제
-        print(f"남은 리소스 확인 및 삭제...")
-        
-        # 리소스 타입별 API 버전 매핑
-        API_VERSIONS = {
-            'Microsoft.OperationalInsights/workspaces': '2023-09-01',
-            'Microsoft.KeyVault/vaults': '2024-11-01', 
-            'Microsoft.Insights/components': '2020-02-02',
-            'Microsoft.Search/searchServices': '2025-05-01',
-            # 기본값
-            'default': '2021-04-01'
-        }
-        
-        resources = list(resource_client.resources.list_by_resource_group(resource_group_name))
-        
-        for resource in resources:
-            print(f"남은 리소스 삭제: {resource.name} ({resource.type})")
-            try:
-                resource_provider = resource.type.split('/')[0]
-                resource_type = '/'.join(resource.type.split('/')[1:])
-                
-                # 리소스 타입에 따른 적절한 API 버전 선택
-                api_version = API_VERSIONS.get(resource.type, API_VERSIONS['default'])
-                
-                delete_operation = resource_client.resources.begin_delete(
-                    resource_group_name=resource_group_name,
-                    resource_provider_namespace=resource_provider,
-                    parent_resource_path='',
-                    resource_type=resource_type,
-                    resource_name=resource.name,
-                    api_version=api_version
-                )
-                delete_operation.wait(timeout=300)
-                print(f"  ✓ 삭제 완료: {resource.name}")
-            except Exception as e:
-                print(f"  ✗ 삭제 실패: {resource.name} - {str(e)}")
-        
-        # 6. 최종 확인
-        time.sleep(10)  # 전파 대기
-        final_resources = list(resource_client.resources.list_by_resource_group(resource_group_name))
+        # 최종 확인
+        final_resources = wait_until_empty(resource_client, resource_group_name)
         
         if final_resources:
             print(f"⚠️  여전히 {len(final_resources)}개의 리소스가 남아있습니다:")
@@ -267,42 +205,214 @@ def force_delete_resources_in_resource_group(subscription_id, resource_group_nam
         print(f"❌ 리소스 그룹 '{resource_group_name}' 처리 중 오류: {str(e)}")
         return False
 
-def alternative_delete_entire_resource_group(subscription_id, resource_group_name):
+def alternative_delete_entire_resource_group(subscription_id, resource_group_name, journal=None, resume_entry=None,
+                                             force_deletion_types=None):
     """
     대안: 리소스 그룹 전체를 삭제한 후 다시 생성
+    삭제 전에 리소스 그룹 범위의 역할 할당(Terraform user_rg_roles 등)을 스냅샷으로 저장하고,
+    재생성 직후 같은 이름(GUID)으로 동시에 다시 만들어 terraform apply 없이 권한을 복원합니다.
+    resume_entry 에 이전 실행의 continuation token 이 있으면 삭제를 다시 요청하지 않고 진행 중인 LRO 에 재연결합니다.
+    이전 실행에서 삭제는 끝났지만 재생성이 실패해 그룹이 없으면, 저장한 위치/태그/역할 할당으로 재생성과 복원만 진행합니다.
+    force_deletion_types 가 있으면 해당 타입(VM 등)을 강제 삭제하도록 요청합니다 (ARM forceDeletionTypes).
     """
     try:
-        credential = DefaultAzureCredential()
-        resource_client = ResourceManagementClient(credential, subscription_id)
-        
-        # 리소스 그룹 정보 가져오기
-        rg_info = resource_client.resource_groups.get(resource_group_name)
-        location = rg_info.location
-        tags = rg_info.tags
+        credential = get_credential()
+        resource_client = get_client_factory().get(ResourceManagementClient, credential, subscription_id)
+        # 이전 실행에서 저장한 스냅샷이 있으면 그대로 사용 (그 사이 일부만 복원된 상태를 다시 찍지 않도록)
+        role_assignments = resume_entry.get("role_assignments") if resume_entry is not None else None
         
-        print(f"리소스 그룹 '{resource_group_name}' 전체 삭제 후 재생성...")
-        
-        # 리소스 그룹 전체 삭제
-        delete_op = resource_client.resource_groups.begin_delete(resource_group_name)
-        delete_op.wait(timeout=1200)  # 20분 대기
-        
-        # 리소스 그룹 재생성
-        resource_client.resource_groups.create_or_update(
-            resource_group_name,
-            {
-                'location': location,
-                'tags': tags
-            }
-        )
+        # 실패로 끝난 삭제는 재연결하지 않고 새로 요청
+        in_flight = resume_entry is not None and resume_entry["state"] == SUBMITTED
+        continuation_token = resume_entry.get("continuation_token") if in_flight else None
+        recreate = True
+        if resume_entry is not None and resume_entry.get("recreated") and role_assignments:
+            # 재생성까지 끝났고 역할 할당 복원만 실패한 경우: 복원만 다시 시도
+            print(f"리소스 그룹 '{resource_group_name}' 역할 할당 복원 재시도...")
+            delete_op = None
+            recreate = False
+        elif continuation_token:
+            # 이전 실행에서 저장한 위치/태그로 재생성
+            location = resume_entry["location"]
+            tags = resume_entry.get("tags")
+            print(f"리소스 그룹 '{resource_group_name}' 진행 중인 삭제에 재연결...")
+            delete_op = resource_client.resource_groups.begin_delete(
+                resource_group_name, continuation_token=continuation_token
+            )
+        elif resume_entry is not None and resume_entry.get("location") and \
+                not resource_client.resource_groups.check_existence(resource_group_name):
+            # 삭제는 끝났지만 재생성 전에 실패한 경우: 저장한 위치/태그로 재생성만 진행
+            location = resume_entry["location"]
+            tags = resume_entry.get("tags")
+            print(f"리소스 그룹 '{resource_group_name}'은 이미 삭제되었습니다. 저장한 위치/태그로 재생성...")
+            delete_op = None
+        else:
+            # 리소스 그룹 정보 가져오기
+            rg_info = resource_client.resource_groups.get(resource_group_name)
+            location = rg_info.location
+            tags = rg_info.tags
+            if role_assignments is None:
+                role_assignments = snapshot_role_assignments(credential, subscription_id, resource_group_name)
+            print(f"역할 할당 {len(role_assignments)}개 저장")
+            
+            print(f"리소스 그룹 '{resource_group_name}' 전체 삭제 후 재생성...")
+            
+            # 리소스 그룹 전체 삭제
+            delete_op = resource_client.resource_groups.begin_delete(resource_group_name,
+                                                                     force_deletion_types=force_deletion_types)
+            if journal is not None:
+                journal.record(resource_group_name.lower(), SUBMITTED, continuation_token=delete_op.continuation_token(),
+                               location=location, tags=tags, role_assignments=role_assignments)
+        if delete_op is not None:
+            delete_op.wait(timeout=1200)  # 20분 대기
+        if recreate:
+            # 리소스 그룹 재생성
+            resource_client.resource_groups.create_or_update(
+                resource_group_name,
+                {
+                    'location': location,
+                    'tags': tags
+                }
+            )
+            if journal is not None:
+                journal.record(resource_group_name.lower(), SUBMITTED, recreated=True)
+            
+            print(f"✅ 리소스 그룹 '{resource_group_name}' 재생성 완료")
         
-        print(f"✅ 리소스 그룹 '{resource_group_name}' 재생성 완료")
+        # 역할 할당 복원
+        if role_assignments:
+            failures = restore_role_assignments(credential, subscription_id, resource_group_name, role_assignments)
+            print(f"✅ 역할 할당 {len(role_assignments) - len(failures)}/{len(role_assignments)}개 복원")
+            for assignment, error in failures:
+                print(f"  ✗ 역할 할당 복원 실패: {assignment['principal_id']} ({assignment['role_definition_id'].split('/')[-1]}) - {error}")
+            if failures:
+                return False
         return True
         
     except Exception as e:
         print(f"❌ 리소스 그룹 '{resource_group_name}' 재생성 실패: {str(e)}")
         return False
 
-def main():
+def fast_delete_resource_group(subscription_id, resource_group_name, journal=None, resume_entry=None):
+    """
+    빠른 삭제: VM·VM 확장 집합을 강제 삭제하도록 요청한 리소스 그룹 삭제 LRO 하나로 내부 리소스를 모두 정리하고,
+    리소스 그룹을 같은 위치/태그로 다시 생성합니다 (리소스 단위 삭제의 순서 조정·대기가 필요 없음).
+    리소스 그룹 삭제가 실패해 그룹과 리소스가 남아 있을 때만 리소스 단위 강제 삭제(1번 방식)로 대체합니다.
+    """
+    if alternative_delete_entire_resource_group(subscription_id, resource_group_name, journal, resume_entry,
+                                                force_deletion_types=FORCE_DELETION_TYPES):
+        return True
+
+    try:
+        resource_client = get_client_factory().get(ResourceManagementClient, get_credential(), subscription_id)
+        if not resource_client.resource_groups.check_existence(resource_group_name):
+            # 그룹이 없음 (삭제 후 재생성만 실패한 경우 포함): 리소스 단위 삭제로 대체할 대상이 없음
+            print(f"⚠️  리소스 그룹 '{resource_group_name}'이 없습니다. 삭제 후 재생성에 실패했다면 "
+                  f"--resume 으로 재생성과 역할 할당 복원을 다시 시도하세요.")
+            return False
+        rg_info = resource_client.resource_groups.get(resource_group_name)
+    except Exception as e:
+        print(f"❌ 리소스 그룹 '{resource_group_name}' 상태 확인 실패, 대체 삭제를 건너뜁니다: {str(e)}")
+        return False
+
+    state = rg_info.properties.provisioning_state if rg_info.properties else None
+    if state == "Deleting":
+        print(f"⚠️  리소스 그룹 '{resource_group_name}' 삭제가 아직 진행 중입니다. --resume 으로 다시 확인하세요.")
+        return False
+
+    if next(iter(resource_client.resources.list_by_resource_group(resource_group_name)), None) is None:
+        # 재생성까지 끝나고 역할 할당 복원만 실패한 경우: --resume 으로 복원만 다시 시도
+        print(f"⚠️  리소스 그룹 '{resource_group_name}'은 비어 있어 리소스 단위 삭제가 필요 없습니다.")
+        return False
+
+    print(f"빠른 삭제 실패, 리소스 단위 강제 삭제로 대체: {resource_group_name}")
+    return force_delete_resources_in_resource_group(subscription_id, resource_group_name)
+
+def process_resource_group(subscription_id, rg_name, choice, journal, resume_entry=None):
+    """선택한 방식으로 리소스 그룹 하나를 처리하고 저널에 결과를 기록. 반환값: 성공 여부"""
+    if choice == '1':
+        # 리소스 단위 삭제는 매번 남은 리소스를 다시 조회하므로, 재개 시 이미 삭제된 리소스는 건너뜁니다.
+        journal.record(rg_name.lower(), SUBMITTED)
+        with metrics.timed("force_delete_resource_group"):
+            success = force_delete_resources_in_resource_group(subscription_id, rg_name)
+    elif choice == '3':
+        with metrics.timed("fast_delete_resource_group"):
+            success = fast_delete_resource_group(subscription_id, rg_name, journal, resume_entry)
+    else:
+        with metrics.timed("recreate_resource_group"):
+            success = alternative_delete_entire_resource_group(subscription_id, rg_name, journal, resume_entry)
+    
+    journal.record(rg_name.lower(), DONE if success else FAILED)
+    return success
+
+class GroupProgress:
+    """--parallel 모드의 리소스 그룹별 진행 상황 (대기/진행 중/성공/실패, 소요 시간)"""
+
+    def __init__(self, resource_groups):
+        self.started = time.time()
+        self.states = {rg: ("대기", None, None) for rg in resource_groups}
+        self._lock = threading.Lock()
+
+    def start(self, rg_name):
+        with self._lock:
+            self.states[rg_name] = ("진행 중", time.time(), None)
+
+    def finish(self, rg_name, success):
+        with self._lock:
+            _, started, _ = self.states[rg_name]
+            self.states[rg_name] = ("성공" if success else "실패", started, time.time())
+        self.print_line()
+
+    def print_line(self):
+        with self._lock:
+            counts = {}
+            for state, _, _ in self.states.values():
+                counts[state] = counts.get(state, 0) + 1
+        print(f"📊 [진행 상황] 성공 {counts.get('성공', 0)} | 실패 {counts.get('실패', 0)} | "
+              f"진행 중 {counts.get('진행 중', 0)} | 대기 {counts.get('대기', 0)} / {len(self.states)} "
+              f"| 경과 {format_duration(time.time() - self.started)}", flush=True)
+
+    def print_table(self):
+        for rg_name, (state, started, finished) in self.states.items():
+            duration = f" ({format_duration(finished - started)})" if started and finished else ""
+            print(f"  {'✅' if state == '성공' else '❌' if state == '실패' else '⏳'} {rg_name:<20} {state}{duration}")
+
+def process_in_parallel(subscription_id, resource_groups, choice, journal, resume_entries, parallel):
+    """
+    리소스 그룹 여러 개를 동시에 처리 (리소스 그룹 사이 대기 없음)
+    모든 쓰기 요청은 공용 쓰기 속도 제한(arm_throttling.WriteRateLimiter)을 함께 사용합니다.
+    반환값: 성공한 리소스 그룹 수
+    """
+    progress = GroupProgress(resource_groups)
+    stop = threading.Event()
+
+    def _report_periodically():
+        while not stop.wait(PROGRESS_INTERVAL):
+            progress.print_line()
+
+    def _process(rg_name):
+        progress.start(rg_name)
+        try:
+            success = process_resource_group(subscription_id, rg_name, choice, journal, resume_entries.get(rg_name))
+        except Exception as e:
+            print(f"❌ 리소스 그룹 '{rg_name}' 처리 중 오류: {str(e)}")
+            journal.record(rg_name.lower(), FAILED)
+            success = False
+        progress.finish(rg_name, success)
+        return success
+
+    threading.Thread(target=_report_periodically, daemon=True).start()
+    try:
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            results = list(executor.map(_process, resource_groups))
+    finally:
+        stop.set()
+
+    print(f"\n{'='*60}")
+    print("리소스 그룹별 결과:")
+    progress.print_table()
+    return sum(results)
+
+def main(resume=False, parallel=1, write_rate=WRITE_RATE, write_burst=WRITE_BURST):
     # Azure 구독 ID
     SUBSCRIPTION_ID = os.getenv("AZURE_SUBSCRIPTION_ID") 
     
@@ -317,14 +427,32 @@ def main():
     resource_groups.extend([f"{i:02d}_rg_p" for i in range(4,25)])    
     
     print("=== Azure 리소스 강제 삭제 도구 ===")
-    print("1. 강제 삭제 (리소스 그룹 유지)")
-    print("2. 리소스 그룹 삭제 후 재생성")
     
-    choice = input("\n선택하세요 (1 또는 2): ")
-    
-    if choice not in ['1', '2']:
-        print("잘못된 선택입니다.")
-        return
+    resume_entries = {}
+    if resume:
+        journal = RunJournal.latest(JOURNAL_NAME, "rg")
+        if journal is None:
+            print("재개할 실행 저널이 없습니다.")
+            return
+        run_info, _ = journal.read()
+        choice = run_info["choice"]
+        # 완료되지 않은 리소스 그룹만 (저널에 기록된 순서대로) 다시 처리
+        resume_entries = {entry["resource_group"]: entry for entry in journal.unfinished()}
+        resource_groups = list(resume_entries)
+        print(f"실행 저널: {journal.path}")
+        print(f"이전 실행 재개: {CHOICES[choice]}, 미완료 {len(resource_groups)}개")
+        if not resource_groups:
+            print("모든 리소스 그룹이 이미 처리되었습니다.")
+            return
+    else:
+        for key, description in CHOICES.items():
+            print(f"{key}. {description}")
+        
+        choice = input("\n선택하세요 (1, 2 또는 3): ")
+        
+        if choice not in CHOICES:
+            print("잘못된 선택입니다.")
+            return
     
     print(f"\n다음 리소스 그룹들을 처리합니다:")
     for rg in resource_groups:
@@ -335,35 +463,59 @@ def main():
         print("작업이 취소되었습니다.")
         return
     
+    if not resume:
+        journal = RunJournal.create(JOURNAL_NAME, "rg", choice=choice, subscription=SUBSCRIPTION_ID)
+        for rg_name in resource_groups:
+            journal.record(rg_name.lower(), PENDING, resource_group=rg_name)
+        print(f"실행 저널: {journal.path}")
+    
     successful = 0
-    failed = 0
     
-    for rg_name in resource_groups:
-        print(f"\n{'='*60}")
-        print(f"리소스 그룹 처리 중: {rg_name}")
-        print(f"{'='*60}")
-        
-        if choice == '1':
-            success = force_delete_resources_in_resource_group(SUBSCRIPTION_ID, rg_name)
-        else:
-            success = alternative_delete_entire_resource_group(SUBSCRIPTION_ID, rg_name)
-        
-        if success:
-            successful += 1
-        else:
-            failed += 1
-        
-        # 다음 처리 전 대기
-        if rg_name != resource_groups[-1]:
-            print("다음 리소스 그룹 처리를 위해 15초 대기...")
-            time.sleep(15)
+    if parallel > 1:
+        # 동시에 처리하는 리소스 그룹 수만큼 연결 풀을 늘리고, 쓰기 요청은 구독 단위로 속도를 제한
+        limiter = enable_write_rate_limit(write_rate, write_burst)
+        get_client_factory(pool_size=MAX_WORKERS * parallel)
+        print(f"\n{parallel}개 리소스 그룹씩 동시에 처리합니다 (쓰기 요청 최대 {write_rate:g}/s)")
+        with metrics.phase("process_groups"):
+            successful = process_in_parallel(SUBSCRIPTION_ID, resource_groups, choice, journal, resume_entries,
+                                             parallel)
+        print(limiter.summary())
+    else:
+        for rg_name in resource_groups:
+            print(f"\n{'='*60}")
+            print(f"리소스 그룹 처리 중: {rg_name}")
+            print(f"{'='*60}")
+            
+            if process_resource_group(SUBSCRIPTION_ID, rg_name, choice, journal, resume_entries.get(rg_name)):
+                successful += 1
+            
+            # 다음 처리 전 대기 (빠른 삭제는 리소스 그룹마다 LRO 하나뿐이라 대기하지 않음)
+            if rg_name != resource_groups[-1] and choice != '3':
+                print("다음 리소스 그룹 처리를 위해 15초 대기...")
+                with metrics.phase("wait_between_groups"):
+                    time.sleep(15)
+    journal.close()
+    failed = len(resource_groups) - successful
     
     print(f"\n{'='*60}")
     print("최종 결과:")
     print(f"✅ 성공: {successful}개")
     print(f"❌ 실패: {failed}개")
     print(f"📊 총 처리: {len(resource_groups)}개")
+    print(metrics.summary())
     print(f"{'='*60}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="리소스 그룹 내 리소스 강제 삭제 (또는 리소스 그룹 삭제 후 재생성)")
+    parser.add_argument("--resume", action="store_true",
+                        help="마지막으로 중단된 실행의 미완료 리소스 그룹만 다시 처리 (진행 중인 삭제에는 재연결)")
+    parser.add_argument("--parallel", type=int, default=1, metavar="N",
+                        help="리소스 그룹 N개를 동시에 처리 (기본값: 1, 순서대로 처리하며 사이에 15초 대기)")
+    parser.add_argument("--write-rate", type=positive_float, default=WRITE_RATE,
+                        help=f"--parallel 사용 시 구독 전체의 초당 쓰기 요청 상한 (기본값: {WRITE_RATE:g})")
+    parser.add_argument("--write-burst", type=positive_int, default=WRITE_BURST,
+                        help=f"--parallel 사용 시 한 번에 보낼 수 있는 쓰기 요청 수 (기본값: {WRITE_BURST})")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    main(args.resume, max(1, args.parallel), args.write_rate, args.write_burst)
+    metrics.export(args.metrics_json, args.metrics_prom)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+from collections import namedtuple
+from iac_common import get_cache_dir, run_file_suffix
+
+# --- Configuration ---
+# Where 'plan' writes its file when --out is not given.
+PLAN_DIR = os.getenv("DELETION_PLAN_DIR") or os.path.join(get_cache_dir(), "plans")
+PLAN_VERSION = 1
+# Names/IDs per Resource Graph query in the drift check (keeps each KQL text well under the request size limit).
+DRIFT_QUERY_CHUNK = 200
+
+RESOURCE_GROUP_TYPE = "Microsoft.Resources/resourceGroups"
+
+# One deletion target. 'order' is the dependency stage: every target of a stage is deleted before the next
+# stage starts. 'resources' lists what a resource group contains ({id, name, type, etag}), [] otherwise.
+PlanTarget = namedtuple("PlanTarget", ["id", "name", "type", "order", "location", "etag", "resources"])
+ResourceRecord = namedtuple("ResourceRecord", ["id", "name", "type", "resource_group", "etag"])
+
+
+class PlanError(Exception):
+    """The plan file cannot be applied: unreadable, written by another tool or for another subscription."""
+
+
+def resource_group_target(resource_group, resources: list) -> PlanTarget:
+    """Plan target for a resource group (an ARM ResourceGroup model) and the ResourceRecords it holds."""
+    return PlanTarget(resource_group.id, resource_group.name, RESOURCE_GROUP_TYPE, 0, resource_group.location, None,
+                      [{"id": res.id, "name": res.name, "type": res.type, "etag": res.etag} for res in resources])
+
+
+def resource_target(resource, order: int) -> PlanTarget:
+    """Plan target for a single resource (an ARM GenericResource model)."""
+    return PlanTarget(resource.id, resource.name, resource.type, order, resource.location,
+                      getattr(resource, "etag", None), [])
+
+
+def create_plan(tool: str, subscription_id: str, targets: list, **details) -> dict:
+    targets = sorted(targets, key=lambda t: (t.order, t.name.lower()))
+    stages = {}
+    for target in targets:
+        stages[str(target.order)] = stages.get(str(target.order), 0) + 1
+    return {
+        "version": PLAN_VERSION,
+        "tool": tool,
+        "subscription_id": subscription_id,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "details": details,
+        "counts": {
+            "targets": len(targets),
+            "resource_groups": sum(1 for t in targets if t.type == RESOURCE_GROUP_TYPE),
+            "resources": sum(len(t.resources) if t.type == RESOURCE_GROUP_TYPE else 1 for t in targets),
+            "by_order": stages,
+        },
+        "targets": [target._asdict() for target in targets],
+    }
+
+
+def write_plan(plan: dict, path: str = None) -> str:
+    """Writes the plan (atomically) and returns its path. Default: <cache dir>/plans/<tool>-<time>.json."""
+    if path is None:
+        path = os.path.join(PLAN_DIR, f"{plan['tool']}-{run_file_suffix()}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_plan(path: str, tool: str, subscription_id: str) -> tuple:
+    """Returns (plan, [PlanTarget] in dependency order). Raises PlanError if the plan does not belong here."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            plan = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PlanError(f"계획 파일을 읽을 수 없습니다: {path} ({e})")
+    if plan.get("version") != PLAN_VERSION:
+        raise PlanError(f"지원하지 않는 계획 파일 버전입니다: {plan.get('version')}")
+    if plan.get("tool") != tool:
+        raise PlanError(f"'{plan.get('tool')}' 용 계획 파일입니다 (현재 도구: {tool}).")
+    if (plan.get("subscription_id") or "").lower() != (subscription_id or "").lower():
+        raise PlanError(f"다른 구독({plan.get('subscription_id')})의 계획 파일입니다.")
+    targets = [PlanTarget(**target) for target in plan["targets"]]
+    return plan, sorted(targets, key=lambda t: (t.order, t.name.lower()))
+
+
+def _kql_list(values: list) -> str:
+    return "(" + ", ".join(f"'{value}'" for value in values) + ")"
+
+
+def _chunks(values: list):
+    for start in range(0, len(values), DRIFT_QUERY_CHUNK):
+        yield values[start:start + DRIFT_QUERY_CHUNK]
+
+
+def list_group_resources(credential, subscription_id: str, group_names: list) -> dict:
+    """
+    Every resource of the given resource groups from Resource Graph (one query per DRIFT_QUERY_CHUNK groups).
+    Returns {lowercase group name: [ResourceRecord]}.
+    """
+    from resource_graph import query_resource_graph
+
+    resources_by_group = {name.lower(): [] for name in group_names}
+    for names in _chunks(list(group_names)):
+        query = f"resources | where resourceGroup in~ {_kql_list(names)} | project id, name, type, etag, resourceGroup"
+        for row in query_resource_graph(credential, subscription_id, query):
+            resources_by_group.setdefault(row["resourceGroup"].lower(), []).append(
+                ResourceRecord(row["id"], row["name"], row["type"], row["resourceGroup"], row.get("etag") or None))
+    return resources_by_group
+
+
+def check_drift(credential, subscription_id: str, targets: list) -> tuple:
+    """
+    Compares the plan's targets with their current state, without re-discovering anything: one Resource Graph
+    query per DRIFT_QUERY_CHUNK targets, restricted to the planned names/IDs.
+
+    Returns (live targets, targets already gone, drift messages). Drift means the plan no longer describes what
+    would be deleted: a resource group now holds resources the plan did not list, or an ETag changed.
+    Resources removed since planning and targets already deleted are not drift.
+    """
+    from resource_graph import query_resource_graph
+
+    group_targets = [t for t in targets if t.type == RESOURCE_GROUP_TYPE]
+    resource_targets = [t for t in targets if t.type != RESOURCE_GROUP_TYPE]
+    existing = set()
+    for names in _chunks([t.name for t in group_targets]):
+        query = ("resourcecontainers | where type =~ 'microsoft.resources/subscriptions/resourcegroups' "
+                 f"| where name in~ {_kql_list(names)} | project id, name")
+        existing.update(row["name"].lower() for row in query_resource_graph(credential, subscription_id, query))
+    group_resources = list_group_resources(credential, subscription_id, [t.name for t in group_targets])
+    current = {}  # lowercase id -> row, for single-resource targets
+    for ids in _chunks([t.id for t in resource_targets]):
+        query = f"resources | where id in~ {_kql_list(ids)} | project id, name, type, etag"
+        current.update((row["id"].lower(), row) for row in query_resource_graph(credential, subscription_id, query))
+
+    live, gone, drift = [], [], []
+    for target in group_targets:
+        if target.name.lower() not in existing:
+            gone.append(target)
+            continue
+        live.append(target)
+        planned = {res["id"].lower(): res for res in target.resources}
+        in_group = group_resources.get(target.name.lower(), [])
+        added = [res for res in in_group if res.id.lower() not in planned]
+        if added:
+            names = ", ".join(f"{res.name} [{res.type}]" for res in added[:5])
+            more = f" 외 {len(added) - 5}개" if len(added) > 5 else ""
+            drift.append(f"{target.name}: 계획에 없는 리소스 {len(added)}개 추가됨 ({names}{more})")
+        for res in in_group:
+            planned_etag = planned.get(res.id.lower(), {}).get("etag")
+            if planned_etag and res.etag and planned_etag != res.etag:
+                drift.append(f"{target.name}: '{res.name}' 변경됨 (ETag {planned_etag} → {res.etag})")
+    for target in resource_targets:
+        row = current.get(target.id.lower())
+        if row is None:
+            gone.append(target)
+            continue
+        live.append(target)
+        if target.etag and row.get("etag") and target.etag != row["etag"]:
+            drift.append(f"{target.name}: 변경됨 (ETag {target.etag} → {row['etag']})")
+
+    return sorted(live, key=lambda t: (t.order, t.name.lower())), gone, drift
+
+
+def print_drift_report(gone: list, drift: list) -> bool:
+    """Prints the drift check result. Returns True if the plan can still be applied."""
+    for target in gone:
+        print(f"  ⏭️  이미 삭제됨 (건너뜀): {target.name}")
+    if drift:
+        print("\n❌ 계획을 만든 뒤 대상이 변경되었습니다. 적용을 중단합니다 (다시 plan 을 실행하세요):")
+        for message in drift:
+            print(f"  - {message}")
+        return False
+    return True
+
+
+def add_plan_arguments(parser):
+    """Adds the shared 'plan' / 'apply <planfile>' commands to a delete tool's parser."""
+    parser.add_argument("command", nargs="?", choices=["run", "plan", "apply"], default="run",
+                        help="run: 조회·확인·삭제를 한 번에 (기본값) | plan: 삭제 계획 파일만 생성 | apply: 계획 파일 실행")
+    parser.add_argument("plan_file", nargs="?", help="apply 할 계획 파일 경로")
+    parser.add_argument("--out", help=f"plan 결과를 저장할 경로 (기본값: {PLAN_DIR}/<도구>-<시각>.json)")
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import argparse
+
+
+def get_cache_dir() -> str:
+    """Per-user cache directory shared by all Azure-IaC-Utils tools."""
+    if sys.platform.lower() in ("win32", "cygwin"):
+        base_dir = os.getenv("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    else:
+        base_dir = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base_dir, "azure-iac-utils")
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def positive_float(value: str) -> float:
+    """argparse type for rates and intervals: a number greater than zero."""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"0보다 큰 값이어야 합니다: {value}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts: an integer of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1 이상이어야 합니다: {value}")
+    return number
+
+
+def run_file_suffix() -> str:
+    """'<YYYYmmdd-HHMMSS>-<pid>': sorts by start time and stays unique when two runs start in the same second."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
@@ -0,0 +1,229 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+# --- Configuration ---
+# Where to write the metrics when a tool finishes (the --metrics-json / --metrics-prom options override these).
+# The Prometheus file is meant for node_exporter's textfile collector.
+METRICS_JSON_PATH = os.getenv("IAC_METRICS_JSON")
+METRICS_PROM_PATH = os.getenv("IAC_METRICS_PROM")
+
+# Histogram buckets (seconds) shared by API calls, operations and queue waits.
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def operation_name(method: str, url: str) -> str:
+    """
+    Groups API calls by operation type: resource names are replaced by {} so that, for example,
+    every compute start becomes 'POST MachineLearningServices/workspaces/{}/computes/{}/start'.
+    """
+    segments = [segment for segment in urlsplit(url).path.split("/") if segment]
+    lowered = [segment.lower() for segment in segments]
+    if "providers" in lowered:
+        index = len(lowered) - 1 - lowered[::-1].index("providers")
+        namespace = segments[index + 1].split(".")[-1] if index + 1 < len(segments) else ""
+        parts = [namespace] + ["{}" if i % 2 else part for i, part in enumerate(lowered[index + 2:])]
+    else:
+        parts = ["{}" if i % 2 else part for i, part in enumerate(lowered)]
+    return f"{method} {'/'.join(parts)}"
+
+
+class Histogram:
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value: float):
+        self.values.append(value)
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "count": len(self.values),
+            "sum": round(sum(self.values), 4),
+            "p50": round(self.percentile(0.50), 4),
+            "p95": round(self.percentile(0.95), 4),
+            "max": round(max(self.values, default=0.0), 4),
+        }
+
+
+class Metrics:
+    """
+    Process-wide timing collector for the Azure-IaC-Utils tools.
+
+    - phases:       wall time of each phase of a run (scan, action, report, ...)
+    - calls:        latency of every HTTP attempt, grouped by operation type (recorded by MetricsPolicy)
+    - retries:      attempts beyond the first, per operation type
+    - operations:   end-to-end durations measured by the tools (e.g. a whole start LRO, one workspace scan)
+    - queue_waits:  time spent waiting for a concurrency slot (limiter, thread pool)
+    """
+
+    def __init__(self):
+        self.tool = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+        self.started = time.time()
+        self.phases = {}
+        self.calls = {}
+        self.retries = {}
+        self.responses = {}
+        self.operations = {}
+        self.queue_waits = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def _observe(self, histograms: dict, name: str, seconds: float):
+        with self._lock:
+            histograms.setdefault(name, Histogram()).observe(seconds)
+
+    def observe_call(self, operation: str, seconds: float, status):
+        self._observe(self.calls, operation, seconds)
+        with self._lock:
+            self.responses[str(status)] = self.responses.get(str(status), 0) + 1
+
+    def record_retry(self, operation: str):
+        with self._lock:
+            self.retries[operation] = self.retries.get(operation, 0) + 1
+
+    def observe_operation(self, name: str, seconds: float):
+        self._observe(self.operations, name, seconds)
+
+    def observe_queue_wait(self, queue: str, seconds: float):
+        self._observe(self.queue_waits, queue, seconds)
+
+    @contextmanager
+    def timed(self, name: str):
+        """Records the duration of the block as an operation."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_operation(name, time.perf_counter() - start)
+
+    # --- Reporting ---
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "tool": self.tool,
+                "started_at": self.started,
+                "duration_s": round(time.time() - self.started, 3),
+                "phases_s": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+                "calls": {name: h.to_dict() for name, h in sorted(self.calls.items())},
+                "retries": dict(sorted(self.retries.items())),
+                "responses": dict(sorted(self.responses.items())),
+                "operations": {name: h.to_dict() for name, h in sorted(self.operations.items())},
+                "queue_waits": {name: h.to_dict() for name, h in sorted(self.queue_waits.items())},
+            }
+
+    def summary(self) -> str:
+        """One line for the end of a tool's report."""
+        with self._lock:
+            phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+            calls = sum(len(h.values) for h in self.calls.values())
+            retries = sum(self.retries.values())
+            waits = [value for h in self.queue_waits.values() for value in h.values]
+        wait_text = f", queue wait max {max(waits):.2f}s" if waits else ""
+        return f"Timing: {phases or 'no phases'}; {calls} API calls, {retries} retries{wait_text}."
+
+    def to_prometheus(self) -> str:
+        data_lines = []
+        tool = self.tool.replace('"', "")
+
+        def _histogram(metric: str, label: str, histograms: dict):
+            data_lines.append(f"# TYPE {metric} histogram")
+            for name, histogram in sorted(histograms.items()):
+                labels = f'tool="{tool}",{label}="{name}"'
+                for bound in BUCKETS:
+                    count = sum(1 for value in histogram.values if value <= bound)
+                    data_lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                data_lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {len(histogram.values)}')
+                data_lines.append(f"{metric}_sum{{{labels}}} {sum(histogram.values):.6f}")
+                data_lines.append(f"{metric}_count{{{labels}}} {len(histogram.values)}")
+
+        with self._lock:
+            data_lines.append("# TYPE iac_run_duration_seconds gauge")
+            data_lines.append(f'iac_run_duration_seconds{{tool="{tool}"}} {time.time() - self.started:.3f}')
+            data_lines.append("# TYPE iac_phase_duration_seconds gauge")
+            for name, seconds in self.phases.items():
+                data_lines.append(f'iac_phase_duration_seconds{{tool="{tool}",phase="{name}"}} {seconds:.3f}')
+            _histogram("iac_api_call_duration_seconds", "operation", self.calls)
+            data_lines.append("# TYPE iac_api_call_retries_total counter")
+            for name, count in sorted(self.retries.items()):
+                data_lines.append(f'iac_api_call_retries_total{{tool="{tool}",operation="{name}"}} {count}')
+            data_lines.append("# TYPE iac_api_responses_total counter")
+            for status, count in sorted(self.responses.items()):
+                data_lines.append(f'iac_api_responses_total{{tool="{tool}",status="{status}"}} {count}')
+            _histogram("iac_operation_duration_seconds", "operation", self.operations)
+            _histogram("iac_queue_wait_seconds", "queue", self.queue_waits)
+        return "\n".join(data_lines) + "\n"
+
+    def export(self, json_path: str = None, prom_path: str = None):
+        """Writes the JSON summary and/or Prometheus textfile (atomically, so a collector never reads half a file)."""
+        for path, render in ((json_path or METRICS_JSON_PATH, lambda: json.dumps(self.to_dict(), indent=2)),
+                             (prom_path or METRICS_PROM_PATH, self.to_prometheus)):
+            if not path:
+                continue
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(render())
+            os.replace(temp_path, path)
+            print(f"Metrics written to {path}")
+
+
+class MetricsPolicy(SansIOHTTPPolicy):
+    """
+    azure-core per-retry policy: times every HTTP attempt and counts retries (the pipeline context
+    is shared by all attempts of one call). Added to the management clients by arm_client_kwargs().
+    """
+
+    def on_request(self, request):
+        context = request.context
+        context["iac_metrics_attempt"] = context.get("iac_metrics_attempt", 0) + 1
+        context["iac_metrics_start"] = time.perf_counter()
+        if context["iac_metrics_attempt"] > 1:
+            http_request = request.http_request
+            metrics.record_retry(operation_name(http_request.method, http_request.url))
+
+    def _finish(self, request, status):
+        start = request.context.get("iac_metrics_start")
+        if start is not None:
+            http_request = request.http_request
+            metrics.observe_call(operation_name(http_request.method, http_request.url),
+                                 time.perf_counter() - start, status)
+
+    def on_response(self, request, response):
+        self._finish(request, response.http_response.status_code)
+
+    def on_exception(self, request):
+        self._finish(request, "error")
+
+
+metrics = Metrics()
+metrics_policy = MetricsPolicy()
+
+
+def add_metrics_arguments(parser):
+    """Adds --metrics-json / --metrics-prom to a tool's parser."""
+    parser.add_argument("--metrics-json", metavar="PATH", default=METRICS_JSON_PATH,
+                        help="Write phase timings, API call latencies, retries and queue waits as JSON")
+    parser.add_argument("--metrics-prom", metavar="PATH", default=METRICS_PROM_PATH,
+                        help="Write the same metrics as a Prometheus textfile (node_exporter textfile collector)")
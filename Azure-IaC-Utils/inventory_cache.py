@@ -0,0 +1,173 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from compute_inventory import WorkspaceRecord
+from iac_common import get_cache_dir
+
+# --- Configuration ---
+# How long the workspace -> RG -> compute mapping is trusted before it is rediscovered (seconds).
+DEFAULT_CACHE_TTL = int(os.getenv("INVENTORY_CACHE_TTL", 24 * 60 * 60))
+
+
+CACHE_PATH = os.getenv("INVENTORY_CACHE_PATH") or os.path.join(get_cache_dir(), "inventory.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS inventory_meta (
+    subscription_id TEXT PRIMARY KEY,
+    backend         TEXT,
+    refreshed_at    REAL
+);
+CREATE TABLE IF NOT EXISTS workspaces (
+    subscription_id TEXT,
+    resource_group  TEXT COLLATE NOCASE,
+    name            TEXT COLLATE NOCASE,
+    storage_account TEXT,
+    scanned_at      REAL,
+    PRIMARY KEY (subscription_id, resource_group, name)
+);
+CREATE TABLE IF NOT EXISTS computes (
+    subscription_id TEXT,
+    resource_group  TEXT COLLATE NOCASE,
+    workspace       TEXT COLLATE NOCASE,
+    name            TEXT COLLATE NOCASE,
+    vm_size         TEXT,
+    PRIMARY KEY (subscription_id, resource_group, workspace, name)
+);
+"""
+
+
+class InventoryCache:
+    """
+    SQLite store for the slow-changing part of the inventory: workspaces, resource groups,
+    storage accounts and compute instance names. Compute states are never cached.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error.
+                yield conn
+        finally:
+            conn.close()
+
+    def get_age(self, subscription_id: str):
+        """Seconds since the subscription was last enumerated, or None if it never was."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT refreshed_at FROM inventory_meta WHERE subscription_id = ?",
+                               (subscription_id,)).fetchone()
+        return None if row is None else time.time() - row[0]
+
+    def load_workspaces(self, subscription_id: str) -> list:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, resource_group, storage_account FROM workspaces "
+                                "WHERE subscription_id = ? ORDER BY name", (subscription_id,)).fetchall()
+        return [WorkspaceRecord(*row) for row in rows]
+
+    def load_compute_names(self, subscription_id: str, workspace: WorkspaceRecord):
+        """Cached compute names of a workspace, or None if the workspace was never scanned successfully."""
+        with self._connect() as conn:
+            scanned = conn.execute("SELECT scanned_at FROM workspaces WHERE subscription_id = ? "
+                                   "AND resource_group = ? AND name = ?",
+                                   (subscription_id, workspace.resource_group, workspace.name)).fetchone()
+            if scanned is None or scanned[0] is None:
+                return None
+            rows = conn.execute("SELECT name FROM computes WHERE subscription_id = ? "
+                                "AND resource_group = ? AND workspace = ?",
+                                (subscription_id, workspace.resource_group, workspace.name)).fetchall()
+        return [row[0] for row in rows]
+
+    def replace_workspaces(self, subscription_id: str, backend_name: str, workspaces: list):
+        """Stores a fresh workspace enumeration; computes are re-recorded as each workspace is scanned."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM workspaces WHERE subscription_id = ?", (subscription_id,))
+            conn.execute("DELETE FROM computes WHERE subscription_id = ?", (subscription_id,))
+            conn.executemany("INSERT INTO workspaces VALUES (?, ?, ?, ?, NULL)",
+                             [(subscription_id, ws.resource_group, ws.name, ws.storage_account) for ws in workspaces])
+            conn.execute("INSERT OR REPLACE INTO inventory_meta VALUES (?, ?, ?)",
+                         (subscription_id, backend_name, time.time()))
+
+    def save_workspace_scan(self, subscription_id: str, workspace: WorkspaceRecord, computes: list):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE workspaces SET scanned_at = ?, storage_account = COALESCE(?, storage_account) "
+                         "WHERE subscription_id = ? AND resource_group = ? AND name = ?",
+                         (time.time(), workspace.storage_account, subscription_id, workspace.resource_group, workspace.name))
+            conn.execute("DELETE FROM computes WHERE subscription_id = ? AND resource_group = ? AND workspace = ?",
+                         (subscription_id, workspace.resource_group, workspace.name))
+            conn.executemany("INSERT OR REPLACE INTO computes VALUES (?, ?, ?, ?, ?)",
+                             [(subscription_id, c.resource_group, c.workspace, c.name, c.vm_size) for c in computes])
+
+
+class CachedInventory:
+    """
+    Wraps an inventory backend with the on-disk cache.
+
+    While the cache is younger than 'ttl', list_workspaces() is answered from disk (no enumeration
+    call at all), workspaces known to have no compute instances are skipped, and only the remaining
+    workspaces are asked for their current compute states. '--refresh' forces a full rediscovery.
+    """
+
+    def __init__(self, backend, subscription_id: str, ttl: int = DEFAULT_CACHE_TTL, refresh: bool = False,
+                 cache: InventoryCache = None):
+        self.backend = backend
+        self.subscription_id = subscription_id
+        self.ttl = ttl
+        self.refresh = refresh
+        self.cache = cache or InventoryCache()
+        self.name = f"{backend.name}, cached"
+        self.cache_age = None
+
+    def list_workspaces(self) -> list:
+        age = None if self.refresh else self.cache.get_age(self.subscription_id)
+        if age is not None and age < self.ttl:
+            self.cache_age = age
+            print(f"  [Cache] Using inventory cached {age / 60:.0f} min ago (use --refresh to rediscover).", flush=True)
+            return self.cache.load_workspaces(self.subscription_id)
+
+        self.cache_age = None
+        workspaces = self.backend.list_workspaces()
+        self.cache.replace_workspaces(self.subscription_id, self.backend.name, workspaces)
+        return workspaces
+
+    def scan_workspace(self, workspace: WorkspaceRecord) -> list:
+        if self.cache_age is not None:
+            cached_names = self.cache.load_compute_names(self.subscription_id, workspace)
+            if cached_names == []:
+                # Known to have no compute instances: nothing volatile to re-fetch.
+                return []
+            if cached_names is not None:
+                return self.backend.scan_compute_states(workspace)
+
+        computes = self.backend.scan_workspace(workspace)
+        if workspace.storage_account is None:
+            try:
+                workspace = self.backend.describe_workspace(workspace)
+            except Exception:
+                pass  # The storage account is informational only.
+        self.cache.save_workspace_scan(self.subscription_id, workspace, computes)
+        return computes
+
+    def scan_compute_states(self, workspace: WorkspaceRecord) -> list:
+        return self.backend.scan_compute_states(workspace)
+
+    def clear_states(self):
+        self.backend.clear_states()
+
+
+def add_cache_arguments(parser):
+    """Adds the shared --cache/--refresh/--cache-ttl options to a tool's argument parser."""
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse the on-disk inventory cache (faster; instances and workspaces created since "
+                             "the cache was written are missed until it expires or --refresh is given)")
+    parser.add_argument("--refresh", action="store_true", help="With --cache: ignore the cached inventory and rediscover all workspaces")
+    parser.add_argument("--cache-ttl", type=int, default=DEFAULT_CACHE_TTL,
+                        help=f"With --cache: seconds the cached inventory stays valid (default: {DEFAULT_CACHE_TTL})")
@@ -0,0 +1,385 @@
+import os
+import re
+import sys
+import time
+import argparse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from azure.core.exceptions import HttpResponseError
+from compute_rest import ArmRestClient, ArmRestError, ML_API_VERSION, WORKSPACE_TYPE
+from iac_metrics import metrics, add_metrics_arguments
+from iac_common import format_duration
+
+# 환경변수 로드
+load_dotenv()
+
+SUBSCRIPTION_ID = os.getenv("AZURE_SUBSCRIPTION_ID")
+
+COGNITIVE_API_VERSION = "2023-05-01"
+KEYVAULT_API_VERSION = "2022-07-01"
+RESOURCE_GROUP_API_VERSION = "2021-04-01"
+
+# 구독의 소프트 삭제된 ML 작업 영역 목록 ('az ml workspace list-deleted' 와 같은 API)
+DELETED_WORKSPACES_PATH = "/subscriptions/{subscription_id}/providers/Microsoft.MachineLearningServices/deletedWorkspaces"
+
+# 동시에 진행하는 영구 삭제 수 (작업마다 스레드 1개가 LRO 완료까지 폴링)
+MAX_CONCURRENT_PURGES = 8
+# 영구 삭제 1건의 최대 대기 시간(초)
+PURGE_TIMEOUT = 1800
+
+# 수업 리소스 이름 규칙 (대소문자 구분 없는 정규식, Azure-Foundry / learn-terraform-azure 의 Terraform 참고)
+ACCOUNT_RG_PATTERN = r"^\d{2}_(AI_)?RG"
+VAULT_PATTERN = r"^(kv\d{2}|\d{2}kv)"
+WORKSPACE_PATTERN = r"^\d{2}mlworkspace"
+
+ACCOUNT = "account"
+VAULT = "vault"
+WORKSPACE = "workspace"
+KINDS = [ACCOUNT, VAULT, WORKSPACE]
+KIND_LABELS = {ACCOUNT: "AI 계정", VAULT: "Key Vault", WORKSPACE: "ML 작업 영역"}
+
+# 최종 결과
+PURGED = "purged"
+NOT_FOUND = "not_found"
+SKIPPED = "skipped"
+FAILED = "failed"
+OUTCOME_LABELS = {PURGED: "영구 삭제", NOT_FOUND: "이미 없음", SKIPPED: "건너뜀", FAILED: "실패"}
+
+# 소프트 삭제된 리소스 1개. 'purge' 는 영구 삭제 요청 (method, path, params), 날짜는 ARM 이 준 ISO 문자열.
+# 'resource_group_deleted': 리소스 그룹까지 삭제된 ML 작업 영역 (영구 삭제하려면 같은 이름의 그룹이 잠시 필요)
+SoftDeleted = namedtuple("SoftDeleted", ["kind", "name", "resource_group", "location", "deleted_on", "purge_on",
+                                         "protected", "purge", "resource_group_deleted"], defaults=[False])
+
+
+def _matches(pattern: str, value: str) -> bool:
+    return bool(value) and re.search(pattern, value, re.IGNORECASE) is not None
+
+
+def _resource_group_of(resource_id: str):
+    """ID 안의 'resourceGroups/<이름>' 부분 (없으면 None)"""
+    parts = (resource_id or "").split("/")
+    for i, part in enumerate(parts[:-1]):
+        if part.lower() == "resourcegroups":
+            return parts[i + 1]
+    return None
+
+
+def list_deleted_accounts(client: ArmRestClient, rg_pattern: str = ACCOUNT_RG_PATTERN) -> list:
+    """리소스 그룹이 rg_pattern 과 일치하는 소프트 삭제된 AI 계정"""
+    path = f"/subscriptions/{client.subscription_id}/providers/Microsoft.CognitiveServices/deletedAccounts"
+    accounts = []
+    for item in client.paged(path, {"api-version": COGNITIVE_API_VERSION}):
+        # ID 형식: /subscriptions/{sub}/providers/Microsoft.CognitiveServices/locations/{location}
+        #          /resourceGroups/{rg}/deletedAccounts/{name}
+        resource_group = _resource_group_of(item["id"])
+        if not _matches(rg_pattern, resource_group):
+            continue
+        properties = item.get("properties") or {}
+        accounts.append(SoftDeleted(ACCOUNT, item["name"], resource_group, item.get("location"),
+                                    properties.get("deletionDate"), properties.get("scheduledPurgeDate"), False,
+                                    ("DELETE", item["id"], {"api-version": COGNITIVE_API_VERSION})))
+    return accounts
+
+
+def list_deleted_vaults(client: ArmRestClient, pattern: str = VAULT_PATTERN) -> list:
+    """이름이 pattern 과 일치하는 소프트 삭제된 Key Vault"""
+    path = f"/subscriptions/{client.subscription_id}/providers/Microsoft.KeyVault/deletedVaults"
+    vaults = []
+    for item in client.paged(path, {"api-version": KEYVAULT_API_VERSION}):
+        if not _matches(pattern, item["name"]):
+            continue
+        properties = item.get("properties") or {}
+        # vaultId 는 삭제 전 ID: /subscriptions/{sub}/resourceGroups/{rg}/providers/Microsoft.KeyVault/vaults/{name}
+        vaults.append(SoftDeleted(VAULT, item["name"], _resource_group_of(properties.get("vaultId")),
+                                  properties.get("location"), properties.get("deletionDate"),
+                                  properties.get("scheduledPurgeDate"), bool(properties.get("purgeProtectionEnabled")),
+                                  ("POST", f"{item['id']}/purge", {"api-version": KEYVAULT_API_VERSION})))
+    return vaults
+
+
+def _workspace_path(subscription_id: str, resource_group: str, workspace_name: str) -> str:
+    return f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/{WORKSPACE_TYPE}/{workspace_name}"
+
+
+def _workspace_is_live(client: ArmRestClient, resource_group: str, workspace_name: str) -> bool:
+    try:
+        client.get_workspace(resource_group, workspace_name)
+        return True
+    except ArmRestError as e:
+        if e.status_code == 404:
+            return False
+        raise
+
+
+def list_deleted_workspaces(client: ArmRestClient, pattern: str = WORKSPACE_PATTERN) -> list:
+    """
+    이름이 pattern 과 일치하는 소프트 삭제된 ML 작업 영역 (리소스 그룹째 삭제된 것 포함)
+    영구 삭제는 원래 ID 에 DELETE ?forceToPurge=true 로 요청합니다.
+    """
+    path = DELETED_WORKSPACES_PATH.format(subscription_id=client.subscription_id)
+    deleted = [item for item in client.paged(path, {"api-version": ML_API_VERSION}) if _matches(pattern, item["name"])]
+    if not deleted:
+        return []
+
+    groups = f"/subscriptions/{client.subscription_id}/resourcegroups"
+    live_groups = {group["name"].lower() for group in client.paged(groups, {"api-version": RESOURCE_GROUP_API_VERSION})}
+    workspaces = []
+    for item in deleted:
+        properties = item.get("properties") or {}
+        resource_group = _resource_group_of(properties.get("workspaceId")) or _resource_group_of(item["id"])
+        if resource_group is None:
+            continue
+        params = {"api-version": ML_API_VERSION, "forceToPurge": "true"}
+        workspaces.append(SoftDeleted(WORKSPACE, item["name"], resource_group, item.get("location"),
+                                      properties.get("deletedDate") or properties.get("deletionDate"),
+                                      properties.get("scheduledPurgeDate"), False,
+                                      ("DELETE", _workspace_path(client.subscription_id, resource_group, item["name"]),
+                                       params),
+                                      resource_group.lower() not in live_groups))
+    return workspaces
+
+
+def discover(client: ArmRestClient, kinds: list, patterns: dict) -> tuple:
+    """요청한 종류를 동시에 조회합니다. ([SoftDeleted], {종류: 오류 메시지}) 반환"""
+    listers = {
+        ACCOUNT: lambda: list_deleted_accounts(client, patterns[ACCOUNT]),
+        VAULT: lambda: list_deleted_vaults(client, patterns[VAULT]),
+        WORKSPACE: lambda: list_deleted_workspaces(client, patterns[WORKSPACE]),
+    }
+    records, errors = [], {}
+    with ThreadPoolExecutor(max_workers=len(kinds)) as executor:
+        futures = {executor.submit(listers[kind]): kind for kind in kinds}
+        for future in as_completed(futures):
+            try:
+                records.extend(future.result())
+            except (HttpResponseError, OSError) as e:
+                errors[futures[future]] = str(e)
+    return sorted(records, key=lambda r: (KINDS.index(r.kind), r.name.lower())), errors
+
+
+def restore_resource_groups(client: ArmRestClient, records: list) -> tuple:
+    """
+    리소스 그룹째 삭제된 ML 작업 영역은 그 그룹이 있어야 영구 삭제할 수 있으므로, 같은 이름·위치로 빈 그룹을 잠시
+    만듭니다. (이 함수가 새로 만든 그룹 목록, 영구 삭제에 쓸 수 있는 그룹 목록) 반환.
+    remove_resource_groups 로 다시 삭제하는 것은 새로 만든(201) 그룹뿐이며, 그 사이 다른 곳에서 다시 만든 그룹은 건드리지 않습니다.
+    """
+    groups = {}
+    for record in records:
+        if record.kind == WORKSPACE and record.resource_group_deleted:
+            groups.setdefault(record.resource_group.lower(), (record.resource_group, record.location))
+    created, available = [], []
+    for name, location in groups.values():
+        if not location:
+            print(f"  ⏭️ 리소스 그룹 {name} 의 위치를 알 수 없어 다시 만들지 않습니다.")
+            continue
+        path = f"/subscriptions/{client.subscription_id}/resourcegroups/{name}"
+        params = {"api-version": RESOURCE_GROUP_API_VERSION}
+        try:
+            try:
+                client.request("HEAD", path, params)
+            except ArmRestError as e:
+                if e.status_code != 404:
+                    raise
+            else:
+                # 조회 후 다시 만들어진 그룹: PUT 은 그룹의 태그를 지우므로 보내지 않고 그대로 사용
+                print(f"  ℹ️ 리소스 그룹 {name} 이(가) 이미 다시 만들어져 있어 그대로 사용합니다.")
+                available.append(name)
+                continue
+            response = client.request("PUT", path, params, {"location": location})
+        except ArmRestError as e:
+            print(f"  ❌ 리소스 그룹 {name} 을(를) 만들지 못했습니다: {e.message}")
+            continue
+        available.append(name)
+        if response.status_code == 201:
+            print(f"  ➕ 리소스 그룹 {name} 을(를) 영구 삭제용으로 잠시 만들었습니다.")
+            created.append(name)
+        else:
+            print(f"  ℹ️ 리소스 그룹 {name} 이(가) 그 사이 다시 만들어져 있어 나중에 삭제하지 않습니다.")
+    return created, available
+
+
+def remove_resource_groups(client: ArmRestClient, names: list, timeout: float = PURGE_TIMEOUT) -> list:
+    """
+    restore_resource_groups 가 만든 그룹을 다시 삭제하고 끝날 때까지 기다립니다. 그 사이 리소스가 생긴 그룹은 삭제하지
+    않고 남겨 둡니다. 삭제하지 못한 그룹 목록 반환
+    """
+
+    def _remove(name):
+        path = f"/subscriptions/{client.subscription_id}/resourcegroups/{name}"
+        params = {"api-version": RESOURCE_GROUP_API_VERSION}
+        try:
+            if next(iter(client.paged(f"{path}/resources", params)), None) is not None:
+                return name, None, True
+            response = client.request("DELETE", path, params)
+            status_url = response.headers.get("Location")
+            status = client.wait_for_operation(status_url, timeout) if response.status_code == 202 and status_url \
+                else "Succeeded"
+        except (HttpResponseError, OSError) as e:
+            return name, str(e), False
+        return name, None if status == "Succeeded" else status, False
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENT_PURGES, len(names)))) as executor:
+        for name, error, in_use in executor.map(_remove, names):
+            if error:
+                print(f"  ❌ 임시 리소스 그룹 {name} 삭제 실패: {error}")
+                failed.append(name)
+            elif in_use:
+                print(f"  ⚠️ 임시 리소스 그룹 {name} 에 그 사이 리소스가 생겨 삭제하지 않고 남겨 둡니다.")
+            else:
+                print(f"  ➖ 임시 리소스 그룹 {name} 을(를) 다시 삭제했습니다.")
+    return failed
+
+
+def purge(client: ArmRestClient, record: SoftDeleted, timeout: float = PURGE_TIMEOUT) -> tuple:
+    """리소스 1개를 영구 삭제하고 LRO 완료를 기다립니다. (record, 결과, 메시지, 소요 시간) 반환"""
+    if record.protected:
+        return record, SKIPPED, f"삭제 보호 사용 중, {record.purge_on} 까지 이름 사용 불가", 0.0
+    start = time.perf_counter()
+    method, path, params = record.purge
+    try:
+        # 조회 후 같은 이름으로 다시 만든 작업 영역은 건드리지 않음: forceToPurge 는 살아 있는 작업 영역도 영구 삭제함
+        if record.kind == WORKSPACE and _workspace_is_live(client, record.resource_group, record.name):
+            return record, NOT_FOUND, "다시 만들어진 작업 영역 (소프트 삭제 상태 아님)", 0.0
+        response = client.request(method, path, params)
+        if response.status_code == 204:
+            return record, NOT_FOUND, "영구 삭제할 대상 없음", time.perf_counter() - start
+        status = "Succeeded"
+        status_url = response.headers.get("Azure-AsyncOperation") or response.headers.get("Location")
+        if response.status_code == 202 and status_url:
+            status = client.wait_for_operation(status_url, timeout)
+    except ArmRestError as e:
+        if e.status_code == 404:
+            return record, NOT_FOUND, "이미 영구 삭제됨", time.perf_counter() - start
+        return record, FAILED, e.message, time.perf_counter() - start
+    except (HttpResponseError, OSError) as e:
+        return record, FAILED, str(e), time.perf_counter() - start
+
+    seconds = time.perf_counter() - start
+    if status != "Succeeded":
+        return record, FAILED, status, seconds
+    metrics.observe_operation(f"purge {record.kind}", seconds)
+    return record, PURGED, "영구 삭제 완료", seconds
+
+
+def purge_all(client: ArmRestClient, records: list, max_workers: int = MAX_CONCURRENT_PURGES,
+              timeout: float = PURGE_TIMEOUT) -> list:
+    """모든 리소스를 max_workers 개씩 동시에 영구 삭제합니다. 끝난 순서대로 [(record, 결과, 메시지, 소요 시간)] 반환"""
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(records)))) as executor:
+        futures = [executor.submit(purge, client, record, timeout) for record in records]
+        for future in as_completed(futures):
+            record, outcome, message, seconds = future.result()
+            results.append((record, outcome, message, seconds))
+            icon = "✅" if outcome in (PURGED, NOT_FOUND) else "⏭️" if outcome == SKIPPED else "❌"
+            print(f"  {icon} [{len(results)}/{len(records)}] {record.name} ({KIND_LABELS[record.kind]}): {message} "
+                  f"({format_duration(seconds)})", flush=True)
+    return results
+
+
+def print_records(records: list):
+    for kind in KINDS:
+        of_kind = [r for r in records if r.kind == kind]
+        if not of_kind:
+            continue
+        print(f"{KIND_LABELS[kind]} ({len(of_kind)}개):")
+        for record in of_kind:
+            details = f"삭제 {record.deleted_on or '-'}, Azure 자동 영구 삭제 {record.purge_on or '-'}"
+            notes = (" [삭제 보호]" if record.protected else "") + (" [리소스 그룹 삭제됨]" if record.resource_group_deleted else "")
+            print(f"  - {record.name:<30} RG: {record.resource_group or '-':<20} {record.location or '-':<14} "
+                  f"{details}{notes}")
+
+
+def print_report(results: list) -> int:
+    """종류별 요약과 아직 이름을 막고 있는 리소스를 출력합니다. 영구 삭제되지 않은 리소스 수 반환"""
+    print("=" * 60)
+    for kind in KINDS:
+        outcomes = [outcome for record, outcome, _, _ in results if record.kind == kind]
+        if outcomes:
+            counts = ", ".join(f"{OUTCOME_LABELS[outcome]} {outcomes.count(outcome)}개"
+                               for outcome in (PURGED, NOT_FOUND, SKIPPED, FAILED) if outcome in outcomes)
+            print(f"{KIND_LABELS[kind]}: {counts}")
+    blocking = [(record, outcome, message) for record, outcome, message, _ in results if outcome in (SKIPPED, FAILED)]
+    for record, outcome, message in blocking:
+        print(f"  {'❌' if outcome == FAILED else '⏭️'} {record.name} ({KIND_LABELS[record.kind]}): {message}")
+    return len(blocking)
+
+
+def main(args) -> int:
+    client = ArmRestClient(SUBSCRIPTION_ID, pool_size=max(args.workers, 8))
+    kinds = [kind for kind in KINDS if kind in (args.kind or KINDS)]
+    patterns = {ACCOUNT: args.account_rg_pattern, VAULT: args.vault_pattern, WORKSPACE: args.workspace_pattern}
+
+    with metrics.phase("discover"):
+        records, errors = discover(client, kinds, patterns)
+    for kind, error in errors.items():
+        print(f"소프트 삭제된 {KIND_LABELS[kind]} 조회 실패: {error}")
+    if not records:
+        print("수업 이름 규칙과 일치하는 소프트 삭제된 리소스가 없습니다.")
+        print(metrics.summary())
+        return 1 if errors else 0
+    print_records(records)
+
+    exit_code = 1 if errors else 0
+    if args.action == "purge":
+        print("=" * 60)
+        if not args.yes:
+            confirm = input(f"위 {len(records)}개 리소스를 영구 삭제하시겠습니까? 영구 삭제 후에는 복구할 수 없습니다. "
+                            f"(계속하려면 'yes' 입력): ")
+            if confirm.lower() != "yes":
+                print("취소되었습니다.")
+                return exit_code
+        print(f"{len(records)}개 리소스를 {args.workers}개씩 동시에 영구 삭제합니다...")
+        with metrics.phase("purge"):
+            created, available = restore_resource_groups(client, records)
+            available_keys = {name.lower() for name in available}
+            # 리소스 그룹이 없는 작업 영역은 요청해도 404 (ResourceGroupNotFound) 이므로 실패로 기록
+            unrestored = [r for r in records if r.resource_group_deleted and r.resource_group.lower() not in available_keys]
+            results = [(record, FAILED, "리소스 그룹을 다시 만들지 못해 영구 삭제할 수 없음", 0.0) for record in unrestored]
+            try:
+                results += purge_all(client, [r for r in records if r not in unrestored], args.workers, args.timeout)
+            finally:
+                if remove_resource_groups(client, created, args.timeout):
+                    exit_code = 1
+        if print_report(results):
+            exit_code = 1
+
+    print(metrics.summary())
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="재배포 시 이름 충돌을 일으키는 소프트 삭제된 AI 계정, Key Vault, ML 작업 영역을 조회하거나 영구 삭제합니다.",
+        epilog="예: python purge_soft_deleted.py list | python purge_soft_deleted.py purge --yes | "
+               "python purge_soft_deleted.py purge --kind vault --vault-pattern '^kv0[1-5]'")
+    parser.add_argument("action", nargs="?", choices=["list", "purge"], default="list",
+                        help="list: 영구 삭제 대상 조회 (기본값) | purge: 조회한 대상을 동시에 영구 삭제")
+    parser.add_argument("--kind", action="append", choices=KINDS, help="이 종류만 처리 (여러 번 지정 가능, 기본값: 전부)")
+    parser.add_argument("--account-rg-pattern", default=ACCOUNT_RG_PATTERN,
+                        help=f"AI 계정의 리소스 그룹 정규식 (기본값: {ACCOUNT_RG_PATTERN})")
+    parser.add_argument("--vault-pattern", default=VAULT_PATTERN,
+                        help=f"Key Vault 이름 정규식 (기본값: {VAULT_PATTERN})")
+    parser.add_argument("--workspace-pattern", default=WORKSPACE_PATTERN,
+                        help=f"ML 작업 영역 이름 정규식 (기본값: {WORKSPACE_PATTERN})")
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENT_PURGES,
+                        help=f"동시에 진행할 영구 삭제 수 (기본값: {MAX_CONCURRENT_PURGES})")
+    parser.add_argument("--timeout", type=float, default=PURGE_TIMEOUT,
+                        help=f"영구 삭제 1건의 최대 대기 시간(초) (기본값: {PURGE_TIMEOUT})")
+    parser.add_argument("--yes", action="store_true", help="확인 없이 영구 삭제")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    args.workers = max(1, args.workers)
+
+    if not SUBSCRIPTION_ID:
+        print("오류: AZURE_SUBSCRIPTION_ID 가 설정되지 않았습니다.")
+        sys.exit(1)
+
+    try:
+        exit_code = main(args)
+    except HttpResponseError as e:
+        print(f"오류: {e.message}")
+        exit_code = 1
+    metrics.export(args.metrics_json, args.metrics_prom)
+    sys.exit(exit_code)
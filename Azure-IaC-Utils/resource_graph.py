@@ -0,0 +1,27 @@
+from azure.mgmt.resourcegraph import ResourceGraphClient
+from azure.mgmt.resourcegraph.models import QueryRequest, QueryRequestOptions
+from azure_clients import get_client_factory
+
+# Maximum number of rows Azure Resource Graph returns per page.
+PAGE_SIZE = 1000
+
+
+def query_resource_graph(credential, subscription_id: str, query: str, client: ResourceGraphClient = None):
+    """
+    Runs a Resource Graph (KQL) query against a single subscription and yields every row as a dict.
+    Pages are followed with the '$skipToken' returned by the service, so large fleets still cost
+    one request per 1000 rows instead of one request per resource.
+    """
+    client = client or get_client_factory().get(ResourceGraphClient, credential)
+    skip_token = None
+
+    while True:
+        options = QueryRequestOptions(top=PAGE_SIZE, skip_token=skip_token, result_format="objectArray")
+        response = client.resources(QueryRequest(subscriptions=[subscription_id], query=query, options=options))
+
+        for row in response.data:
+            yield row
+
+        skip_token = response.skip_token
+        if not skip_token:
+            break
@@ -0,0 +1,161 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from iac_metrics import metrics
+from iac_common import format_duration, positive_float
+
+# --- Configuration ---
+# Seconds between status rounds. A round is a single resource group list call, however many deletes are pending.
+POLL_INTERVAL = 15
+# Deletes submitted in parallel (a submission only waits for ARM's 202 Accepted).
+SUBMIT_WORKERS = 8
+# A group seen back in a state other than 'Deleting' is a failed delete. Before it has been seen 'Deleting'
+# at least once, wait this long first: the list can lag behind the delete request.
+FAILURE_GRACE = 120
+# --force-vms: ARM deletes these types inside the group with force deletion (no graceful VM shutdown, no
+# per-VM dependency ordering), so a VM-bearing group is torn down by the one resource group LRO.
+FORCE_DELETION_TYPES = "Microsoft.Compute/virtualMachines,Microsoft.Compute/virtualMachineScaleSets"
+
+# Final outcomes.
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+
+
+class ResourceGroupDeleteTracker:
+    """
+    Deletes many resource groups at once and follows all of them from one poll loop.
+
+    submit() sends every begin_delete up front without an SDK poller (no thread per group). wait() then
+    lists the subscription's resource groups every poll_interval seconds: a group that is gone is deleted,
+    a group back in any state other than 'Deleting' failed to delete. Progress (remaining groups and an
+    estimated time left, from the durations of the deletes finished so far) is printed after each round.
+
+        tracker = ResourceGroupDeleteTracker(resource_client, force_deletion_types=FORCE_DELETION_TYPES)
+        tracker.submit(["01_RG", "02_RG"])
+        results = tracker.wait()          # {name: (outcome, message, seconds)}
+        failed = tracker.print_report()
+
+    With force_deletion_types, each delete is requested with ARM's forceDeletionTypes first; if ARM rejects
+    that request (feature not available, type not allowed), the plain delete is sent instead.
+    """
+
+    def __init__(self, resource_client, poll_interval: float = POLL_INTERVAL, timeout: float = None,
+                 force_deletion_types: str = None):
+        self.resource_client = resource_client
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.force_deletion_types = force_deletion_types
+        self.results = {}
+        self._pending = {}          # lowercase name -> (name, submitted_at)
+        self._seen_deleting = set()
+        self._total = 0
+
+    def submit(self, resource_group_names: list) -> int:
+        """Requests every delete. Returns the number accepted by ARM (rejections are recorded as failed)."""
+        def _submit(name):
+            try:
+                if self.force_deletion_types:
+                    try:
+                        self.resource_client.resource_groups.begin_delete(
+                            name, force_deletion_types=self.force_deletion_types, polling=False)
+                        return name, None
+                    except HttpResponseError as e:
+                        if e.status_code == 404:
+                            raise
+                        print(f"  ⚠️ '{name}' 강제 삭제 요청 거부, 일반 삭제로 재시도: {e.message}")
+                self.resource_client.resource_groups.begin_delete(name, polling=False)
+                return name, None
+            except ResourceNotFoundError:
+                return name, "not_found"
+            except HttpResponseError as e:
+                return name, e.message
+            except Exception as e:
+                return name, str(e)
+
+        self._total += len(resource_group_names)
+        with ThreadPoolExecutor(max_workers=SUBMIT_WORKERS) as executor:
+            for name, error in executor.map(_submit, resource_group_names):
+                if error is None:
+                    self._pending[name.lower()] = (name, time.time())
+                    print(f"  ✅ '{name}' 삭제 요청 접수")
+                elif error == "not_found":
+                    self.results[name] = (SUCCEEDED, "이미 삭제됨", 0.0)
+                    print(f"  ✅ '{name}' 이미 삭제되어 있음")
+                else:
+                    self.results[name] = (FAILED, error, 0.0)
+                    print(f"  ❌ '{name}' 삭제 요청 실패: {error}")
+        return len(self._pending)
+
+    def _finish(self, key: str, outcome: str, message: str, now: float):
+        name, submitted_at = self._pending.pop(key)
+        self.results[name] = (outcome, message, now - submitted_at)
+        if outcome == SUCCEEDED:
+            metrics.observe_operation("rg delete", now - submitted_at)
+
+    def _estimate_remaining(self, now: float):
+        """Seconds until the last pending delete should finish, from the average finished duration (None if unknown)."""
+        durations = [seconds for outcome, _, seconds in self.results.values() if outcome == SUCCEEDED and seconds > 0]
+        if not durations or not self._pending:
+            return None
+        average = sum(durations) / len(durations)
+        return max(0.0, max(average - (now - submitted_at) for _, submitted_at in self._pending.values()))
+
+    def _print_progress(self, started: float, now: float):
+        eta = self._estimate_remaining(now)
+        eta_text = "계산 중" if eta is None else "곧 완료" if eta < 1 else f"약 {format_duration(eta)}"
+        line = (f"  ⏳ 남은 리소스 그룹: {len(self._pending)}/{self._total} | 경과 {format_duration(now - started)}"
+                f" | 예상 남은 시간 {eta_text}")
+        if sys.stdout.isatty():
+            print(f"\r{line}   ", end="", flush=True)
+        else:
+            print(line, flush=True)
+
+    def wait(self) -> dict:
+        """Polls until every submitted delete has finished (or timed out). Returns {name: (outcome, message, seconds)}."""
+        started = time.time()
+        while self._pending:
+            self._print_progress(started, time.time())
+            time.sleep(self.poll_interval)
+            try:
+                states = {rg.name.lower(): rg.properties.provisioning_state if rg.properties else None
+                          for rg in self.resource_client.resource_groups.list()}
+            except HttpResponseError as e:
+                print(f"\n  ⚠️ 상태 조회 실패 (다음 주기에 재시도): {e.message}")
+                continue
+
+            now = time.time()
+            for key, (name, submitted_at) in list(self._pending.items()):
+                state = states.get(key, "__gone__")
+                if state == "__gone__":
+                    self._finish(key, SUCCEEDED, "삭제 완료", now)
+                elif state == "Deleting":
+                    self._seen_deleting.add(key)
+                    if self.timeout and now - submitted_at > self.timeout:
+                        self._finish(key, TIMED_OUT, f"{format_duration(self.timeout)} 안에 끝나지 않음", now)
+                elif key in self._seen_deleting or now - submitted_at > FAILURE_GRACE:
+                    self._finish(key, FAILED, f"삭제 실패: 리소스 그룹이 남아 있음 (provisioningState={state})", now)
+
+        if sys.stdout.isatty():
+            print()
+        return self.results
+
+    def print_report(self) -> int:
+        """Prints the outcome of every group. Returns the number of groups that were not deleted."""
+        icons = {SUCCEEDED: "✅", FAILED: "❌", TIMED_OUT: "⌛"}
+        for name, (outcome, message, seconds) in sorted(self.results.items()):
+            duration = f" ({format_duration(seconds)})" if seconds else ""
+            print(f"  {icons[outcome]} {name:<30} {message}{duration}")
+        return sum(1 for outcome, _, _ in self.results.values() if outcome != SUCCEEDED)
+
+
+def add_tracker_arguments(parser):
+    """Adds --wait / --poll-interval / --timeout to a delete tool's parser."""
+    parser.add_argument("--wait", action="store_true",
+                        help="모든 삭제를 한 번에 요청한 뒤 완료될 때까지 추적 (실패가 있으면 종료 코드 1)")
+    parser.add_argument("--poll-interval", type=positive_float, default=POLL_INTERVAL,
+                        help=f"상태 확인 주기(초) (기본값: {POLL_INTERVAL})")
+    parser.add_argument("--timeout", type=positive_float, default=None, help="리소스 그룹별 최대 대기 시간(초) (기본값: 무제한)")
+    parser.add_argument("--force-vms", action="store_true",
+                        help="VM·VM 확장 집합을 강제 삭제하며 리소스 그룹 삭제 (forceDeletionTypes, 거부되면 일반 삭제)")
@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from azure.core.exceptions import HttpResponseError
+from azure_clients import get_client_factory
+
+# --- Configuration ---
+# Role assignments re-created in parallel after a resource group is recreated.
+RESTORE_WORKERS = int(os.getenv("AZURE_IAC_ROLE_RESTORE_WORKERS", 8))
+
+# Fields kept in a snapshot (JSON-serialisable, so a snapshot can be stored in a run journal).
+SNAPSHOT_FIELDS = ["name", "role_definition_id", "principal_id", "principal_type", "description",
+                   "condition", "condition_version"]
+
+
+def _authorization_client(credential, subscription_id: str):
+    from azure.mgmt.authorization import AuthorizationManagementClient
+    return get_client_factory().get(AuthorizationManagementClient, credential, subscription_id)
+
+
+def resource_group_scope(subscription_id: str, resource_group_name: str) -> str:
+    return f"/subscriptions/{subscription_id}/resourceGroups/{resource_group_name}"
+
+
+def snapshot_role_assignments(credential, subscription_id: str, resource_group_name: str) -> list:
+    """
+    The role assignments made directly on the resource group (e.g. Terraform's user_rg_roles), as dicts.
+    Inherited assignments (subscription, management group) and those on resources inside the group are left out:
+    the first survive a resource group delete, the second go away with their resources.
+    """
+    scope = resource_group_scope(subscription_id, resource_group_name).lower()
+    client = _authorization_client(credential, subscription_id)
+    return [{field: getattr(assignment, field) for field in SNAPSHOT_FIELDS}
+            for assignment in client.role_assignments.list_for_resource_group(resource_group_name)
+            if (assignment.scope or "").lower() == scope]
+
+
+def restore_role_assignments(credential, subscription_id: str, resource_group_name: str, snapshot: list,
+                             max_workers: int = RESTORE_WORKERS) -> list:
+    """
+    Re-creates a snapshot's role assignments on the (recreated) resource group, in parallel.
+    Each keeps its original name (GUID), so the assignment ID Terraform has in its state is valid again.
+    Returns [(assignment, error message)] for the assignments that could not be created.
+    """
+    from azure.mgmt.authorization.models import RoleAssignmentCreateParameters
+
+    scope = resource_group_scope(subscription_id, resource_group_name)
+    client = _authorization_client(credential, subscription_id)
+
+    def _create(assignment):
+        parameters = RoleAssignmentCreateParameters(
+            role_definition_id=assignment["role_definition_id"],
+            principal_id=assignment["principal_id"],
+            principal_type=assignment["principal_type"],
+            description=assignment["description"],
+            condition=assignment["condition"],
+            condition_version=assignment["condition_version"],
+        )
+        try:
+            client.role_assignments.create(scope, assignment["name"], parameters)
+            return assignment, None
+        except HttpResponseError as e:
+            if e.error is not None and e.error.code == "RoleAssignmentExists":
+                return assignment, None
+            return assignment, e.message
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(snapshot)))) as executor:
+        return [(assignment, error) for assignment, error in executor.map(_create, snapshot) if error]
@@ -0,0 +1,134 @@
+import os
+import json
+import glob
+import time
+import threading
+from iac_common import get_cache_dir, run_file_suffix
+
+# --- Configuration ---
+JOURNAL_DIR = os.getenv("RUN_JOURNAL_DIR") or os.path.join(get_cache_dir(), "journals")
+# Older journals of the same tool/action beyond this count are removed when a new run starts.
+KEEP_JOURNALS = 20
+
+# Operation states written to the journal.
+PENDING = "pending"        # Found by the scan, nothing sent yet.
+SUBMITTED = "submitted"    # Accepted; 'polling_url' (or an SDK 'continuation_token') is stored to reattach the LRO.
+DONE = "done"
+SKIPPED = "skipped"        # Nothing to do (e.g. 409: already in the target state).
+FAILED = "failed"
+
+FINISHED_STATES = {DONE, SKIPPED}
+
+
+class RunJournal:
+    """
+    Append-only JSON-lines journal of a bulk run: one line per state change of each target.
+
+    If the run is interrupted (Ctrl+C, laptop sleep, token expiry), '--resume' reads the latest journal
+    of the same tool/action and replays only targets whose last state is not done/skipped, reattaching
+    to in-flight LROs through their continuation token or status URL instead of issuing them again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    @staticmethod
+    def _pattern(tool: str, action: str) -> str:
+        return os.path.join(JOURNAL_DIR, f"{tool}-{action}-*.jsonl")
+
+    @classmethod
+    def create(cls, tool: str, action: str, **run_info):
+        """Starts a new journal for this run (and prunes old ones of the same tool/action)."""
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        old_journals = sorted(glob.glob(cls._pattern(tool, action)))
+        for old_path in old_journals[:max(0, len(old_journals) - KEEP_JOURNALS + 1)]:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+        journal = cls(os.path.join(JOURNAL_DIR, f"{tool}-{action}-{run_file_suffix()}.jsonl"))
+        journal.record_run(tool=tool, action=action, **run_info)
+        return journal
+
+    @classmethod
+    def latest(cls, tool: str, action: str):
+        """The most recent journal of this tool/action, or None."""
+        paths = sorted(glob.glob(cls._pattern(tool, action)))
+        return cls(paths[-1]) if paths else None
+
+    def _append(self, entry: dict):
+        entry["ts"] = time.time()
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            # One handle for the whole run. Each line is flushed to the OS, so a killed or interrupted
+            # process loses nothing; fsync (power loss) is left to close().
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        """Syncs the journal to disk and closes it (a later record() reopens it)."""
+        with self._lock:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    def record_run(self, **run_info):
+        self._append({"event": "run", **run_info})
+
+    def record(self, target: str, state: str, **details):
+        self._append({"event": "target", "target": target, "state": state, **details})
+
+    def read(self) -> tuple:
+        """Returns (run_info, {target: last entry}) built from every line of the journal."""
+        run_info = {}
+        targets = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by the interruption itself.
+                if entry.get("event") == "run":
+                    if not run_info:
+                        run_info = entry
+                    continue
+                # Keep details (e.g. a continuation token) from earlier lines unless a later line replaces them.
+                targets[entry["target"]] = {**targets.get(entry["target"], {}), **entry}
+        return run_info, targets
+
+    def unfinished(self) -> list:
+        """Last entries of targets that still need work (pending, submitted or failed)."""
+        _, targets = self.read()
+        return [entry for entry in targets.values() if entry["state"] not in FINISHED_STATES]
+
+
+# Result status of the start/stop tools -> journal state.
+RESULT_STATES = {"success": DONE, "skipped": SKIPPED, "failed": FAILED}
+
+
+def compute_target(resource_group: str, workspace_name: str, compute_name: str) -> str:
+    """Journal key of a compute instance (ARM names are case-insensitive)."""
+    return f"{resource_group}/{workspace_name}/{compute_name}".lower()
+
+
+async def journaled(journal, target: str, operation) -> tuple:
+    """Awaits a start/stop operation and records its (compute, workspace, message, status) result."""
+    result = await operation
+    if journal is not None:
+        journal.record(target, RESULT_STATES[result[3]], message=result[2])
+    return result
+
+
+def submission_recorder(journal, target: str):
+    """on_submitted callback for AioComputeEngine that journals an accepted operation (None without a journal)."""
+    if journal is None:
+        return None
+
+    def _record(polling_url):
+        journal.record(target, SUBMITTED, polling_url=polling_url)
+    return _record
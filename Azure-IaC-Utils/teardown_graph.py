@@ -0,0 +1,181 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from iac_metrics import metrics
+
+# --- Configuration ---
+# Deletes running at the same time (one worker thread each; a worker waits on its delete LRO).
+MAX_WORKERS = 8
+# Default seconds a single delete LRO may take before it counts as failed.
+DELETE_TIMEOUT = 600
+# A delete refused because a dependency is still being released (e.g. an NSG whose NIC delete finished
+# moments ago) is retried this many times, with the delay doubling from RETRY_BASE_DELAY seconds.
+RETRY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 5
+# Error codes ARM returns while something still references the resource, or while another operation on it
+# has not finished. Generic codes (Conflict, OperationNotAllowed) also cover locks, policy and quota denials
+# that never clear, so they fail at once instead of being retried.
+RETRYABLE_CODES = {
+    "InUseNetworkSecurityGroupCannotBeDeleted",
+    "InUseSubnetCannotBeDeleted",
+    "InUsePublicIpAddressCannotBeDeleted",
+    "PublicIPAddressCannotBeDeleted",  # Still associated with a NIC or load balancer being deleted.
+    "NicInUse",
+    "NicReservedForAnotherVm",  # Held for a short while after its VM was deleted.
+    "AnotherOperationInProgress",
+}
+
+# Final outcomes.
+DELETED = "deleted"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+# One resource to delete. 'delete' starts the delete and returns an LRO poller, or None if it already finished.
+# 'references' are the IDs of resources it uses (a VM's NICs and disks, a NIC's NSG, public IP and VNet):
+# those are deleted only after this one.
+TeardownNode = namedtuple("TeardownNode", ["id", "name", "kind", "delete", "references", "timeout"])
+
+
+def _is_retryable(error: HttpResponseError) -> bool:
+    code = getattr(getattr(error, "error", None), "code", None)
+    return code in RETRYABLE_CODES or error.status_code == 429
+
+
+class TeardownGraph:
+    """
+    Deletes a set of resources concurrently in dependency order.
+
+    A resource starts as soon as every resource that references it is gone, instead of after a fixed
+    per-type sequence and sleeps: the VM goes first, its NICs and disks as soon as the VM delete has
+    finished, an NSG or public IP as soon as its last NIC is gone, the VNet after every NIC in its
+    subnets. Unrelated resources (SSH keys, storage accounts, another VM's chain) never wait for each other.
+
+        graph = TeardownGraph()
+        graph.add(vm.id, vm.name, "vm", lambda: compute.virtual_machines.begin_delete(rg, vm.name),
+                  references=[nic.id for nic in vm.network_profile.network_interfaces])
+        graph.add(nic_id, ...)
+        results = graph.run()             # {id: (outcome, message, seconds)}
+        failed = graph.print_report()
+
+    A failed delete blocks what it references (those stay in place, reported as blocked).
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+        self.nodes = {}
+        self.results = {}
+
+    def add(self, resource_id: str, name: str, kind: str, delete, references=(), timeout: float = DELETE_TIMEOUT):
+        """Adds a resource. Adding the same ID twice keeps the first entry."""
+        key = resource_id.lower()
+        if key not in self.nodes:
+            self.nodes[key] = TeardownNode(resource_id, name, kind, delete,
+                                           [ref.lower() for ref in references if ref], timeout)
+
+    def _blockers(self) -> dict:
+        """{id: set of IDs that must be deleted first} (references to resources outside the graph are ignored)."""
+        blockers = {key: set() for key in self.nodes}
+        for key, node in self.nodes.items():
+            for ref in node.references:
+                if ref in blockers and ref != key:
+                    blockers[ref].add(key)
+        return blockers
+
+    def waves(self) -> list:
+        """The resources by topological level: everything in a wave can be deleted at the same time."""
+        blockers = {key: set(keys) for key, keys in self._blockers().items()}
+        waves = []
+        while blockers:
+            wave = sorted(key for key, keys in blockers.items() if not keys)
+            if not wave:  # Cycle: nothing is free, delete the rest together.
+                wave = sorted(blockers)
+            waves.append([self.nodes[key] for key in wave])
+            for key in wave:
+                del blockers[key]
+            for keys in blockers.values():
+                keys.difference_update(wave)
+        return waves
+
+    def print_plan(self):
+        for level, wave in enumerate(self.waves(), 1):
+            names = ", ".join(f"{node.name}({node.kind})" for node in wave)
+            print(f"  [{level}] {names}")
+
+    def _delete(self, node: TeardownNode) -> tuple:
+        """Runs one delete to completion. Returns (outcome, message, seconds)."""
+        start = time.time()
+        delay = RETRY_BASE_DELAY
+        for attempt in range(1, RETRY_ATTEMPTS + 1):
+            try:
+                poller = node.delete()
+                if poller is not None:
+                    poller.wait(timeout=node.timeout)
+                    if not poller.done():
+                        return FAILED, f"{node.timeout:.0f}초 안에 삭제되지 않음", time.time() - start
+                    poller.result()
+                seconds = time.time() - start
+                metrics.observe_operation(f"delete {node.kind}", seconds)
+                return DELETED, "삭제 완료", seconds
+            except ResourceNotFoundError:
+                return DELETED, "이미 삭제됨", time.time() - start
+            except HttpResponseError as e:
+                if attempt == RETRY_ATTEMPTS or not _is_retryable(e):
+                    return FAILED, e.message, time.time() - start
+                print(f"  ↻ {node.name}: 아직 사용 중, {delay}초 후 재시도 ({attempt}/{RETRY_ATTEMPTS - 1})")
+                metrics.record_retry(f"delete {node.kind}")
+                time.sleep(delay)
+                delay *= 2
+            except Exception as e:
+                return FAILED, str(e), time.time() - start
+
+    def run(self) -> dict:
+        """Deletes everything. Returns {resource id: (outcome, message, seconds)}."""
+        blockers = self._blockers()
+        remaining = dict(blockers)
+        running = {}
+
+        def _start_ready(executor):
+            ready = [key for key, keys in remaining.items() if not keys]
+            if not ready and not running and remaining:
+                ready = list(remaining)  # Cycle: start the rest rather than wait forever.
+            for key in ready:
+                del remaining[key]
+                node = self.nodes[key]
+                print(f"  🗑️ 삭제 시작: {node.name} ({node.kind})")
+                running[executor.submit(self._delete, node)] = key
+
+        def _release(key: str, failed: bool):
+            for other in list(remaining):
+                if other not in remaining or key not in remaining[other]:
+                    continue
+                if failed:
+                    # What a resource that is still there uses cannot be deleted either.
+                    del remaining[other]
+                    self.results[self.nodes[other].id] = (BLOCKED, f"'{self.nodes[key].name}' 삭제 실패로 건너뜀", 0.0)
+                    _release(other, True)
+                else:
+                    remaining[other] = remaining[other] - {key}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            _start_ready(executor)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    outcome, message, seconds = future.result()
+                    node = self.nodes[key]
+                    self.results[node.id] = (outcome, message, seconds)
+                    icon = "✓" if outcome == DELETED else "✗"
+                    print(f"  {icon} {node.name} ({node.kind}): {message} ({seconds:.0f}s)")
+                    _release(key, outcome != DELETED)
+                _start_ready(executor)
+        return self.results
+
+    def print_report(self) -> int:
+        """Prints the resources that were not deleted. Returns their number."""
+        not_deleted = [(self.nodes[resource_id.lower()], outcome, message)
+                       for resource_id, (outcome, message, _) in self.results.items() if outcome != DELETED]
+        for node, outcome, message in not_deleted:
+            print(f"  {'✗' if outcome == FAILED else '⏭'} {node.name} ({node.kind}): {message}")
+        return len(not_deleted)